@@ -1,6 +1,35 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.utils.html import format_html
-from .models import Tournament, Team, Player, Match, NewsArticle, Game, MatchReminder, TournamentParticipant
+from .models import (
+    Tournament, Team, Player, Match, NewsArticle, Game, Reminder, TournamentParticipant,
+    TournamentStage, BracketNode,
+)
+from .scoring import SCORE_FIELDS, StaleScoreError, save_changed_fields
+from . import matchday
+from .bulk import export_lines
+from .schedule_conflicts import find_conflicts, day_is_full
+
+
+def export_csv_action(entity):
+    """Admin action streaming the selected rows in the import_data CSV layout."""
+    def export(modeladmin, request, queryset):
+        response = StreamingHttpResponse(export_lines(entity, 'csv', queryset), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{entity}.csv"'
+        return response
+    export.__name__ = f'export_{entity}_csv'
+    export.short_description = f"Export selected {entity} as CSV"
+    return export
 
 # Unregister NewsArticle if already registered
 try:
@@ -26,14 +55,38 @@ class NewsArticleAdmin(admin.ModelAdmin):
 
 @admin.register(Tournament)
 class TournamentAdmin(admin.ModelAdmin):
+    actions = [export_csv_action('tournaments')]
     list_display = ('title', 'game', 'start_date', 'start_time', 'end_date', 'end_time', 'teams', 'featured')
     list_filter = ('featured', 'game', 'status')
     search_fields = ('title', 'game__name', 'location')
+    list_select_related = ('game',)
+
+    def get_queryset(self, request):
+        # Same values as Tournament.start_time()/end_time(), computed in the page query
+        # (index seeks on match(tournament, match_time)) instead of two queries per row
+        matches = Match.objects.filter(tournament=OuterRef('pk'))
+        first = matches.order_by('match_time')
+        last = matches.order_by('-match_time')
+        return super().get_queryset(request).annotate(
+            first_match_time=Subquery(first.values('match_time')[:1]),
+            last_match_time=Coalesce(Subquery(last.values('completed_at')[:1]),
+                                     Subquery(last.values('match_time')[:1])),
+        )
+
+    @admin.display(description='Start Time', ordering='first_match_time')
+    def start_time(self, obj):
+        return obj.first_match_time
+
+    @admin.display(description='End Time', ordering='last_match_time')
+    def end_time(self, obj):
+        return obj.last_match_time
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
+    actions = [export_csv_action('teams')]
     list_display = ('name', 'tag', 'game', 'region', 'rank')
-    search_fields = ('name', 'tag', 'game', 'region')
+    search_fields = ('name', 'tag', 'game__name', 'region')
+    list_select_related = ('game',)
     fieldsets = (
         (None, {
             'fields': ('name', 'tag', 'game', 'region', 'founded', 'banner', 'logo', 'status_indicator', 'rank', 'description')
@@ -42,9 +95,12 @@ class TeamAdmin(admin.ModelAdmin):
 
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
+    actions = [export_csv_action('players')]
     list_display = ('name', 'role', 'team', 'is_substitute')
     list_filter = ('role', 'is_substitute', 'team')
     search_fields = ('name', 'role', 'team__name')
+    list_select_related = ('team',)
+    autocomplete_fields = ('team',)
 
     fieldsets = (
         (None, {
@@ -52,8 +108,96 @@ class PlayerAdmin(admin.ModelAdmin):
         }),
     )
 
+class MatchAdminForm(forms.ModelForm):
+    # Carries the version the editor loaded so concurrent score edits are detected
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    class Meta:
+        model = Match
+        fields = '__all__'
+
+    def clean(self):
+        cleaned = super().clean()
+        if self.instance.pk and cleaned.get('version') is not None:
+            current = Match.objects.filter(pk=self.instance.pk).values_list('version', flat=True).first()
+            score_changed = any(f in self.changed_data for f in (
+                'team1_score', 'team2_score', 'current_round', 'total_rounds', 'points_team1', 'points_team2'
+            ))
+            if score_changed and current is not None and current != cleaned['version']:
+                raise forms.ValidationError(
+                    "Scores for this match were updated by someone else while you were editing. "
+                    "Reload the page to see the latest values."
+                )
+        self._check_schedule(cleaned)
+        return cleaned
+
+    def _check_schedule(self, cleaned):
+        team1, team2, start = cleaned.get('team1'), cleaned.get('team2'), cleaned.get('match_time')
+        if not (team1 and team2 and start):
+            return
+        if team1 == team2:
+            raise forms.ValidationError("A team can't play against itself.")
+        schedule_fields = ('team1', 'team2', 'match_time', 'game', 'tournament')
+        if self.instance.pk and not any(f in self.changed_data for f in schedule_fields):
+            return
+        game = cleaned.get('game') or (cleaned.get('tournament') and cleaned['tournament'].game)
+        conflicts = find_conflicts([team1.pk, team2.pk], start, game.name if game else None, self.instance.pk)
+        if conflicts:
+            names = {team1.pk: team1.name, team2.pk: team2.name}
+            raise forms.ValidationError([
+                f"{names[c.team_id]} already plays match #{c.other_id} at {c.other_start:%Y-%m-%d %H:%M}."
+                for c in conflicts
+            ])
+        tournament = cleaned.get('tournament')
+        if tournament and day_is_full(tournament.pk, start.date(), self.instance.pk):
+            raise forms.ValidationError(
+                f"{tournament.title} already has the maximum number of matches on {start:%Y-%m-%d}."
+            )
+
+
+def _report(modeladmin, request, result, verb):
+    modeladmin.message_user(request, f"{result['updated']} matches {verb}.", messages.SUCCESS)
+    if result['stale']:
+        modeladmin.message_user(
+            request, f"Changed by someone else since you loaded the page, not saved: "
+                     f"{', '.join(f'#{pk}' for pk in result['stale'])}", messages.WARNING)
+
+
+@admin.action(description="Set selected matches live", permissions=['change'])
+def mark_live(modeladmin, request, queryset):
+    _report(modeladmin, request, matchday.set_status(queryset.values_list('pk', flat=True), 'live'), 'set live')
+
+
+@admin.action(description="Set selected matches completed", permissions=['change'])
+def mark_completed(modeladmin, request, queryset):
+    _report(modeladmin, request, matchday.set_status(queryset.values_list('pk', flat=True), 'completed'),
+            'completed')
+
+
+@admin.action(description="Advance selected live matches one round", permissions=['change'])
+def advance_round(modeladmin, request, queryset):
+    _report(modeladmin, request, matchday.advance_round(queryset.values_list('pk', flat=True)), 'advanced')
+
+
+class MatchDayRowForm(forms.Form):
+    # Plain number inputs: no Team/Tournament dropdowns to render per row
+    id = forms.IntegerField(widget=forms.HiddenInput)
+    version = forms.IntegerField(widget=forms.HiddenInput)
+    selected = forms.BooleanField(required=False)
+    team1_score = forms.IntegerField(min_value=0, required=False)
+    team2_score = forms.IntegerField(min_value=0, required=False)
+    current_round = forms.IntegerField(min_value=0, required=False)
+    points_team1 = forms.IntegerField()
+    points_team2 = forms.IntegerField()
+
+
+MatchDayFormSet = forms.formset_factory(MatchDayRowForm, extra=0)
+
+
 @admin.register(Match)
 class MatchAdmin(admin.ModelAdmin):
+    form = MatchAdminForm
+    actions = [export_csv_action('matches'), mark_live, mark_completed, advance_round]
     list_display = (
         'tournament', 'game', 'team1', 'team2', 'match_time', 'status',
         'stage', 'team1_score', 'team2_score',
@@ -61,37 +205,141 @@ class MatchAdmin(admin.ModelAdmin):
         'points_team1', 'points_team2',
         'live_started_at', 'completed_at'
     )
-    list_filter = ('status', 'game', 'tournament', 'stage')
+    list_filter = ('status', 'game', 'tournament', 'is_final', 'stage')
     search_fields = ('tournament__title', 'team1__name', 'team2__name')
+    list_select_related = ('tournament', 'game', 'team1', 'team2')
+    # search-as-you-type instead of <select>s with every team and tournament
+    autocomplete_fields = ('tournament', 'game', 'team1', 'team2', 'tournament_stage')
     readonly_fields = ()
     fieldsets = (
         (None, {
             'fields': (
-                'tournament', 'game', 'stage', 'status', 'match_time',
+                'tournament', 'game', 'stage', 'tournament_stage', 'round_number', 'is_final',
+                'status', 'match_time',
                 'team1', 'team2', 'team1_score', 'team2_score',
                 'current_round', 'total_rounds',
                 'points_team1', 'points_team2',
                 'live_started_at', 'completed_at',
                 'viewer_count', 'viewer_label',
-                'youtube_live_url', 'youtube_recap_url'
+                'youtube_live_url', 'youtube_recap_url', 'version'
             )
         }),
     )
 
-@admin.register(MatchReminder)
-class MatchReminderAdmin(admin.ModelAdmin):
-    list_display = ('match', 'email', 'phone', 'notify_minutes_before', 'created_at', 'user')
-    list_filter = ('notify_minutes_before', 'created_at')
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # Only write what the editor touched, so a status flip from
+        # update_match_statuses (or another admin) isn't overwritten.
+        try:
+            expected = form.cleaned_data.get('version')
+            if expected is None:
+                expected = form.initial.get('version', 0)
+            save_changed_fields(obj, form.changed_data, expected)
+        except StaleScoreError as e:
+            self.message_user(request, f"Scores not saved: {e}. Reload and try again.", messages.ERROR)
+
+    def get_urls(self):
+        return [
+            path('match-day/', self.admin_site.admin_view(self.match_day_view), name='core_match_match_day'),
+        ] + super().get_urls()
+
+    def match_day_view(self, request):
+        """
+        One page for the day's matches (and anything still live): edit scores
+        inline, tick rows and apply an operation. The whole submit is one
+        core.matchday batch.
+        """
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        day = parse_date(request.GET.get('day') or '') or timezone.localdate()
+        matches = list(
+            Match.objects.filter(Q(status='live') | Q(match_time__date=day))
+            .select_related('tournament', 'team1', 'team2')
+            .only('id', 'version', 'status', 'match_time', 'stage', 'total_rounds', 'tournament__title',
+                  'team1__name', 'team2__name', *SCORE_FIELDS)
+            .order_by('match_time', 'pk')
+        )
+        initial = [{'id': m.pk, 'version': m.version, **{f: getattr(m, f) for f in SCORE_FIELDS}} for m in matches]
+        formset = MatchDayFormSet(request.POST or None, initial=initial)
+        if request.method == 'POST' and formset.is_valid():
+            op = request.POST.get('op', 'scores')
+            sheet = {
+                form.cleaned_data['id']: {
+                    'version': form.cleaned_data['version'],
+                    **{f: form.cleaned_data[f] for f in form.changed_data if f in SCORE_FIELDS},
+                }
+                for form in formset if set(form.changed_data) & set(SCORE_FIELDS)
+            }
+            selected = {form.cleaned_data['id'] for form in formset if form.cleaned_data.get('selected')}
+            with transaction.atomic():
+                result = matchday.apply_scores(sheet, complete=selected if op == 'complete' else ())
+                if op in ('live', 'advance'):
+                    changed = (matchday.set_status(selected, 'live') if op == 'live'
+                               else matchday.advance_round(selected))
+                    # the score rows count too; only the score sheet can be stale
+                    result = dict(changed, updated=result['updated'] + changed['updated'], stale=result['stale'])
+            _report(self, request, result, {'live': 'saved or set live', 'advance': 'saved or advanced',
+                                            'complete': 'saved'}.get(op, 'saved'))
+            return redirect(request.get_full_path())
+
+        # a bound formset can list different matches than the query did (one went live meanwhile)
+        by_id = {str(m.pk): m for m in matches}
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f"Match day — {day:%b %d, %Y}",
+            'day': day,
+            'formset': formset,
+            'rows': [(by_id[str(form['id'].value())], form) for form in formset
+                     if str(form['id'].value()) in by_id],
+        }
+        return TemplateResponse(request, 'admin/core/match/match_day.html', context)
+
+@admin.register(Reminder)
+class ReminderAdmin(admin.ModelAdmin):
+    list_display = ('match', 'email', 'phone', 'notify_minutes_before', 'sent', 'created_at', 'user')
+    list_filter = ('sent', 'notify_minutes_before', 'created_at')
     search_fields = ('email', 'phone', 'user__email')
+    # Reminder.__str__ -> Match.__str__ reads the tournament and both teams
+    list_select_related = ('match__tournament', 'match__team1', 'match__team2', 'user')
 
 @admin.register(TournamentParticipant)
 class TournamentParticipantAdmin(admin.ModelAdmin):
     list_display = ('tournament', 'team', 'manager_name', 'manager_email', 'manager_phone', 'registered_at')
     list_filter = ('tournament', 'registered_at')
     search_fields = ('team__name', 'manager_name', 'manager_email', 'manager_phone')
+    list_select_related = ('tournament', 'team')
     ordering = ('-registered_at',)
 
 @admin.register(Game)
 class GameAdmin(admin.ModelAdmin):
+    actions = [export_csv_action('games')]
     list_display = ('id', 'name')
     search_fields = ('name',)
+
+
+class BracketNodeInline(admin.TabularInline):
+    model = BracketNode
+    fields = ('bracket', 'round_number', 'position', 'label', 'team1', 'team2', 'winner', 'match')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        # the read-only FK columns render __str__ of each related row
+        return super().get_queryset(request).select_related(
+            'team1', 'team2', 'winner', 'match__tournament', 'match__team1', 'match__team2')
+
+
+@admin.register(TournamentStage)
+class TournamentStageAdmin(admin.ModelAdmin):
+    list_display = ('tournament', 'order', 'name', 'format', 'total_rounds', 'starts_at')
+    list_filter = ('format',)
+    search_fields = ('tournament__title', 'name')
+    list_select_related = ('tournament',)
+    inlines = [BracketNodeInline]
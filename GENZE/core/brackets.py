@@ -0,0 +1,431 @@
+# core/brackets.py
+"""
+Bracket generation and progression.
+
+generate_stage() builds a TournamentStage from the tournament's
+TournamentParticipant entries (seeded by Team.rank, then registration order):
+
+  single_elimination / double_elimination
+      The whole tree is laid out in memory first (seeding, byes, where each
+      winner/loser goes), then written with one bulk_create per round. Matches
+      are only created for pairings whose teams are known; later rounds get
+      their Match when both feeders have finished.
+  round_robin
+      Every round is known up front (circle method) and created at once.
+  swiss
+      Round 1 is created; each next round is paired when the previous one
+      has completed.
+
+on_match_completed() is called from the Match post_save signal and moves the
+winner (and in double elimination the loser) to the next node.
+"""
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Match, TournamentParticipant, TournamentStage, BracketNode
+from . import calendar_grid
+
+
+class BracketError(Exception):
+    pass
+
+
+FORMATS = [value for value, _ in TournamentStage.FORMAT_CHOICES]
+
+
+# ---- seeding -------------------------------------------------------------
+
+def seeded_team_ids(tournament):
+    """Participants in seed order: ranked teams first (rank 1 = top seed), then by registration."""
+    return list(
+        TournamentParticipant.objects.filter(tournament=tournament)
+        .order_by(F('team__rank').asc(nulls_last=True), 'registered_at', 'id')
+        .values_list('team_id', flat=True)
+    )
+
+
+def seed_order(size):
+    """Standard bracket order for a power-of-two size: [1, 8, 4, 5, 2, 7, 3, 6] for 8."""
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [s for seed in order for s in (seed, total - seed)]
+    return order
+
+
+# ---- in-memory elimination tree -----------------------------------------
+
+class _Node:
+    __slots__ = (
+        'bracket', 'round_number', 'position', 'label', 'slot_index', 'is_final',
+        'teams', 'byes', 'winner', 'winner_to', 'winner_slot', 'loser_to', 'loser_slot', 'obj',
+    )
+
+    def __init__(self, bracket, round_number, position, label, slot_index):
+        self.bracket = bracket
+        self.round_number = round_number
+        self.position = position
+        self.label = label
+        self.slot_index = slot_index  # which "time slot" (round gap multiple) it is played in
+        self.is_final = False
+        self.teams = [None, None]
+        self.byes = [False, False]
+        self.winner = None
+        self.winner_to = self.winner_slot = self.loser_to = self.loser_slot = None
+        self.obj = None
+
+    def feed_winner(self, target, slot):
+        self.winner_to, self.winner_slot = target, slot
+
+    def feed_loser(self, target, slot):
+        self.loser_to, self.loser_slot = target, slot
+
+
+def _round_label(prefix, round_number, total_rounds):
+    remaining = total_rounds - round_number
+    if prefix:
+        return f"{prefix} Final" if remaining == 0 else f"{prefix} Round {round_number}"
+    return {0: 'Final', 1: 'Semifinal', 2: 'Quarterfinal'}.get(remaining, f"Round {round_number}")
+
+
+def _single_tree(team_ids, prefix=''):
+    """Upper/main bracket rounds as lists of _Node, round 1 seeded with byes."""
+    size = 1 << max(1, math.ceil(math.log2(len(team_ids))))
+    total = int(math.log2(size))
+    rounds = []
+    first = []
+    order = seed_order(size)
+    for i in range(size // 2):
+        node = _Node('upper', 1, i, _round_label(prefix, 1, total), 0)
+        for slot, seed in enumerate((order[2 * i], order[2 * i + 1])):
+            if seed <= len(team_ids):
+                node.teams[slot] = team_ids[seed - 1]
+            else:
+                node.byes[slot] = True
+        first.append(node)
+    rounds.append(first)
+    for r in range(2, total + 1):
+        prev = rounds[-1]
+        current = [_Node('upper', r, i, _round_label(prefix, r, total), r - 1) for i in range(len(prev) // 2)]
+        for i, node in enumerate(prev):
+            node.feed_winner(current[i // 2], i % 2)
+        rounds.append(current)
+    return rounds
+
+
+def _lower_tree(upper):
+    """Lower bracket for a double elimination upper bracket of k rounds (2(k-1) rounds)."""
+    k = len(upper)
+    total = 2 * (k - 1)
+    rounds = []
+
+    def new_round(count):
+        # lower round r is played in time slot r, after the upper round feeding it
+        r = len(rounds) + 1
+        nodes = [_Node('lower', r, i, _round_label('Lower', r, total), r) for i in range(count)]
+        rounds.append(nodes)
+        return nodes
+
+    # LB round 1: losers of UB round 1, paired
+    current = new_round(len(upper[0]) // 2)
+    for i, node in enumerate(upper[0]):
+        node.feed_loser(current[i // 2], i % 2)
+
+    for r in range(2, k + 1):
+        # drop-in round: LB survivors meet the losers of UB round r (crossed to avoid rematches)
+        prev = current
+        current = new_round(len(prev))
+        dropping = upper[r - 1]
+        for i, node in enumerate(prev):
+            node.feed_winner(current[i], 0)
+        for i, node in enumerate(dropping):
+            node.feed_loser(current[len(dropping) - 1 - i], 1)
+        if r < k:
+            # consolidation round: LB survivors play each other
+            prev = current
+            current = new_round(len(prev) // 2)
+            for i, node in enumerate(prev):
+                node.feed_winner(current[i // 2], i % 2)
+    return rounds
+
+
+def _resolve_byes(ordered_nodes):
+    """
+    Propagate byes through the tree in dependency order. A slot is a bye when
+    its feeder can never produce a team: a winner with two bye slots, or a
+    loser of a node that has any bye (the other team walks over).
+    Seeded teams facing a bye advance immediately.
+    """
+    for node in ordered_nodes:
+        both_bye = all(node.byes)
+        any_bye = any(node.byes)
+        if node.winner_to is not None and both_bye:
+            node.winner_to.byes[node.winner_slot] = True
+        if node.loser_to is not None and any_bye:
+            node.loser_to.byes[node.loser_slot] = True
+        if any_bye and not both_bye:
+            team = node.teams[0] if node.byes[1] else node.teams[1]
+            if team is not None:
+                node.winner = team
+                if node.winner_to is not None:
+                    node.winner_to.teams[node.winner_slot] = team
+
+
+def _elimination_nodes(team_ids, double):
+    upper = _single_tree(team_ids, prefix='Upper' if double else '')
+    ordered = [n for rnd in upper for n in rnd]
+    if not double:
+        upper[-1][0].is_final = True
+        return ordered, len(upper)
+
+    lower = _lower_tree(upper)
+    ordered += [n for rnd in lower for n in rnd]
+    final = _Node('grand_final', 1, 0, 'Grand Final', len(lower) + 1)
+    final.is_final = True
+    upper[-1][0].feed_winner(final, 0)
+    lower[-1][0].feed_winner(final, 1)
+    ordered.append(final)
+    return ordered, len(upper) + len(lower) + 1
+
+
+# ---- persistence ---------------------------------------------------------
+
+def _invalidate_calendar(matches):
+    # bulk_create sends no post_save; invalidate once the stage is committed
+    months = [m.match_time for m in matches]
+    transaction.on_commit(lambda: calendar_grid.invalidate_months(months))
+
+
+def _match_for(stage, node, team1_id, team2_id, scheduled_at, round_number):
+    return Match(
+        tournament_id=stage.tournament_id,
+        game_id=stage.tournament.game_id,
+        team1_id=team1_id,
+        team2_id=team2_id,
+        match_time=scheduled_at,
+        status='upcoming',
+        stage=node.label if node else f"{stage.name} Round {round_number}",
+        tournament_stage=stage,
+        round_number=round_number,
+        is_final=bool(node and node.is_final),
+    )
+
+
+def _save_elimination(stage, ordered):
+    # Matches first (only where both teams are already known), then nodes from the
+    # end of the tree backwards so every winner_to/loser_to target already has a pk.
+    playable = [n for n in ordered if n.winner is None and None not in n.teams]
+    matches = [
+        _match_for(stage, n, n.teams[0], n.teams[1], stage.starts_at + stage.round_gap * n.slot_index, n.round_number)
+        for n in playable
+    ]
+    Match.objects.bulk_create(matches)
+    _invalidate_calendar(matches)
+    match_by_node = {id(n): m for n, m in zip(playable, matches)}
+
+    levels = defaultdict(list)
+    for n in ordered:
+        levels[(n.bracket, n.round_number)].append(n)
+    level_order = sorted(
+        levels, key=lambda key: ({'grand_final': 0, 'lower': 1, 'upper': 2}[key[0]], -key[1])
+    )
+    for key in level_order:
+        objs = []
+        for n in levels[key]:
+            n.obj = BracketNode(
+                stage=stage, bracket=n.bracket, round_number=n.round_number, position=n.position,
+                label=n.label, scheduled_at=stage.starts_at + stage.round_gap * n.slot_index,
+                is_final=n.is_final,
+                team1_id=n.teams[0], team2_id=n.teams[1],
+                team1_bye=n.byes[0], team2_bye=n.byes[1],
+                winner_id=n.winner,
+                winner_to=n.winner_to.obj if n.winner_to else None, winner_slot=n.winner_slot,
+                loser_to=n.loser_to.obj if n.loser_to else None, loser_slot=n.loser_slot,
+                match=match_by_node.get(id(n)),
+            )
+            objs.append(n.obj)
+        BracketNode.objects.bulk_create(objs)
+    return len(matches)
+
+
+def _round_robin_rounds(team_ids):
+    """Circle method: every team meets every other team once."""
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    rounds = []
+    for _ in range(n - 1):
+        pairs = [(teams[i], teams[n - 1 - i]) for i in range(n // 2)]
+        rounds.append([(a, b) for a, b in pairs if a is not None and b is not None])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+@transaction.atomic
+def generate_stage(tournament, format, starts_at, round_gap, name=None, team_ids=None):
+    """
+    Create a TournamentStage (and its nodes/matches) for `tournament`.
+    Returns (stage, matches_created).
+    """
+    if format not in FORMATS:
+        raise BracketError(f"Unknown format {format!r}; expected one of {', '.join(FORMATS)}")
+    team_ids = list(team_ids) if team_ids is not None else seeded_team_ids(tournament)
+    if len(team_ids) < 2:
+        raise BracketError("At least two registered teams are needed to build a stage")
+    if format == 'double_elimination' and len(team_ids) < 4:
+        raise BracketError("Double elimination needs at least four teams")
+
+    order = (tournament.stages.order_by('-order').values_list('order', flat=True).first() or 0) + 1
+    stage = TournamentStage(
+        tournament=tournament, name=name or dict(TournamentStage.FORMAT_CHOICES)[format],
+        format=format, order=order, starts_at=starts_at, round_gap=round_gap,
+    )
+
+    if format in ('single_elimination', 'double_elimination'):
+        ordered, total_rounds = _elimination_nodes(team_ids, double=format == 'double_elimination')
+        _resolve_byes(ordered)
+        stage.total_rounds = total_rounds
+        stage.save()
+        created = _save_elimination(stage, ordered)
+    elif format == 'round_robin':
+        rounds = _round_robin_rounds(team_ids)
+        stage.total_rounds = len(rounds)
+        stage.save()
+        matches = [
+            _match_for(stage, None, a, b, starts_at + round_gap * r, r + 1)
+            for r, pairs in enumerate(rounds) for a, b in pairs
+        ]
+        Match.objects.bulk_create(matches)
+        _invalidate_calendar(matches)
+        created = len(matches)
+    else:
+        stage.total_rounds = max(1, math.ceil(math.log2(len(team_ids))))
+        stage.save()
+        created = _pair_swiss_round(stage, 1, team_ids)
+
+    stage.tournament = tournament  # keep the loaded instance for callers
+    return stage, created
+
+
+# ---- Swiss ---------------------------------------------------------------
+
+def _pair_swiss_round(stage, round_number, seeded_ids):
+    """
+    Pair teams with equal records (wins, then seed), avoiding rematches where
+    possible. With an odd field the lowest-placed team without a bye sits out
+    and is credited a win.
+    """
+    results = Match.objects.filter(tournament_stage=stage).values_list(
+        'team1_id', 'team2_id', 'team1_score', 'team2_score', 'status'
+    )
+    wins = defaultdict(int)
+    played = set()
+    for a, b, s1, s2, status in results:
+        played.add(frozenset((a, b)))
+        if status == 'completed' and s1 is not None and s2 is not None and s1 != s2:
+            wins[a if s1 > s2 else b] += 1
+    for team_id in stage.bye_team_ids:
+        wins[team_id] += 1
+
+    seed_index = {team_id: i for i, team_id in enumerate(seeded_ids)}
+    standings = sorted(seeded_ids, key=lambda t: (-wins[t], seed_index[t]))
+
+    if len(standings) % 2:
+        bye = next((t for t in reversed(standings) if t not in stage.bye_team_ids), standings[-1])
+        standings.remove(bye)
+        stage.bye_team_ids = stage.bye_team_ids + [bye]
+        stage.save(update_fields=['bye_team_ids'])
+
+    if round_number == 1:
+        # top half meets bottom half
+        half = len(standings) // 2
+        pairs = list(zip(standings[:half], standings[half:]))
+    else:
+        pairs = []
+        pool = list(standings)
+        while pool:
+            first = pool.pop(0)
+            opponent = next((t for t in pool if frozenset((first, t)) not in played), pool[0])
+            pool.remove(opponent)
+            pairs.append((first, opponent))
+
+    when = stage.starts_at + stage.round_gap * (round_number - 1)
+    matches = [_match_for(stage, None, a, b, when, round_number) for a, b in pairs]
+    Match.objects.bulk_create(matches)
+    _invalidate_calendar(matches)
+    return len(matches)
+
+
+# ---- progression ---------------------------------------------------------
+
+def _winner_loser(match):
+    if match.team1_score is None or match.team2_score is None or match.team1_score == match.team2_score:
+        return None, None
+    if match.team1_score > match.team2_score:
+        return match.team1_id, match.team2_id
+    return match.team2_id, match.team1_id
+
+
+def _fill(node, slot, team_id):
+    """Put a team into a node slot; create its match or walk it over a bye."""
+    setattr(node, f'team{slot + 1}_id', team_id)
+    node.save(update_fields=[f'team{slot + 1}'])
+
+    if node.team1_id and node.team2_id and node.match_id is None:
+        stage = node.stage
+        match = _match_for(stage, node, node.team1_id, node.team2_id, node.scheduled_at, node.round_number)
+        match.save()
+        node.match = match
+        node.save(update_fields=['match'])
+    elif getattr(node, f'team{2 - slot}_bye') and node.winner_id is None:
+        node.winner_id = team_id
+        node.save(update_fields=['winner'])
+        if node.winner_to_id:
+            _fill(BracketNode.objects.select_related('stage__tournament').get(pk=node.winner_to_id),
+                  node.winner_slot, team_id)
+
+
+@transaction.atomic
+def on_match_completed(match):
+    """Advance the result of a completed bracket match. Safe to call more than once."""
+    if match.tournament_stage_id is None:
+        return
+
+    node = (
+        BracketNode.objects.select_for_update().select_related('stage__tournament')
+        .filter(match_id=match.pk).first()
+    )
+    if node is not None:
+        if node.winner_id is not None:
+            return
+        winner, loser = _winner_loser(match)
+        if winner is None:
+            return  # no decisive score yet
+        node.winner_id = winner
+        node.save(update_fields=['winner'])
+        for target_id, slot, team in ((node.winner_to_id, node.winner_slot, winner),
+                                      (node.loser_to_id, node.loser_slot, loser)):
+            if target_id:
+                target = BracketNode.objects.select_for_update().select_related('stage__tournament').get(pk=target_id)
+                _fill(target, slot, team)
+        return
+
+    stage = TournamentStage.objects.select_for_update().select_related('tournament').get(pk=match.tournament_stage_id)
+    if stage.format != 'swiss' or match.round_number is None or match.round_number >= stage.total_rounds:
+        return
+    round_matches = Match.objects.filter(tournament_stage=stage, round_number=match.round_number)
+    if round_matches.exclude(status='completed').exists():
+        return
+    if Match.objects.filter(tournament_stage=stage, round_number=match.round_number + 1).exists():
+        return
+    seeded = seeded_team_ids(stage.tournament)
+    in_stage = set(
+        Match.objects.filter(tournament_stage=stage).values_list('team1_id', flat=True)
+    ) | set(
+        Match.objects.filter(tournament_stage=stage).values_list('team2_id', flat=True)
+    ) | set(stage.bye_team_ids)
+    _pair_swiss_round(stage, match.round_number + 1, [t for t in seeded if t in in_stage])
@@ -0,0 +1,435 @@
+# core/bulk.py
+"""
+Streaming bulk import/export for games, tournaments, teams, players and matches.
+
+Rows are plain dicts keyed by column name, read and written as CSV or JSONL
+one at a time, so neither direction holds the whole file in memory.
+Foreign keys use natural keys instead of ids:
+
+    game        -> Game.name
+    tournament  -> Tournament.title
+    team        -> (Team.name, game name)
+    player      -> (team, Player.name)
+    match       -> (tournament, team1, team2, match_time)
+
+Each importer loads its lookup tables once (a values_list per model) and then
+resolves every row from memory; rows are written with bulk_create /
+bulk_update in chunks, one transaction per chunk.
+
+bulk_create / bulk_update send no post_save, so each match chunk gets the
+follow-up of core.scoring.after_write: newly completed matches are rated and
+advance their brackets, and the calendar is invalidated after commit. An
+import that changes an already rated result, or completes matches older than
+the latest rated one (a past season), queues one rating replay instead of
+leaving Elo applied out of order.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Game, Tournament, Team, Player, Match
+from .ratings import RESULT_FIELDS
+from .schedule_conflicts import load_intervals, duration_lookup
+from .scoring import after_write
+from . import calendar_grid
+
+FORMATS = ('csv', 'jsonl')
+
+# bulk_update emits one CASE WHEN per column per batch; evaluating that is
+# quadratic in the batch size, so updates use smaller batches than inserts.
+BULK_UPDATE_BATCH = 200
+
+
+class ImportRowError(Exception):
+    pass
+
+
+# ---- column specs --------------------------------------------------------
+
+# plain model columns per entity (natural-key / FK columns are handled separately)
+COLUMNS = {
+    'games': [],
+    'tournaments': [
+        'status', 'prize_pool', 'teams', 'start_date', 'end_date', 'location',
+        'registration_deadline', 'format', 'featured', 'timezone',
+    ],
+    'teams': ['tag', 'region', 'founded', 'status_indicator', 'rank', 'description'],
+    'players': ['role', 'email', 'discord', 'is_substitute'],
+    'matches': [
+        'status', 'stage', 'team1_score', 'team2_score', 'viewer_count', 'viewer_label',
+        'youtube_live_url', 'youtube_recap_url', 'current_round', 'total_rounds',
+        'points_team1', 'points_team2', 'is_final',
+    ],
+}
+
+KEY_COLUMNS = {
+    'games': ['name'],
+    'tournaments': ['title', 'game'],
+    'teams': ['name', 'game'],
+    'players': ['name', 'team', 'team_game'],
+    'matches': ['tournament', 'team1', 'team2', 'game', 'match_time'],
+}
+
+MODELS = {
+    'games': Game,
+    'tournaments': Tournament,
+    'teams': Team,
+    'players': Player,
+    'matches': Match,
+}
+
+ENTITIES = tuple(MODELS)
+
+
+def header(entity):
+    return KEY_COLUMNS[entity] + COLUMNS[entity]
+
+
+# ---- export --------------------------------------------------------------
+
+# values_list paths producing the KEY_COLUMNS of each entity
+_EXPORT_KEYS = {
+    'games': ['name'],
+    'tournaments': ['title', 'game__name'],
+    'teams': ['name', 'game__name'],
+    'players': ['name', 'team__name', 'team__game__name'],
+    'matches': ['tournament__title', 'team1__name', 'team2__name', 'game__name', 'match_time'],
+}
+
+
+def export_rows(entity, queryset=None, chunk_size=2000):
+    """Yield one dict per row, streamed from the DB with iterator()."""
+    model = MODELS[entity]
+    qs = queryset if queryset is not None else model.objects.all()
+    paths = _EXPORT_KEYS[entity] + COLUMNS[entity]
+    names = header(entity)
+    for values in qs.order_by('pk').values_list(*paths).iterator(chunk_size=chunk_size):
+        yield dict(zip(names, values))
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def write_csv(entity, rows, buffer):
+    """Yield CSV lines; `buffer` only needs a write() that returns its argument."""
+    writer = csv.writer(buffer)
+    yield writer.writerow(header(entity))
+    for row in rows:
+        yield writer.writerow([_text(row[c]) for c in header(entity)])
+
+
+def write_jsonl(entity, rows):
+    for row in rows:
+        yield json.dumps({k: _text(v) if v is not None else None for k, v in row.items()}) + '\n'
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(entity, fmt, queryset=None):
+    rows = export_rows(entity, queryset)
+    if fmt == 'csv':
+        return write_csv(entity, rows, Echo())
+    return write_jsonl(entity, rows)
+
+
+# ---- import --------------------------------------------------------------
+
+def read_rows(fmt, stream):
+    """Yield dicts from an open text stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _norm(value):
+    return (value or '').strip().lower()
+
+
+def _coerce(model, column, raw):
+    field = model._meta.get_field(column)
+    if raw is None or raw == '':
+        if field.null:
+            return None
+        if field.has_default():
+            return field.get_default()
+        if field.blank:
+            return ''
+        raise ImportRowError(f"{column} is required")
+    if isinstance(raw, str) and field.get_internal_type() == 'BooleanField':
+        return raw.strip().lower() in ('1', 'true', 'yes', 'y', 't')
+    try:
+        value = field.to_python(raw)
+    except Exception as e:
+        raise ImportRowError(f"{column}: {e}")
+    if field.get_internal_type() == 'DateTimeField' and value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class Importer:
+    """
+    Imports one entity. Existing rows (matched by natural key) are updated,
+    new ones created. `progress(stats)` is called after every chunk.
+    """
+
+    def __init__(self, entity, chunk_size=1000, create_games=True, progress=None, check_conflicts=True):
+        if entity not in MODELS:
+            raise ValueError(f"Unknown entity {entity!r}; expected one of {', '.join(ENTITIES)}")
+        self.entity = entity
+        self.model = MODELS[entity]
+        self.chunk_size = chunk_size
+        self.create_games = create_games
+        self.progress = progress
+        self.stats = {'processed': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+        self.errors = []  # (row number, message), capped
+        self.rated = 0  # completed matches rated by this import
+        self.replay_queued = False
+        self._load_lookups()
+        # new matches are checked against (and added to) per-team interval arrays
+        self.intervals = load_intervals() if entity == 'matches' and check_conflicts else None
+        self.duration = duration_lookup()
+
+    # lookup caches -- one query each, then pure dict access
+    def _load_lookups(self):
+        self.games = {_norm(name): pk for pk, name in Game.objects.values_list('id', 'name')}
+        self.game_names = {pk: name for name, pk in self.games.items()}
+        self.tournaments = {}
+        self.teams = {}
+        self.existing = {}
+        if self.entity in ('tournaments', 'matches'):
+            for pk, title, game_id in Tournament.objects.values_list('id', 'title', 'game_id'):
+                self.tournaments[_norm(title)] = (pk, game_id)
+        if self.entity in ('teams', 'players', 'matches'):
+            for pk, name, game_id in Team.objects.values_list('id', 'name', 'game_id'):
+                self.teams[(_norm(name), game_id)] = pk
+        if self.entity == 'games':
+            self.existing = dict(self.games)
+        elif self.entity == 'tournaments':
+            self.existing = {title: pk for title, (pk, _) in self.tournaments.items()}
+        elif self.entity == 'teams':
+            self.existing = dict(self.teams)
+        elif self.entity == 'players':
+            for pk, name, team_id in Player.objects.values_list('id', 'name', 'team_id'):
+                self.existing[(team_id, _norm(name))] = pk
+        elif self.entity == 'matches':
+            self.rated_ids, self.rated_until = set(), None
+            for pk, t, a, b, when, rated in Match.objects.values_list(
+                'id', 'tournament_id', 'team1_id', 'team2_id', 'match_time', 'rated'
+            ).iterator(chunk_size=5000):
+                self.existing[(t, a, b, when)] = pk
+                if rated:
+                    self.rated_ids.add(pk)
+                    self.rated_until = max(self.rated_until or when, when)
+
+        # Snapshot of the importable columns, so re-imports only write rows
+        # (and columns) that actually differ -- bulk_update is the slow path.
+        self.columns = COLUMNS[self.entity]
+        self.current = {}
+        if self.columns and self.existing:
+            for pk, *values in self.model.objects.values_list('id', *self.columns).iterator(chunk_size=5000):
+                self.current[pk] = values
+
+    def _game_id(self, name):
+        if not name:
+            return None
+        key = _norm(name)
+        if key not in self.games:
+            if not self.create_games:
+                raise ImportRowError(f"unknown game {name!r}")
+            self.games[key] = Game.objects.create(name=name.strip()).pk
+            self.game_names[self.games[key]] = key
+        return self.games[key]
+
+    def _team_id(self, name, game_id):
+        pk = self.teams.get((_norm(name), game_id))
+        if pk is None:
+            raise ImportRowError(f"unknown team {name!r}")
+        return pk
+
+    def _tournament(self, title):
+        found = self.tournaments.get(_norm(title))
+        if found is None:
+            raise ImportRowError(f"unknown tournament {title!r}")
+        return found
+
+    def _build(self, row):
+        """Return (natural key, model instance without pk)."""
+        values = {c: _coerce(self.model, c, row.get(c)) for c in COLUMNS[self.entity] if c in row}
+        if self.entity == 'games':
+            if not row.get('name'):
+                raise ImportRowError("name is required")
+            return _norm(row['name']), Game(name=row['name'].strip())
+        if self.entity == 'tournaments':
+            if not row.get('title'):
+                raise ImportRowError("title is required")
+            obj = Tournament(title=row['title'].strip(), game_id=self._game_id(row.get('game')), **values)
+            return _norm(row['title']), obj
+        if self.entity == 'teams':
+            if not row.get('name'):
+                raise ImportRowError("name is required")
+            game_id = self._game_id(row.get('game'))
+            return (_norm(row['name']), game_id), Team(name=row['name'].strip(), game_id=game_id, **values)
+        if self.entity == 'players':
+            if not row.get('name'):
+                raise ImportRowError("name is required")
+            team_id = self._team_id(row.get('team'), self._game_id(row.get('team_game')))
+            return (team_id, _norm(row['name'])), Player(name=row['name'].strip(), team_id=team_id, **values)
+        # matches
+        tournament_id, tournament_game_id = self._tournament(row.get('tournament'))
+        game_id = self._game_id(row.get('game')) if row.get('game') else tournament_game_id
+        team1_id = self._team_id(row.get('team1'), game_id)
+        team2_id = self._team_id(row.get('team2'), game_id)
+        match_time = _coerce(Match, 'match_time', row.get('match_time'))
+        obj = Match(
+            tournament_id=tournament_id, team1_id=team1_id, team2_id=team2_id,
+            game_id=game_id, match_time=match_time, **values
+        )
+        return (tournament_id, team1_id, team2_id, match_time), obj
+
+    def _after_create(self, key, obj):
+        # keep lookups current so later rows (and later chunks) resolve new objects
+        if self.entity == 'games':
+            self.games[key] = obj.pk
+        elif self.entity == 'tournaments':
+            self.tournaments[key] = (obj.pk, obj.game_id)
+        elif self.entity == 'teams':
+            self.teams[key] = obj.pk
+
+    def _rate(self, matches, rescored):
+        """after_write for a written match chunk; inside the chunk's transaction."""
+        newly = [m for m in matches if m.status == 'completed' and m.team1_score is not None
+                 and m.team2_score is not None and m.pk not in self.rated_ids]
+        # pk-less rows (backends without RETURNING) and past results can only be rated by a replay
+        rescored = rescored or any(m.pk is None or (self.rated_until and m.match_time < self.rated_until)
+                                   for m in newly)
+        for match in matches:
+            match.rated = match.pk in self.rated_ids
+        after_write([m for m in matches if m.pk is not None], rescored=rescored and not self.replay_queued)
+        self.replay_queued = self.replay_queued or rescored
+        self.rated += len(newly)
+        for match in newly:
+            self.rated_ids.add(match.pk)
+            self.rated_until = max(self.rated_until or match.match_time, match.match_time)
+
+    def _flush(self, to_create, to_update, update_fields, rescored=False):
+        now = timezone.now()
+        with transaction.atomic():
+            if to_create:
+                self.model.objects.bulk_create([obj for _, obj in to_create], batch_size=self.chunk_size)
+            if to_update:
+                for obj in to_update:
+                    if hasattr(obj, 'updated_at'):
+                        obj.updated_at = now
+                fields = list(update_fields) + (['updated_at'] if hasattr(self.model, 'updated_at') else [])
+                self.model.objects.bulk_update(to_update, fields, batch_size=BULK_UPDATE_BATCH)
+            if self.entity == 'matches' and (to_create or to_update):
+                # rating, brackets and (on commit) the calendar months
+                self._rate([obj for _, obj in to_create] + to_update, rescored)
+        for key, obj in to_create:
+            if obj.pk is not None:
+                self.existing[key] = obj.pk
+                self._after_create(key, obj)
+        # on commit: run() may itself be inside the caller's transaction
+        if self.entity == 'teams' and to_update:
+            transaction.on_commit(calendar_grid.invalidate_all)
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
+
+    def _changed_columns(self, pk, obj, row):
+        before = self.current.get(pk)
+        present = [(i, c) for i, c in enumerate(self.columns) if c in row]
+        if before is None:
+            return [c for _, c in present]
+        return [c for i, c in present if getattr(obj, c) != before[i]]
+
+    def _schedule_ok(self, to_create, numbers):
+        """
+        Drop new matches that overlap a stored match or an earlier-starting
+        new one, checking the whole chunk in one sweep (TeamIntervals.check_batch).
+        """
+        batch = []
+        for _, match in to_create:
+            start = match.match_time
+            batch.append(((match.team1_id, match.team2_id), start,
+                          start + self.duration(self.game_names.get(match.game_id)), None))
+        kept = []
+        for item, number, conflicts in zip(to_create, numbers, self.intervals.check_batch(batch)):
+            if not conflicts:
+                kept.append(item)
+                continue
+            self.stats['errors'] += 1
+            if len(self.errors) < 100:
+                self.errors.append((number, f"schedule conflict: {conflicts[0]}"))
+        return kept
+
+    def run(self, rows):
+        rows = iter(rows)
+        number = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            to_create, to_update, update_fields, seen = [], [], set(), {}
+            numbers = []  # row number of each to_create entry, for conflict errors
+            rescored = False
+            for row in chunk:
+                number += 1
+                self.stats['processed'] += 1
+                try:
+                    key, obj = self._build(row)
+                except ImportRowError as e:
+                    self.stats['errors'] += 1
+                    if len(self.errors) < 100:
+                        self.errors.append((number, str(e)))
+                    continue
+                pk = self.existing.get(key)
+                if pk is not None:
+                    changed = self._changed_columns(pk, obj, row)
+                    if not changed:
+                        self.stats['unchanged'] += 1
+                        continue
+                    obj.pk = pk
+                    before = self.current.get(pk)
+                    if before is not None:
+                        # columns missing from this row keep their stored values, and the
+                        # snapshot follows the update for later duplicates of the key
+                        for i, c in enumerate(self.columns):
+                            if c in row:
+                                before[i] = getattr(obj, c)
+                            else:
+                                setattr(obj, c, before[i])
+                    to_update.append(obj)
+                    update_fields.update(changed)
+                    if self.entity == 'matches' and pk in self.rated_ids and set(changed) & set(RESULT_FIELDS):
+                        rescored = True
+                elif key in seen:
+                    # duplicate inside the same chunk: last row wins
+                    to_create[seen[key]] = (key, obj)
+                else:
+                    seen[key] = len(to_create)
+                    to_create.append((key, obj))
+                    numbers.append(number)
+            if self.intervals is not None and to_create:
+                to_create = self._schedule_ok(to_create, numbers)
+                self.errors.sort(key=lambda error: error[0])
+            self._flush(to_create, to_update, update_fields, rescored)
+            if self.progress:
+                self.progress(dict(self.stats))
+        return self.stats
@@ -0,0 +1,120 @@
+# core/calendar_grid.py
+"""
+Month grid for calendar_view.
+
+A month is summarised once per (year, month, game filter) from a values()
+query -- per day: counts by status plus the handful of fields the calendar
+cell shows -- and cached. Cache keys carry a per-month version, so a match
+change only invalidates the month(s) it sits in (old and new match_time);
+team renames bump a global version because names are baked into every grid.
+Writers invalidate with transaction.on_commit: bumped inside the transaction,
+a request could rebuild the grid from the old rows under the new version.
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Match
+from .request_metrics import cache_lookup
+
+CACHE_PREFIX = 'calendar:'
+CACHE_TIMEOUT = 6 * 60 * 60
+STATUSES = ('upcoming', 'live', 'completed')
+
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def _version(key):
+    # A missing version (never set, or evicted) gets a fresh one, which can't collide with old grids
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def _month_version_key(year, month):
+    return f"{CACHE_PREFIX}v:{year}-{month:02d}"
+
+
+def _grid_key(year, month, game):
+    global_version = _version(f"{CACHE_PREFIX}v")
+    month_version = _version(_month_version_key(year, month))
+    return f"{CACHE_PREFIX}{year}-{month:02d}:{(game or '').lower()}:{global_version}:{month_version}"
+
+
+def invalidate_month(when):
+    """Drop the cached grids of the month containing the datetime `when`."""
+    invalidate_months([when])
+
+
+def invalidate_months(times):
+    """invalidate_month for every distinct month in `times` (bulk writes skip the signals)."""
+    months = set()
+    for when in times:
+        local = timezone.localtime(when) if timezone.is_aware(when) else when
+        months.add((local.year, local.month))
+    for year, month in months:
+        cache.set(_month_version_key(year, month), time.time_ns(), None)
+
+
+def invalidate_all():
+    cache.set(f"{CACHE_PREFIX}v", time.time_ns(), None)
+
+
+def build_month(year, month, game=None):
+    """List of per-day dicts for the month (no cache)."""
+    start, end = month_bounds(year, month)
+    tz = timezone.get_current_timezone()
+    qs = Match.objects.filter(
+        match_time__gte=datetime.combine(start, datetime.min.time(), tzinfo=tz),
+        match_time__lt=datetime.combine(end, datetime.min.time(), tzinfo=tz),
+    )
+    if game:
+        qs = qs.filter(Q(game__name__iexact=game) | Q(game__isnull=True, tournament__game__name__iexact=game))
+    rows = qs.order_by('match_time', 'id').values('id', 'match_time', 'status', 'team1__name', 'team2__name')
+
+    days = [
+        {'date': start + timedelta(days=i), 'counts': dict.fromkeys(STATUSES, 0), 'matches': []}
+        for i in range((end - start).days)
+    ]
+    for row in rows:
+        when = timezone.localtime(row['match_time'])
+        day = days[when.day - 1]
+        day['counts'][row['status']] = day['counts'].get(row['status'], 0) + 1
+        day['matches'].append({
+            'id': row['id'],
+            'time': when,
+            'status': row['status'],
+            'team1': row['team1__name'],
+            'team2': row['team2__name'],
+        })
+    return days
+
+
+def month_grid(year, month, game=None):
+    key = _grid_key(year, month, game)
+    days = cache_lookup('calendar-grid', cache.get(key))
+    if days is None:
+        days = build_month(year, month, game)
+        cache.set(key, days, CACHE_TIMEOUT)
+    return days
+
+
+def as_json(days):
+    return [
+        {
+            'date': day['date'].isoformat(),
+            'counts': day['counts'],
+            'matches': [dict(match, time=match['time'].isoformat()) for match in day['matches']],
+        }
+        for day in days
+    ]
@@ -0,0 +1,150 @@
+# core/conditional.py
+"""
+Cheap validators for conditional GET (ETag / Last-Modified).
+
+Each page gets an etag/last_modified pair that only runs small aggregate
+queries (MAX(updated_at) + COUNT(id)) over the tables the page renders from,
+so Django's ``condition`` decorator can answer 304 Not Modified before the
+view body (and its heavy queries / template render) runs.
+"""
+from functools import partial, wraps
+
+from django.db.models import Max, Count, Q
+from django.views.decorators.http import condition
+
+from .models import Game, Tournament, Team, Player, Match, NewsArticle, TournamentParticipant
+from .ical import feed_matches
+
+
+def _stamp(qs):
+    """(latest updated_at, row count) for a queryset — one aggregate query."""
+    row = qs.order_by().aggregate(latest=Max('updated_at'), total=Count('id'))
+    return row['latest'], row['total']
+
+
+def _latest(stamps):
+    times = [latest for latest, _ in stamps if latest is not None]
+    return max(times) if times else None
+
+
+def _etag(request, name, stamps, per_user=True):
+    """
+    Build an ETag from the stamps. Counts catch deletes (which don't move
+    MAX(updated_at)); the user id keeps per-user bits of the page (reminder
+    forms prefill the email) from being shared between visitors. Public
+    responses (feeds sent with Cache-Control: public) render the same for
+    everyone and leave it out, so shared caches see one validator.
+    """
+    parts = [name]
+    for latest, total in stamps:
+        parts.append(f"{latest.timestamp() if latest else 0}:{total}")
+    if per_user:
+        user = getattr(request, 'user', None)
+        parts.append(str(user.pk) if user is not None and user.is_authenticated else 'anon')
+    return '-'.join(parts)
+
+
+def stamps_version(stamps):
+    """The user-independent part of the ETag, for keying shared caches on the same data."""
+    return '-'.join(f"{latest.timestamp() if latest else 0}:{total}" for latest, total in stamps)
+
+
+def conditional_page(name, stamps_func, last_modified=True, per_user=True, pass_stamps=False):
+    """
+    Decorator: wrap a view with ``condition`` using ``stamps_func(request, *args, **kwargs)``,
+    which returns a list of (latest, total) pairs. Stamps are computed once per request
+    and shared between the ETag and Last-Modified callbacks; with ``pass_stamps`` the
+    view also receives them as its ``stamps`` keyword argument. ``per_user=False`` is
+    for responses that are the same for every visitor (see _etag).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            stamps = stamps_func(request, *args, **kwargs)
+            target = partial(view, stamps=stamps) if pass_stamps else view
+            return condition(
+                etag_func=lambda request, *args, **kwargs: _etag(request, name, stamps, per_user),
+                last_modified_func=(lambda request, *args, **kwargs: _latest(stamps)) if last_modified else None,
+            )(target)(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+# ---- per-page stamp functions ---------------------------------------------
+
+def home_stamps(request):
+    return [
+        _stamp(Tournament.objects.filter(featured=True)),
+        _stamp(NewsArticle.objects.all()),
+        _stamp(Game.objects.all()),
+    ]
+
+
+def tournaments_stamps(request):
+    return [_stamp(Tournament.objects.all()), _stamp(Game.objects.all())]
+
+
+def results_stamps(request):
+    return [
+        _stamp(Match.objects.all()),
+        _stamp(Team.objects.all()),
+        _stamp(Tournament.objects.all()),
+        _stamp(Game.objects.all()),
+    ]
+
+
+def news_list_stamps(request, fmt=None):
+    return [_stamp(NewsArticle.objects.all())]
+
+
+def news_detail_stamps(request, slug):
+    return [_stamp(NewsArticle.objects.filter(slug=slug))]
+
+
+def _participant_stamp(qs):
+    # TournamentParticipant has no updated_at; entries are only ever added or removed
+    row = qs.order_by().aggregate(latest=Max('registered_at'), total=Count('id'))
+    return row['latest'], row['total']
+
+
+def tournament_detail_stamps(request, pk):
+    # The participant list renders each entry's team and manager
+    return [
+        _stamp(Tournament.objects.filter(pk=pk)),
+        _stamp(Game.objects.filter(tournament__pk=pk)),
+        _participant_stamp(TournamentParticipant.objects.filter(tournament_id=pk)),
+        _stamp(Team.objects.filter(tournament_entries__tournament_id=pk)),
+    ]
+
+
+def team_detail_stamps(request, team_id):
+    # Opponent names and tournament titles show up in the match lists,
+    # so those tables are stamped whole (both are small).
+    return [
+        _stamp(Team.objects.all()),
+        _stamp(Player.objects.filter(team_id=team_id)),
+        _stamp(Match.objects.filter(Q(team1_id=team_id) | Q(team2_id=team_id))),
+        _stamp(Tournament.objects.all()),
+        _stamp(Tournament.objects.filter(participants__team_id=team_id)),
+    ]
+
+
+def team_api_stamps(request, team_id=None):
+    # the roster API renders teams, their players and game names only
+    if team_id is None:
+        return [_stamp(Team.objects.all()), _stamp(Player.objects.all()), _stamp(Game.objects.all())]
+    return [
+        _stamp(Team.objects.filter(pk=team_id)),
+        _stamp(Player.objects.filter(team_id=team_id)),
+        _stamp(Game.objects.all()),
+    ]
+
+
+def calendar_feed_stamps(request, kind, pk):
+    # Team, tournament and game names appear in every event; those tables are small.
+    return [
+        _stamp(feed_matches(kind, pk)),
+        _stamp(Team.objects.all()),
+        _stamp(Tournament.objects.all()),
+        _stamp(Game.objects.all()),
+    ]
@@ -0,0 +1,72 @@
+# core/db_router.py
+"""
+Primary/replica routing.
+
+Writes always go to ``default``. Reads go to the ``replica`` alias only while
+a public, read-only request is being served (ReplicaReadMiddleware marks
+those); admin, POST handlers, Celery tasks and management commands keep
+reading from the primary so they never act on stale rows.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+# Session/auth rows are written right before the redirect that reads them
+# back, so replica lag would log people out; keep them on the primary.
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'contenttypes', 'admin'}
+
+_read_alias = ContextVar('genze_read_alias', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def use_replica():
+    """Route reads inside the block to the replica (no-op if none is configured)."""
+    token = _read_alias.set(REPLICA_ALIAS if replica_configured() else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaReadMiddleware:
+    """Serve safe-method requests to public pages from the read replica."""
+
+    SAFE_METHODS = ('GET', 'HEAD')
+    EXCLUDED_PREFIXES = ('/admin/',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.method in self.SAFE_METHODS
+            and not request.path.startswith(self.EXCLUDED_PREFIXES)
+            and replica_configured()
+        ):
+            with use_replica():
+                return self.get_response(request)
+        return self.get_response(request)
@@ -0,0 +1,41 @@
+# core/feeds.py
+from datetime import datetime
+
+from django.contrib.syndication.views import Feed
+from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+
+from . import news
+
+
+class LatestNewsFeed(Feed):
+    title = "GENZE Esports News"
+    link = reverse_lazy('news')
+    description = "Breaking news, updates and announcements from GENZE Esports."
+
+    def items(self):
+        return news.feed_items()
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.summary or ''
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.date, datetime.min.time()))
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return [item.get_status_display()]
+
+
+class LatestNewsAtomFeed(LatestNewsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestNewsFeed.description
+
+
+FEEDS = {'rss': LatestNewsFeed, 'atom': LatestNewsAtomFeed}
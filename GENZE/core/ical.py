@@ -0,0 +1,130 @@
+# core/ical.py
+"""
+iCalendar (.ics) match feeds per team, tournament and game.
+
+The document is produced one VEVENT at a time from a values() iterator, so
+building a feed never materialises model instances or a template context.
+The views stream it; the first full pass is also captured and cached under
+a key built from the feed's validators (latest updated_at + row counts), so
+the first poll after a match change regenerates and every other poll is a
+cache hit -- or a 304 from the ``condition`` wrapper before the view runs.
+"""
+from datetime import timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Match
+from .request_metrics import cache_lookup
+from .schedule_conflicts import duration_lookup
+
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+CACHE_PREFIX = 'ical:'
+CACHE_TIMEOUT = 24 * 60 * 60  # keys change with the data, this only bounds memory
+MAX_CACHED_BYTES = 2 * 1024 * 1024  # bigger feeds are streamed every time instead
+PRODID = '-//GENZE ESPORTS//Match schedule//EN'
+
+FEEDS = {
+    'team': lambda pk: Q(team1_id=pk) | Q(team2_id=pk),
+    'tournament': lambda pk: Q(tournament_id=pk),
+    'game': lambda pk: Q(game_id=pk) | Q(game__isnull=True, tournament__game_id=pk),
+}
+
+COLUMNS = (
+    'id', 'match_time', 'status', 'stage', 'team1__name', 'team2__name',
+    'team1_score', 'team2_score', 'tournament__title', 'tournament__location',
+    'game__name', 'tournament__game__name', 'youtube_live_url', 'updated_at',
+)
+
+
+def feed_matches(kind, pk):
+    return Match.objects.filter(FEEDS[kind](pk))
+
+
+def _escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """RFC 5545 3.1: lines longer than 75 octets continue on the next line after a space."""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    limit = 75
+    while data:
+        cut = min(limit, len(data))
+        # don't split a multi-byte character
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+        limit = 74  # continuation lines start with the extra space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _stamp(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def iter_calendar(queryset, name, host='genze', chunk_size=2000):
+    """Yield the calendar as CRLF-terminated text, one chunk per VEVENT."""
+    duration = duration_lookup()
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold(f'PRODID:{PRODID}')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold(f'X-WR-CALNAME:{_escape(name)}')
+    rows = queryset.order_by('match_time', 'id').values_list(*COLUMNS).iterator(chunk_size=chunk_size)
+    for (match_id, start, status, stage, team1, team2, score1, score2, title, location,
+         game, tournament_game, live_url, updated_at) in rows:
+        game = game or tournament_game
+        summary = f"{team1} vs {team2}"
+        if status == 'completed' and score1 is not None and score2 is not None:
+            summary += f" ({score1}-{score2})"
+        description = ' • '.join(part for part in (title, stage, game) if part)
+        event = [
+            'BEGIN:VEVENT',
+            f'UID:match-{match_id}@{host}',
+            f'DTSTAMP:{_stamp(updated_at)}',
+            f'LAST-MODIFIED:{_stamp(updated_at)}',
+            f'DTSTART:{_stamp(start)}',
+            f'DTEND:{_stamp(start + duration(game))}',
+            f'SUMMARY:{_escape(summary)}',
+        ]
+        if description:
+            event.append(f'DESCRIPTION:{_escape(description)}')
+        if location:
+            event.append(f'LOCATION:{_escape(location)}')
+        if live_url:
+            event.append(f'URL:{live_url}')
+        event += ['STATUS:CONFIRMED', 'END:VEVENT']
+        # one chunk per event: small enough to stream, big enough not to flush per line
+        yield ''.join(_fold(line) for line in event)
+    yield _fold('END:VCALENDAR')
+
+
+def cache_key(kind, pk, version):
+    return f"{CACHE_PREFIX}{kind}:{pk}:{version}"
+
+
+def cached_calendar(key):
+    return cache_lookup('ical', cache.get(key))
+
+
+def caching(chunks, key):
+    """Pass chunks through unchanged and store the whole body once the generator is exhausted."""
+    seen = []
+    size = 0
+    for chunk in chunks:
+        if seen is not None:
+            seen.append(chunk)
+            size += len(chunk)
+            if size > MAX_CACHED_BYTES:
+                seen = None
+        yield chunk
+    if seen is not None:
+        cache.set(key, ''.join(seen), CACHE_TIMEOUT)
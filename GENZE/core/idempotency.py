@@ -0,0 +1,133 @@
+# core/idempotency.py
+"""
+Idempotent POSTs.
+
+A write is identified by the client (session, else IP) plus either an
+explicit key -- the Idempotency-Key header or an `idempotency_key` form
+field -- or, without one, a fingerprint of the submitted fields and files.
+The first request claims the key in the cache and runs the view; if the
+write succeeded its response is stored and replayed verbatim to repeats
+(double clicks, client retries), so a repeated submission never writes rows
+or sends mail twice. A failed one -- an error status, a JSON body with
+"ok": false such as create_reminder's "Email sending failed", or a response
+the view passed through failed() (a form re-rendered with its errors, a
+redirect back to it) -- releases the key so the client can retry. A repeat that arrives while the first is
+still running gets 409. Keys live in the default cache, which must be
+shared by the web workers (core.shared_cache).
+
+Explicit keys are remembered for IDEMPOTENCY_KEY_TTL (a day by default);
+fingerprints only for IDEMPOTENCY_FINGERPRINT_TTL (ten minutes), so a user
+can deliberately submit the same form again later.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+from . import shared_cache
+from .ratelimit import client_ip
+
+CACHE_PREFIX = 'idem:'
+PENDING = 'pending'
+REPLAYED_HEADERS = ('Content-Type', 'Location', 'Retry-After')
+IGNORED_FIELDS = ('csrfmiddlewaretoken', 'idempotency_key')
+
+
+def fingerprint(request):
+    digest = hashlib.sha256()
+    for name in sorted(request.POST):
+        if name not in IGNORED_FIELDS:
+            for value in request.POST.getlist(name):
+                digest.update(f"{name}={value}\0".encode())
+    for name in sorted(request.FILES):
+        for upload in request.FILES.getlist(name):
+            digest.update(f"{name}:{upload.name}:{upload.size}\0".encode())
+    return digest.hexdigest()
+
+
+def _client(request):
+    session_key = request.session.session_key
+    return f"s:{session_key}" if session_key else f"ip:{client_ip(request)}"
+
+
+def _cache_key(scope, request):
+    explicit = request.headers.get('Idempotency-Key') or request.POST.get('idempotency_key')
+    if explicit:
+        # the same key with a different body is a different write, not a replay
+        raw = f"{scope}|{_client(request)}|key|{explicit}|{fingerprint(request)}"
+        ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+    else:
+        raw = f"{scope}|{_client(request)}|body|{fingerprint(request)}"
+        ttl = getattr(settings, 'IDEMPOTENCY_FINGERPRINT_TTL', 10 * 60)
+    return CACHE_PREFIX + hashlib.sha256(raw.encode()).hexdigest(), ttl
+
+
+def _freeze(response):
+    return {
+        'status': response.status_code,
+        'content': response.content,
+        'headers': {h: response[h] for h in REPLAYED_HEADERS if response.has_header(h)},
+    }
+
+
+def failed(response):
+    """Mark a 2xx/3xx response as a write that didn't happen, so it isn't replayed. Returns it."""
+    response.idempotent_failed = True
+    return response
+
+
+def _succeeded(response):
+    if getattr(response, 'idempotent_failed', False):
+        return False
+    if not 200 <= response.status_code < 400 or getattr(response, 'streaming', False):
+        return False
+    if response.get('Content-Type', '').startswith('application/json'):
+        try:
+            return json.loads(response.content).get('ok', True) is not False
+        except (ValueError, AttributeError):
+            return True
+    return True
+
+
+def _replay(stored):
+    response = HttpResponse(stored['content'], status=stored['status'])
+    for header, value in stored['headers'].items():
+        response[header] = value
+    response['Idempotent-Replay'] = 'true'
+    return response
+
+
+def idempotent(scope, json=False):
+    """View decorator: run each distinct POST to `scope` at most once per key lifetime."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view(request, *args, **kwargs)
+            shared_cache.require("Idempotency keys")
+            key, ttl = _cache_key(scope, request)
+            if not cache.add(key, PENDING, ttl):
+                stored = cache.get(key)
+                if stored is not None and stored != PENDING:
+                    return _replay(stored)
+                message = "This request is already being processed."
+                response = (JsonResponse({"ok": False, "error": message}, status=409) if json
+                            else HttpResponse(message, status=409, content_type='text/plain'))
+                response['Retry-After'] = '1'
+                return response
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                cache.delete(key)
+                raise
+            if _succeeded(response):
+                cache.set(key, _freeze(response), ttl)
+            else:
+                # not a completed write: let the client try again
+                cache.delete(key)
+            return response
+        return wrapped
+    return decorator
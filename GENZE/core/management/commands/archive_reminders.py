@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core import retention
+
+
+class Command(BaseCommand):
+    help = "Move reminders of matches older than REMINDER_RETENTION into the archive, in keyset batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows per batch (default REMINDER_ARCHIVE_BATCH)')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--days', type=float, help='Override the retention window, in days')
+        parser.add_argument('--sink', choices=sorted(retention.SINKS), help='Override REMINDER_ARCHIVE')
+
+    def handle(self, *args, **options):
+        stats = retention.archive_reminders(
+            window=timedelta(days=options['days']) if options['days'] is not None else None,
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            sink=retention.get_sink(options['sink']),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {stats['archived']} reminders older than {stats['cutoff']} "
+            f"in {stats['batches']} batches ({stats['seconds']:.3f}s)"
+        ))
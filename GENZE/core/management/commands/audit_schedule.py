@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Match
+from core.schedule_conflicts import audit
+
+
+class Command(BaseCommand):
+    help = "Report double-booked teams and overbooked tournament days in one sorted sweep over all matches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournament', type=int, help='Only audit one tournament')
+        parser.add_argument('--upcoming', action='store_true', help='Only audit matches that have not started')
+
+    def handle(self, *args, **options):
+        qs = Match.objects.all()
+        if options['tournament']:
+            qs = qs.filter(tournament_id=options['tournament'])
+        if options['upcoming']:
+            qs = qs.filter(status='upcoming')
+
+        overlaps = overbooked = 0
+        for kind, finding in audit(qs):
+            if kind == 'overlap':
+                overlaps += 1
+                self.stdout.write(self.style.WARNING(f"[OVERLAP] {finding}"))
+            else:
+                overbooked += 1
+                tournament_id, day, count = finding
+                self.stdout.write(self.style.WARNING(
+                    f"[OVERBOOKED] tournament {tournament_id} has {count} matches on {day}"
+                ))
+
+        style = self.style.ERROR if overlaps or overbooked else self.style.SUCCESS
+        self.stdout.write(style(f"{overlaps} team overlaps, {overbooked} overbooked tournament days"))
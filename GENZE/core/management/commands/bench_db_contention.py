@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Reproduce SQLite write contention (status sweep vs admin score edits vs reminder inserts) "
+        "with Django's stock SQLite settings and with the tuned settings from main_project.settings"
+    )
+
+    SCENARIOS = {
+        # Django's defaults: rollback journal, DEFERRED transactions, 5s python-level timeout
+        'default': {'pragmas': [], 'begin': 'BEGIN', 'timeout': 5.0},
+        # settings.DATABASES for SQLite: WAL + busy timeout + IMMEDIATE transactions
+        'tuned': {
+            'pragmas': ['PRAGMA journal_mode=WAL', 'PRAGMA synchronous=NORMAL', 'PRAGMA busy_timeout=20000'],
+            'begin': 'BEGIN IMMEDIATE',
+            'timeout': 20.0,
+        },
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0, help='Run time per scenario')
+        parser.add_argument('--matches', type=int, default=200, help='Match rows to contend on')
+        parser.add_argument('--workers', type=int, default=2, help='Threads per writer role')
+
+    def handle(self, *args, **options):
+        for name, scenario in self.SCENARIOS.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self._setup(path, scenario, options['matches'])
+                ok, locked, elapsed = self._run(path, scenario, options)
+            style = self.style.ERROR if locked else self.style.SUCCESS
+            self.stdout.write(style(
+                f"[{name}] {ok} writes committed, {locked} 'database is locked' errors, "
+                f"{ok / elapsed:.0f} writes/s"
+            ))
+
+    def _connect(self, path, scenario):
+        conn = sqlite3.connect(path, timeout=scenario['timeout'], isolation_level=None, check_same_thread=False)
+        for pragma in scenario['pragmas']:
+            conn.execute(pragma)
+        return conn
+
+    def _setup(self, path, scenario, matches):
+        conn = self._connect(path, scenario)
+        conn.execute(
+            "CREATE TABLE core_match (id INTEGER PRIMARY KEY, status TEXT, team1_score INT, "
+            "team2_score INT, points_team1 INT, match_time REAL)"
+        )
+        conn.execute("CREATE TABLE core_reminder (id INTEGER PRIMARY KEY, match_id INT, email TEXT, sent INT)")
+        conn.executemany(
+            "INSERT INTO core_match (id, status, team1_score, team2_score, points_team1, match_time) "
+            "VALUES (?, 'upcoming', 0, 0, 0, ?)",
+            [(i, time.time()) for i in range(1, matches + 1)],
+        )
+        conn.close()
+
+    def _run(self, path, scenario, options):
+        matches = options['matches']
+        stop = time.monotonic() + options['seconds']
+        counts = {'ok': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        # Each role mirrors what the app does inside one transaction: read the row
+        # (model load / filter), then write it (save / create).
+        def sweep(conn, i):
+            conn.execute("SELECT id FROM core_match WHERE status = 'upcoming' LIMIT 20").fetchall()
+            conn.execute("UPDATE core_match SET status = 'live' WHERE id = ?", (i % matches + 1,))
+
+        def admin_edit(conn, i):
+            conn.execute("SELECT * FROM core_match WHERE id = ?", (i % matches + 1,)).fetchone()
+            conn.execute(
+                "UPDATE core_match SET team1_score = ?, points_team1 = ? WHERE id = ?",
+                (i % 13, i, i % matches + 1),
+            )
+
+        def create_reminder(conn, i):
+            conn.execute("SELECT id FROM core_match WHERE id = ?", (i % matches + 1,)).fetchone()
+            conn.execute(
+                "INSERT INTO core_reminder (match_id, email, sent) VALUES (?, ?, 0)",
+                (i % matches + 1, f"fan{i}@example.com"),
+            )
+
+        def worker(op):
+            conn = self._connect(path, scenario)
+            i = 0
+            while time.monotonic() < stop:
+                i += 1
+                try:
+                    conn.execute(scenario['begin'])
+                    op(conn, i)
+                    conn.execute('COMMIT')
+                    key = 'ok'
+                except sqlite3.OperationalError as e:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    if 'locked' not in str(e):
+                        raise
+                    key = 'locked'
+                with lock:
+                    counts[key] += 1
+            conn.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(op,))
+            for op in (sweep, admin_edit, create_reminder)
+            for _ in range(options['workers'])
+        ]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return counts['ok'], counts['locked'], time.monotonic() - started
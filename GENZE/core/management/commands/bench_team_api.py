@@ -0,0 +1,72 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.forms.models import model_to_dict
+from django.test.utils import CaptureQueriesContext
+
+from core import rosters
+from core.models import Game, Player, Team
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the team/roster API serialization against full-model serialization "
+        "(prefetch_related('players') + every column) on generated teams; nothing is kept"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=10000, help='Teams to generate')
+        parser.add_argument('--players', type=int, default=5, help='Players per team')
+        parser.add_argument('--page-size', type=int, default=rosters.MAX_PAGE_SIZE, help='Teams per API page')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options['teams'], options['players'])
+                self._report('full models', self._full_models)
+                self._report(f"api pages of {options['page_size']}", lambda: self._api(options['page_size']))
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _seed(self, teams, players):
+        start = time.perf_counter()
+        game, _ = Game.objects.get_or_create(name='Bench')
+        first = Team.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        Team.objects.bulk_create(
+            [Team(name=f"Bench {i}", tag=f"B{i % 1000}", game=game, region='EU', description='x' * 500)
+             for i in range(teams)], batch_size=2000)
+        team_ids = Team.objects.filter(pk__gt=first, game=game).values_list('pk', flat=True)
+        Player.objects.bulk_create(
+            [Player(name=f"Player {n}", role='Flex', team_id=team_id, email=f"p{team_id}-{n}@example.com")
+             for team_id in team_ids for n in range(players)], batch_size=2000)
+        self.stdout.write(f"seeded {teams} teams x {players} players in {time.perf_counter() - start:.1f}s")
+
+    def _full_models(self):
+        return [
+            dict(model_to_dict(team, exclude=['logo', 'banner']),
+                 players=[model_to_dict(p, exclude=['avatar']) for p in team.players.all()])
+            for team in Team.objects.prefetch_related('players')
+        ]
+
+    def _api(self, size):
+        results, after = [], 0
+        while after is not None:
+            page, after = rosters.page(after=after, size=size)
+            results.extend(page)
+        return results
+
+    def _report(self, label, build):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            body = json.dumps(build(), default=str)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<22}{elapsed * 1000:>9.0f} ms{len(queries):>7} queries{len(body) / 1024:>9.0f} KB"
+        )
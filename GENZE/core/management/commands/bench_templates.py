@@ -0,0 +1,62 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core import template_cache
+
+PAGES = ['home', 'tournaments', 'teams', 'schedule', 'results', 'news', 'register', 'calendar_view',
+         'overall_match_stats']
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark render time per page against the current database: a cold request "
+        "(empty template cache) followed by warm requests, then the same after warm_up()"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('pages', nargs='*', help=f"URL names (default: {', '.join(PAGES)})")
+        parser.add_argument('--requests', type=int, default=20, help='Warm requests per page')
+
+    def _reset(self):
+        for loader in engines['django'].engine.template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+        template_cache.clear()
+
+    def _time(self, client, url):
+        # If-None-Match/Last-Modified aren't sent, so conditional pages render in full
+        start = time.perf_counter()
+        response = client.get(url)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            client = Client()
+            self._reset()
+            compiled, failed = template_cache.warm_up()
+            self.stdout.write(f"warm_up(): {compiled} templates compiled, {len(failed)} failed {failed or ''}")
+            self._reset()
+
+            self.stdout.write(f"{'page':<22}{'cold ms':>9}{'warm mean':>11}{'warm p95':>10}{'prewarmed':>11}")
+            for name in options['pages'] or PAGES:
+                url = reverse(name)
+                self._reset()
+                cold, status = self._time(client, url)
+                warm = sorted(self._time(client, url)[0] for _ in range(options['requests']))
+                self._reset()
+                template_cache.warm_up()
+                prewarmed, _ = self._time(client, url)
+                p95 = warm[min(len(warm) - 1, int(len(warm) * 0.95))]
+                line = f"{name:<22}{cold:>9.1f}{statistics.mean(warm):>11.1f}{p95:>10.1f}{prewarmed:>11.1f}"
+                self.stdout.write(line if status == 200 else self.style.WARNING(f"{line}  (HTTP {status})"))
+        finally:
+            teardown_test_environment()
@@ -0,0 +1,126 @@
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from core.models import MediaBlob
+from core.storage import BLOB_PREFIX, MEDIA_FIELDS, blob_name, digest_of, hash_content
+
+
+def media_fields():
+    for label, fields in MEDIA_FIELDS.items():
+        model = apps.get_model(label)
+        for field in fields:
+            yield model, field
+
+
+def walk(backend, path):
+    dirs, files = backend.listdir(path)
+    for name in files:
+        yield f"{path}{name}"
+    for directory in dirs:
+        yield from walk(backend, f"{path}{directory}/")
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing media files into content-addressed blobs, point every row at its blob "
+        "and rebuild the reference counts (identical files end up stored once)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Hash and report without changing anything')
+        parser.add_argument('--keep-originals', action='store_true', help='Leave the old files in place')
+        parser.add_argument('--delete-orphans', action='store_true',
+                            help='Also delete media files that no row references (listed either way)')
+
+    def handle(self, *args, **options):
+        if not getattr(default_storage, 'refcounted', False):
+            raise CommandError("STORAGES['default'] must be core.storage.ContentAddressedStorage")
+        backend = default_storage.backend
+        dry_run = options['dry_run']
+
+        # name -> [(model, field)] for every file a row points at
+        refs = defaultdict(list)
+        for model, field in media_fields():
+            names = (model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                     .values_list(field, flat=True).distinct())
+            for name in names:
+                refs[name].append((model, field))
+
+        moved, sizes, missing = {}, {}, []
+        for name in sorted(refs):
+            if digest_of(name):
+                continue
+            if not backend.exists(name):
+                missing.append(name)
+                continue
+            with backend.open(name, 'rb') as original:
+                content = File(original, name)
+                digest, size = hash_content(content)
+                target = blob_name(digest, name)
+                if not dry_run and not backend.exists(target):
+                    backend.save(target, content)
+            moved[name] = target
+            sizes[name] = size
+
+        for name in missing:
+            self.stdout.write(self.style.WARNING(f"[MISSING] {name} is referenced but not stored"))
+        before = sum(sizes.values())
+        after = sum({moved[name]: size for name, size in sizes.items()}.values())
+        self.stdout.write(
+            f"{len(moved)} files -> {len(set(moved.values()))} blobs, "
+            f"{before / 1024:.0f} KB -> {after / 1024:.0f} KB"
+        )
+
+        referenced = set(refs) | set(moved.values())
+        prefixes = {model._meta.get_field(field).upload_to for model, field in media_fields()} | {BLOB_PREFIX}
+        orphans = [name for prefix in sorted(prefixes) if backend.exists(prefix)
+                   for name in walk(backend, prefix) if name not in referenced]
+        for name in orphans:
+            self.stdout.write(f"[ORPHAN] {name}")
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {len(orphans)} unreferenced files, nothing changed"))
+            return
+
+        with transaction.atomic():
+            for name, target in moved.items():
+                for model, field in refs[name]:
+                    model.objects.filter(**{field: name}).update(**{field: target})
+            self._rebuild_counts(backend)
+            if not options['keep_originals']:
+                originals = [name for name in moved if name != moved[name]]
+                transaction.on_commit(lambda: [backend.delete(name) for name in originals])
+            if options['delete_orphans']:
+                transaction.on_commit(lambda: [backend.delete(name) for name in orphans])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rows now point at blobs; {MediaBlob.objects.count()} blobs, "
+            f"{len(orphans)} orphans {'deleted' if options['delete_orphans'] else 'kept'}"
+        ))
+
+    def _rebuild_counts(self, backend):
+        counts = Counter()
+        for model, field in media_fields():
+            rows = (model.objects.filter(**{f'{field}__startswith': BLOB_PREFIX})
+                    .values_list(field).annotate(n=Count('pk')))
+            for name, n in rows:
+                counts[name] += n
+
+        existing = {blob.digest: blob for blob in MediaBlob.objects.all()}
+        for name, n in counts.items():
+            digest = digest_of(name)
+            blob = existing.pop(digest, None)
+            if blob is None:
+                MediaBlob.objects.create(digest=digest, name=name, size=backend.size(name), refcount=n)
+            elif blob.refcount != n or blob.name != name:
+                MediaBlob.objects.filter(pk=blob.pk).update(name=name, refcount=n)
+        # nothing points at these any more
+        unused = list(existing.values())
+        MediaBlob.objects.filter(pk__in=[blob.pk for blob in unused]).delete()
+        transaction.on_commit(lambda: [backend.delete(blob.name) for blob in unused])
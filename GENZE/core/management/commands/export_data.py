@@ -0,0 +1,30 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.bulk import ENTITIES, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream games, tournaments, teams, players or matches out as CSV or JSONL (natural keys, no ids)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('entity', choices=ENTITIES)
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', '-o', default='-', help="File path, or '-' for stdout")
+
+    def handle(self, *args, **options):
+        out = sys.stdout if options['output'] == '-' else open(options['output'], 'w', newline='')
+        rows = 0
+        try:
+            for line in export_lines(options['entity'], options['format']):
+                out.write(line)
+                rows += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options['output'] != '-':
+            header = 1 if options['format'] == 'csv' else 0
+            self.stderr.write(self.style.SUCCESS(
+                f"Exported {rows - header} {options['entity']} to {options['output']}"
+            ))
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.brackets import FORMATS, BracketError, generate_stage
+from core.models import Tournament
+
+
+class Command(BaseCommand):
+    help = "Generate a bracket stage (single/double elimination, Swiss, round robin) from a tournament's registered teams"
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_id', type=int)
+        parser.add_argument('--format', choices=FORMATS, default='single_elimination')
+        parser.add_argument('--name', help='Stage name, e.g. "Playoffs" (defaults to the format name)')
+        parser.add_argument('--start', help='ISO datetime of the first round (defaults to the tournament start date)')
+        parser.add_argument('--round-gap-hours', type=float, default=24.0)
+
+    def handle(self, *args, **options):
+        try:
+            tournament = Tournament.objects.get(pk=options['tournament_id'])
+        except Tournament.DoesNotExist:
+            raise CommandError(f"Tournament {options['tournament_id']} does not exist")
+
+        if options['start']:
+            starts_at = parse_datetime(options['start'])
+            if starts_at is None:
+                raise CommandError(f"Invalid --start {options['start']!r}")
+            if timezone.is_naive(starts_at):
+                starts_at = timezone.make_aware(starts_at)
+        else:
+            starts_at = timezone.make_aware(datetime.combine(tournament.start_date, dtime(hour=12)))
+
+        started = time.perf_counter()
+        try:
+            stage, created = generate_stage(
+                tournament, options['format'], starts_at,
+                timedelta(hours=options['round_gap_hours']), name=options['name'],
+            )
+        except BracketError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created stage '{stage.name}' ({stage.get_format_display()}, {stage.total_rounds} rounds) "
+            f"with {created} matches in {(time.perf_counter() - started) * 1000:.0f} ms"
+        ))
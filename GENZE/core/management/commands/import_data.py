@@ -0,0 +1,65 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import ENTITIES, FORMATS, Importer, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import games, tournaments, teams, players or matches from CSV/JSONL. "
+        "Foreign keys are resolved by natural key; existing rows are updated, new ones created. "
+        "Import parents first: games, tournaments, teams, players, matches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('entity', choices=ENTITIES)
+        parser.add_argument('path', help="File path, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension (csv)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--no-create-games', action='store_true', help='Fail rows with unknown games')
+        parser.add_argument('--allow-conflicts', action='store_true',
+                            help='Import matches even if a team is double-booked')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        started = time.monotonic()
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats['processed']} rows ({stats['created']} created, "
+                f"{stats['updated']} updated, {stats['unchanged']} unchanged, {stats['errors']} errors) "
+                f"{time.monotonic() - started:.1f}s"
+            )
+
+        importer = Importer(
+            options['entity'],
+            chunk_size=options['chunk_size'],
+            create_games=not options['no_create_games'],
+            check_conflicts=not options['allow_conflicts'],
+            progress=progress if options['verbosity'] >= 1 else None,
+        )
+        stream = sys.stdin if path == '-' else open(path, newline='')
+        try:
+            stats = importer.run(read_rows(fmt, stream))
+        except ValueError as e:
+            raise CommandError(f"Could not parse {path}: {e}")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for line, message in importer.errors:
+            self.stdout.write(self.style.WARNING(f"row {line}: {message}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {options['entity']}: {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, "
+            f"{stats['errors']} errors in {time.monotonic() - started:.1f}s"
+        ))
+        if options['entity'] == 'matches':
+            self.stdout.write(
+                f"Rated {importer.rated} completed matches"
+                + ("; a full rating replay was queued (results out of order or corrected)"
+                   if importer.replay_queued else "")
+            )
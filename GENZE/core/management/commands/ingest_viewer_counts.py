@@ -0,0 +1,82 @@
+import json
+import queue
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.viewers import MemoryViewerStore, flush
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest viewer-count samples as JSON lines ({\"match\": 12, \"viewers\": 1530}) "
+        "from a file or stdin, coalescing them in memory and flushing batched updates on an interval"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="JSONL file, or '-' for stdin")
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds between flushes (default: VIEWER_FLUSH_SECONDS, as the beat task)')
+
+    def handle(self, *args, **options):
+        store = MemoryViewerStore()
+        interval = options['interval'] or getattr(settings, 'VIEWER_FLUSH_SECONDS', 10.0)
+        stream = sys.stdin if options['path'] == '-' else open(options['path'])
+
+        # Lines are read on a thread so the flush timer keeps running while the
+        # stream is quiet; a None marks EOF. Database writes stay on this thread.
+        lines = queue.Queue(maxsize=10000)
+
+        def read():
+            try:
+                for line in stream:
+                    lines.put(line)
+            finally:
+                lines.put(None)
+
+        threading.Thread(target=read, name='ingest-viewer-counts', daemon=True).start()
+
+        samples = writes = bad = 0
+        next_flush = time.monotonic() + interval
+        try:
+            while True:
+                try:
+                    line = lines.get(timeout=max(next_flush - time.monotonic(), 0))
+                except queue.Empty:
+                    writes += flush(store)
+                    next_flush = time.monotonic() + interval
+                    continue
+                if line is None:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                    count = int(row['viewers'])
+                    if count < 0:
+                        raise ValueError(count)
+                    store.record(row['match'], count)
+                    samples += 1
+                except (ValueError, KeyError, TypeError):
+                    bad += 1
+                    continue
+
+                if time.monotonic() >= next_flush:
+                    writes += flush(store)
+                    next_flush = time.monotonic() + interval
+        except KeyboardInterrupt:
+            pass
+        finally:
+            writes += flush(store)
+            if stream is not sys.stdin:
+                stream.close()
+
+        if samples == 0 and bad:
+            raise CommandError(f"No valid samples ({bad} malformed lines)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {samples} samples ({bad} malformed) -> {writes} row updates"
+        ))
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What each process imports before it can serve its first request / task
+TARGETS = {
+    'setup': "import django; django.setup()",
+    'wsgi': "import main_project.wsgi; from django.urls import get_resolver; get_resolver().url_patterns",
+    'asgi': "import main_project.asgi; from django.urls import get_resolver; get_resolver().url_patterns",
+    'worker': (
+        "import django; django.setup(); from main_project.celery import app; "
+        "app.loader.import_default_modules()"
+    ),
+}
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us)] from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        head, cumulative, name = line.split('|', 2)
+        rows.append((name.strip(), int(head.split(':', 1)[1]), int(cumulative)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Profile process startup with `python -X importtime` for the WSGI app, ASGI app and Celery worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help=f"Any of: {', '.join(TARGETS)} (default: all)")
+        parser.add_argument('--top', type=int, default=12, help='Heaviest top-level packages to list')
+        parser.add_argument('--runs', type=int, default=3, help='Runs per target; the fastest is reported')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'main_project.settings'))
+        unknown = set(options['targets']) - set(TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown target(s): {', '.join(sorted(unknown))}")
+        for target in options['targets'] or list(TARGETS):
+            best = None
+            for _ in range(options['runs']):
+                proc = subprocess.run(
+                    [sys.executable, '-X', 'importtime', '-c', TARGETS[target]],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+                )
+                if proc.returncode:
+                    self.stdout.write(self.style.ERROR(f"{target}: failed\n{proc.stderr[-2000:]}"))
+                    break
+                rows = parse_importtime(proc.stderr)
+                total = sum(self_us for _, self_us, _ in rows)
+                if best is None or total < best[0]:
+                    best = (total, rows)
+            if best is None:
+                continue
+
+            total, rows = best
+            self.stdout.write(self.style.SUCCESS(f"{target}: {total / 1000:.0f} ms importing {len(rows)} modules"))
+            by_package = {}
+            for name, self_us, _ in rows:
+                root = name.split('.')[0]
+                count, us = by_package.get(root, (0, 0))
+                by_package[root] = (count + 1, us + self_us)
+            for root, (count, us) in sorted(by_package.items(), key=lambda item: -item[1][1])[:options['top']]:
+                self.stdout.write(f"  {us / 1000:8.1f} ms  {root} ({count} modules)")
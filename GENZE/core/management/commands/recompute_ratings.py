@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.ratings import replay
+
+
+class Command(BaseCommand):
+    help = "Rebuild all team Elo ratings by replaying completed matches in match_time order"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows fetched per DB round trip')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(count):
+            self.stdout.write(f"  {count} matches replayed ({time.monotonic() - started:.1f}s)")
+
+        matches, teams = replay(chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {matches} matches into {teams} team ratings in {time.monotonic() - started:.1f}s"
+        ))
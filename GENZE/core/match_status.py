@@ -0,0 +1,155 @@
+# core/match_status.py
+"""
+Match status transitions.
+
+upcoming -> live is pushed: every upcoming match gets a Celery task with
+eta=match_time, so it goes live on time instead of on the next minute tick.
+Far-future ETAs are a liability with the Redis broker (anything beyond the
+visibility timeout is redelivered), so tasks are only enqueued for matches
+starting within MATCH_START_HORIZON; schedule_upcoming() runs more often
+than the horizon and enqueues the next window. Saving a match with a new
+match_time enqueues a fresh task and the stale one no-ops, because each task
+carries the match_time it was scheduled for.
+
+start_overdue() stays as a safety net (broker outage, lost task) and only
+looks at the indexed (status, match_time) range of due rows; it runs with
+schedule_upcoming() every few minutes. live -> completed isn't pushed, so
+complete_finished() keeps the one-minute tick with the reminders.
+"""
+import logging
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Match
+
+logger = logging.getLogger(__name__)
+
+ENQUEUED_PREFIX = 'match-start:'
+DEFAULT_TIMEZONE = 'Asia/Kolkata'
+COMPLETION_GRACE = timedelta(minutes=15)
+
+
+def horizon():
+    return timedelta(minutes=getattr(settings, 'MATCH_START_HORIZON_MINUTES', 15))
+
+
+def start_match(match, now=None):
+    match.status = 'live'
+    match.live_started_at = now or timezone.now()
+    match.save(update_fields=['status', 'live_started_at', 'updated_at'])
+
+
+def start_if_due(match_id, expected_time):
+    """
+    Body of the ETA task. Returns True if the match went live. Skips matches
+    that were rescheduled, already started, or whose ETA fired early.
+    """
+    now = timezone.now()
+    match = Match.objects.filter(pk=match_id, status='upcoming', match_time=expected_time).first()
+    if match is None or match.match_time > now:
+        return False
+    start_match(match, now)
+    return True
+
+
+def due_matches(now=None):
+    """Safety-net range: upcoming matches whose start time has passed."""
+    return Match.objects.filter(status='upcoming', match_time__lte=now or timezone.now())
+
+
+def _enqueue(match_id, match_time):
+    # One task per (match, start time); repeated schedule_upcoming() passes don't pile up duplicates
+    key = f"{ENQUEUED_PREFIX}{match_id}:{match_time.timestamp()}"
+    ttl = max(int((match_time - timezone.now()).total_seconds()) + 3600, 60)
+    if not cache.add(key, 1, ttl):
+        return False
+    from .tasks import start_match_task
+    try:
+        start_match_task.apply_async(args=[match_id, match_time.isoformat()], eta=match_time)
+    except Exception as e:
+        # Broker down: leave it to the sweep and let the next pass retry
+        cache.delete(key)
+        logger.warning("Could not schedule start of match %s: %s", match_id, e)
+        return False
+    return True
+
+
+def schedule_start(match):
+    """Enqueue the go-live task for one upcoming match if it starts within the horizon."""
+    if match.status != 'upcoming' or match.match_time - timezone.now() > horizon():
+        return False
+    match_id, match_time = match.pk, match.match_time
+    transaction.on_commit(lambda: _enqueue(match_id, match_time))
+    return True
+
+
+def schedule_upcoming(now=None):
+    """Enqueue go-live tasks for every upcoming match starting in the next horizon."""
+    now = now or timezone.now()
+    rows = Match.objects.filter(
+        status='upcoming', match_time__gt=now, match_time__lte=now + horizon()
+    ).values_list('id', 'match_time')
+    return sum(1 for match_id, match_time in rows if _enqueue(match_id, match_time))
+
+
+def _local(when, tz_name):
+    try:
+        tz = ZoneInfo(tz_name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        tz_name, tz = DEFAULT_TIMEZONE, ZoneInfo(DEFAULT_TIMEZONE)
+    return f"{when.astimezone(tz):%H:%M} {tz_name or DEFAULT_TIMEZONE}"
+
+
+def start_overdue(now=None, report=None):
+    """
+    Go-live catch-up: start upcoming matches whose start time has passed
+    (normally done on time by start_match_task; this catches a lost task or a
+    broker outage). Runs with schedule_match_starts_task. Returns the count.
+    """
+    now = now or timezone.now()
+    started = 0
+    for match in due_matches(now).select_related('tournament', 'team1', 'team2'):
+        start_match(match, now)
+        started += 1
+        if report:
+            report('success', f"[UPCOMING→LIVE] {match.team1.name} vs {match.team2.name} "
+                              f"({_local(match.match_time, match.tournament.timezone)})")
+    return started
+
+
+def complete_finished(now=None, report=None):
+    """
+    Live -> completed for scored matches with no stream or past the grace
+    period. Nothing pushes this transition, so it runs every minute with the
+    reminders in update_match_statuses_task. Returns the count.
+    """
+    now = now or timezone.now()
+    completed = 0
+    finished = Match.objects.select_related('team1', 'team2').filter(
+        status='live', team1_score__isnull=False, team2_score__isnull=False,
+    ).filter(
+        Q(youtube_live_url__isnull=True) | Q(youtube_live_url='') | Q(match_time__lt=now - COMPLETION_GRACE)
+    )
+    for match in finished:
+        match.status = 'completed'
+        match.completed_at = now
+        match.save(update_fields=['status', 'completed_at', 'updated_at'])
+        completed += 1
+        if report:
+            report('success', f"[LIVE→COMPLETED] {match.team1.name} vs {match.team2.name}")
+    return completed
+
+
+def sweep(now=None, report=None):
+    """
+    Both passes at once, for the update_match_statuses command. `report(kind,
+    text)` receives 'success' lines. Returns (started, completed).
+    """
+    now = now or timezone.now()
+    return start_overdue(now, report), complete_finished(now, report)
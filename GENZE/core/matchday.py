@@ -0,0 +1,116 @@
+# core/matchday.py
+"""
+Match-day batch operations: go live, complete, advance rounds and apply
+score sheets for many matches at once (admin actions and the match-day
+console in core.admin).
+
+Each call is one transaction: the rows are locked, changed in memory and
+written with a single bulk_update of the touched columns. bulk_update sends
+no post_save, so what core.signals would do per save runs once per batch
+instead (core.scoring.after_write):
+
+* newly completed matches are rated and advance their brackets, in
+  match_time order (Elo is order-dependent);
+* the affected calendar months are invalidated once, after commit;
+* a score sheet that changes the result of an already rated match queues
+  one rating replay (core.ratings.replay_later).
+
+Score fields follow core.scoring: a score sheet row carries the version the
+admin saw, a row changed since is skipped and reported as stale, and every
+score write bumps the version.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Match
+from .ratings import RESULT_FIELDS, result_changed
+from .scoring import SCORE_FIELDS, after_write
+
+NEXT_STATUS = {'live': ('upcoming',), 'completed': ('upcoming', 'live')}
+
+
+def _result(matches=(), stale=(), completed=()):
+    return {'updated': len(matches), 'stale': sorted(stale), 'completed': len(completed)}
+
+
+def _write(matches, fields, now, rescored=False):
+    """bulk_update + the once-per-batch follow-up. Runs inside the caller's transaction."""
+    if not matches:
+        return
+    for match in matches:
+        match.updated_at = now
+    Match.objects.bulk_update(matches, sorted(set(fields)) + ['updated_at'])
+    after_write(matches, rescored)
+
+
+def _locked(ids):
+    return list(Match.objects.select_for_update().filter(pk__in=ids).order_by('pk'))
+
+
+def set_status(ids, status, now=None):
+    """Move upcoming (and, for 'completed', live) matches to `status`; others are left alone."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        matches = [m for m in _locked(ids) if m.status in NEXT_STATUS[status]]
+        for match in matches:
+            match.status = status
+            if status == 'live':
+                match.live_started_at = match.live_started_at or now
+            else:
+                match.completed_at = now
+        _write(matches, ['status', 'live_started_at' if status == 'live' else 'completed_at'], now)
+    return _result(matches, completed=matches if status == 'completed' else ())
+
+
+def advance_round(ids, now=None):
+    """current_round + 1 on live matches (capped at total_rounds when that's set)."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        matches = []
+        for match in _locked(ids):
+            if match.status != 'live' or (match.total_rounds and (match.current_round or 0) >= match.total_rounds):
+                continue
+            match.current_round = (match.current_round or 0) + 1
+            match.version += 1
+            matches.append(match)
+        _write(matches, ['current_round', 'version'], now)
+    return _result(matches)
+
+
+def apply_scores(sheet, complete=(), now=None):
+    """
+    `sheet` is {match_id: {'version': seen, <score field>: value, ...}}; ids in
+    `complete` are also marked completed (after their scores are set, so the
+    rating sees the final score). Returns {'updated', 'stale', 'completed'}.
+    """
+    now = now or timezone.now()
+    for values in sheet.values():
+        unknown = set(values) - set(SCORE_FIELDS) - {'version'}
+        if unknown:
+            raise ValueError(f"Not a score field: {', '.join(sorted(unknown))}")
+    with transaction.atomic():
+        matches, stale, completed, fields = [], [], [], set()
+        rescored = False
+        for match in _locked(set(sheet) | set(complete)):
+            values = dict(sheet.get(match.pk, {}))
+            if values:
+                if int(values.pop('version')) != match.version:
+                    stale.append(match.pk)
+                    continue
+                before = {'rated': match.rated, **{f: getattr(match, f) for f in RESULT_FIELDS}}
+                for field, value in values.items():
+                    setattr(match, field, value)
+                match.version += 1
+                rescored = rescored or result_changed(before, match)
+                fields.update(values)
+                fields.add('version')
+            if match.pk in complete and match.status in NEXT_STATUS['completed']:
+                match.status = 'completed'
+                match.completed_at = now
+                fields.update(('status', 'completed_at'))
+                completed.append(match)
+            elif not values:
+                continue
+            matches.append(match)
+        _write(matches, fields, now, rescored)
+    return _result(matches, stale, completed)
@@ -0,0 +1,418 @@
+# core/metrics.py
+"""
+Counters, gauges and histograms with Prometheus text exposition.
+
+Metrics are declared once at module level by the code that owns them
+(core.task_metrics, ...) and record into a store (settings.METRICS_STORE):
+
+  MemoryMetricStore       - this process only; tests and single-process runs.
+  CacheMetricStore        - the default cache, which has to be the shared
+                            Redis one (CACHE_URL, core.shared_cache): the
+                            Celery worker and every web worker add into the
+                            same keys, so /metrics on any web worker also
+                            shows the worker's task metrics. On a per-process
+                            cache each process would only see its own, so
+                            get_store() refuses it when SHARED_CACHE_REQUIRED.
+                            Values are integers under cache.incr, scaled by
+                            SCALE so seconds keep microsecond precision.
+  MultiprocessMetricStore - per-request metrics: lock-free in process, shared
+                            between gunicorn workers through files in
+                            METRICS_MULTIPROC_DIR.
+
+Histogram buckets are stored non-cumulatively (one increment per
+observation) and summed into Prometheus' cumulative `le` buckets when
+rendered.
+
+With STATSD_ADDRESS ("host:port") set, every observation is also sent as a
+statsd UDP packet, fire and forget, for a statsd/Datadog agent instead of
+a scraper.
+"""
+import atexit
+import json
+import math
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import shared_cache
+
+CACHE_PREFIX = 'metrics:'
+SCALE = 1_000_000
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REGISTRY = []
+GAUGE_NAMES = set()
+
+
+# ---- stores ----------------------------------------------------------------
+
+class MemoryMetricStore:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, series, amount):
+        with self._lock:
+            self._values[(name, series)] = self._values.get((name, series), 0) + amount
+
+    def set(self, name, series, value):
+        with self._lock:
+            self._values[(name, series)] = value
+
+    def collect(self, name):
+        """{series: value} for one metric; series is a tuple of (label, value) pairs."""
+        with self._lock:
+            return {series: value for (metric, series), value in self._values.items() if metric == name}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class CacheMetricStore:
+    """
+    One cache key per series plus, per metric, an index of its series. The
+    index is read-modify-write, so a series first seen by two processes at
+    once can drop out of it; each process re-adds what it has seen once a
+    minute, so that heals on the next pass.
+    """
+    REINDEX_SECONDS = 60
+
+    def __init__(self):
+        self._indexed = {}
+        self._lock = threading.Lock()
+
+    def _key(self, name, series):
+        return CACHE_PREFIX + name + ':' + ','.join(f"{k}={v}" for k, v in series)
+
+    def _index(self, name, series):
+        now = perf_counter()
+        with self._lock:
+            last = self._indexed.get((name, series))
+            if last is not None and now - last < self.REINDEX_SECONDS:
+                return
+            self._indexed[(name, series)] = now
+        index_key = f"{CACHE_PREFIX}index:{name}"
+        index = cache.get(index_key) or set()
+        if series not in index:
+            cache.set(index_key, index | {series}, None)
+
+    def add(self, name, series, amount):
+        self._index(name, series)
+        key, scaled = self._key(name, series), int(round(amount * SCALE))
+        try:
+            cache.incr(key, scaled)
+        except ValueError:
+            if not cache.add(key, scaled, None):
+                cache.incr(key, scaled)
+
+    def set(self, name, series, value):
+        self._index(name, series)
+        cache.set(self._key(name, series), int(round(value * SCALE)), None)
+
+    def collect(self, name):
+        index = cache.get(f"{CACHE_PREFIX}index:{name}") or set()
+        keys = {self._key(name, series): series for series in index}
+        values = cache.get_many(list(keys))
+        return {keys[key]: value / SCALE for key, value in values.items()}
+
+    def clear(self):
+        for metric in REGISTRY:
+            index = cache.get(f"{CACHE_PREFIX}index:{metric.name}") or set()
+            cache.delete_many([self._key(metric.name, series) for series in index])
+            cache.delete(f"{CACHE_PREFIX}index:{metric.name}")
+        with self._lock:
+            self._indexed.clear()
+
+
+def _multiproc_dir():
+    directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+    return Path(directory) if directory else None
+
+
+def _read_values(path):
+    """{(name, series): value} and {... gauges only} from one worker's file."""
+    values, gauges = {}, {}
+    with open(path, encoding='utf-8') as f:
+        for name, series, value, gauge in json.load(f)['values']:
+            key = (name, tuple(tuple(pair) for pair in series))
+            (gauges if gauge else values)[key] = value
+    return values, gauges
+
+
+def _write_values(path, values):
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    payload = {'values': [
+        [name, series, value, name in GAUGE_NAMES] for (name, series), value in values.items()
+    ]}
+    tmp.write_text(json.dumps(payload), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+class MultiprocessMetricStore:
+    """
+    Each thread adds into a dict of its own, so recording takes no lock;
+    reading sums the per-thread dicts (copying a dict is atomic under the
+    GIL). With METRICS_MULTIPROC_DIR set, a process writes its totals to
+    <dir>/<pid>.json at most every METRICS_FLUSH_SECONDS (flush_if_due(),
+    called after each request) and collect() adds every other worker's file
+    to this one's live totals. Counters of exited workers stay in their
+    files; their gauges (requests in flight) are dropped when the worker is
+    reaped (mark_process_dead(), gunicorn's child_exit hook).
+    """
+
+    def __init__(self):
+        self._reset()
+        self._files = {}
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.flush)
+
+    def _reset(self):
+        # a forked worker starts from zero rather than repeating the parent's counts
+        self._local = threading.local()
+        self._shards = []
+        self._gauges = {}
+        self._flushed = 0.0
+
+    def add(self, name, series, amount):
+        try:
+            shard = self._local.values
+        except AttributeError:
+            shard = self._local.values = {}
+            self._shards.append(shard)
+        key = (name, series)
+        shard[key] = shard.get(key, 0) + amount
+
+    def set(self, name, series, value):
+        self._gauges[(name, series)] = value
+
+    def snapshot(self):
+        totals = dict(self._gauges)
+        for shard in list(self._shards):
+            for key, value in dict(shard).items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def flush(self):
+        directory = _multiproc_dir()
+        if directory is None:
+            return
+        self._flushed = monotonic()
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_values(directory / f"{os.getpid()}.json", self.snapshot())
+
+    def flush_if_due(self):
+        if monotonic() - self._flushed >= getattr(settings, 'METRICS_FLUSH_SECONDS', 1.0):
+            self.flush()
+
+    def _other_workers(self):
+        directory = _multiproc_dir()
+        if directory is None or not directory.is_dir():
+            return []
+        own = f"{os.getpid()}.json"
+        found = []
+        for path in directory.glob('*.json'):
+            if path.name == own:
+                continue
+            try:
+                stat = path.stat()
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                cached = self._files.get(path)
+                if cached is None or cached[0] != stamp:
+                    cached = self._files[path] = (stamp, _read_values(path))
+            except (OSError, ValueError, KeyError):
+                continue  # mid-replace or removed; counted on the next scrape
+            found.append(cached[1])
+        return found
+
+    def collect(self, name):
+        totals = {series: value for (metric, series), value in self.snapshot().items() if metric == name}
+        for values, gauges in self._other_workers():
+            for part in (values, gauges):
+                for (metric, series), value in part.items():
+                    if metric == name:
+                        totals[series] = totals.get(series, 0) + value
+        return totals
+
+    def clear(self):
+        self._reset()
+        self._files.clear()
+
+
+def mark_process_dead(pid, directory=None):
+    """Drop an exited worker's gauges from its file; its counters keep counting toward the totals."""
+    path = Path(directory or _multiproc_dir()) / f"{pid}.json"
+    try:
+        values, _ = _read_values(path)
+    except (OSError, ValueError, KeyError):
+        return
+    _write_values(path, values)
+
+
+_stores = {'memory': MemoryMetricStore(), 'cache': CacheMetricStore(), 'multiprocess': MultiprocessMetricStore()}
+
+
+def get_store(name=None):
+    name = name or getattr(settings, 'METRICS_STORE', 'cache')
+    if name == 'cache':
+        shared_cache.require("Cache-backed metrics")
+    return _stores[name]
+
+
+# ---- statsd ------------------------------------------------------------------
+
+_statsd_socket = None
+
+
+def _statsd(name, value, kind, labels):
+    global _statsd_socket
+    address = getattr(settings, 'STATSD_ADDRESS', None)
+    if not address:
+        return
+    host, port = address.rsplit(':', 1)
+    tags = ','.join(f"{k}:{v}" for k, v in labels)
+    line = f"{name}:{value:g}|{kind}" + (f"|#{tags}" if tags else '')
+    try:
+        if _statsd_socket is None:
+            _statsd_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _statsd_socket.sendto(line.encode(), (host, int(port)))
+    except OSError:
+        pass  # metrics must never break the code being measured
+
+
+# ---- metric types --------------------------------------------------------------
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), store=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.store_name = store
+        REGISTRY.append(self)
+
+    @property
+    def store(self):
+        return get_store(self.store_name)
+
+    def _series(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def samples(self):
+        """[(suffix, series, value)] in exposition order."""
+        return [('', series, value) for series, value in sorted(self.store.collect(self.name).items())]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        series = self._series(labels)
+        self.store.add(self.name, series, amount)
+        _statsd(self.name, amount, 'c', series)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), store=None):
+        super().__init__(name, documentation, labelnames, store)
+        GAUGE_NAMES.add(name)
+
+    def set(self, value, **labels):
+        series = self._series(labels)
+        self.store.set(self.name, series, value)
+        _statsd(self.name, value, 'g', series)
+
+    def inc(self, amount=1, **labels):
+        self.store.add(self.name, self._series(labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, store=None):
+        super().__init__(name, documentation, labelnames, store)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        series = self._series(labels)
+        le = next(bound for bound in self.buckets if value <= bound)
+        store = self.store
+        store.add(self.name, series + (('le', _format(le)),), 1)
+        store.add(self.name + '_sum', series, value)
+        store.add(self.name + '_count', series, 1)
+        _statsd(self.name, value * 1000, 'ms', series)
+
+    @contextmanager
+    def time(self, **labels):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def samples(self):
+        store = self.store
+        raw = store.collect(self.name)
+        sums = store.collect(self.name + '_sum')
+        counts = store.collect(self.name + '_count')
+        out = []
+        for series in sorted(counts):
+            running = 0
+            for bound in self.buckets:
+                running += raw.get(series + (('le', _format(bound)),), 0)
+                out.append(('_bucket', series + (('le', _format(bound)),), running))
+            out.append(('_sum', series, sums.get(series, 0)))
+            out.append(('_count', series, counts[series]))
+        return out
+
+
+# ---- exposition ------------------------------------------------------------------
+
+def _format(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render(metrics=None):
+    """Prometheus text format (version 0.0.4) for `metrics` (default: all registered)."""
+    lines = []
+    for metric in metrics or REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for suffix, series, value in metric.samples():
+            labels = ','.join(f'{k}="{_escape(v)}"' for k, v in series)
+            lines.append(f"{metric.name}{suffix}{{{labels}}} {_format(value)}" if labels
+                         else f"{metric.name}{suffix} {_format(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def allowed(request):
+    """Scrapers authenticate with METRICS_TOKEN (Bearer) or come from METRICS_ALLOWED_IPS."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') == f"Bearer {token}":
+        return True
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
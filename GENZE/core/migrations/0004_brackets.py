@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_finals(apps, schema_editor):
+    # Championships used to be inferred with stage__icontains='final', which also
+    # matched semi/quarter finals; only flag the deciding match.
+    Match = apps.get_model('core', 'Match')
+    (Match.objects.filter(stage__icontains='final')
+     .exclude(stage__icontains='semi')
+     .exclude(stage__icontains='quarter')
+     .exclude(stage__icontains='upper')
+     .exclude(stage__icontains='lower')
+     .update(is_final=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_match_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='is_final',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='round_number',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TournamentStage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('format', models.CharField(choices=[('single_elimination', 'Single Elimination'), ('double_elimination', 'Double Elimination'), ('swiss', 'Swiss'), ('round_robin', 'Round Robin')], max_length=30)),
+                ('order', models.PositiveSmallIntegerField(default=1)),
+                ('total_rounds', models.PositiveSmallIntegerField(default=0)),
+                ('round_gap', models.DurationField(help_text='Time between consecutive rounds')),
+                ('starts_at', models.DateTimeField()),
+                ('bye_team_ids', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stages', to='core.tournament')),
+            ],
+            options={
+                'ordering': ['tournament', 'order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BracketNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bracket', models.CharField(choices=[('upper', 'Upper'), ('lower', 'Lower'), ('grand_final', 'Grand Final')], default='upper', max_length=12)),
+                ('round_number', models.PositiveSmallIntegerField()),
+                ('position', models.PositiveSmallIntegerField()),
+                ('label', models.CharField(max_length=100)),
+                ('scheduled_at', models.DateTimeField()),
+                ('is_final', models.BooleanField(default=False)),
+                ('team1_bye', models.BooleanField(default=False)),
+                ('team2_bye', models.BooleanField(default=False)),
+                ('winner_slot', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('loser_slot', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('loser_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.bracketnode')),
+                ('match', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bracket_node', to='core.match')),
+                ('team1', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.team')),
+                ('team2', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.team')),
+                ('winner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.team')),
+                ('winner_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.bracketnode')),
+                ('stage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nodes', to='core.tournamentstage')),
+            ],
+            options={
+                'ordering': ['stage', 'bracket', 'round_number', 'position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='tournament_stage',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='matches', to='core.tournamentstage'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament_stage', 'round_number'], name='match_stage_round_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tournamentstage',
+            unique_together={('tournament', 'order')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='bracketnode',
+            unique_together={('stage', 'bracket', 'round_number', 'position')},
+        ),
+        migrations.RunPython(mark_finals, migrations.RunPython.noop),
+    ]
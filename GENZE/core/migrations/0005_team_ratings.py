@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_brackets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='rated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='TeamRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(default=1500.0)),
+                ('matches_played', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('game', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='team_ratings', to='core.game')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='core.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game', '-rating'], name='teamrating_game_rating_idx')],
+                'unique_together': {('team', 'game')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_team_ratings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team1', 'match_time'], name='match_team1_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team2', 'match_time'], name='match_team2_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'match_time'], name='match_tournament_time_idx'),
+        ),
+    ]
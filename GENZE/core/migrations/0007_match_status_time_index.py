@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_match_schedule_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['status', 'match_time'], name='match_status_time_idx'),
+        ),
+    ]
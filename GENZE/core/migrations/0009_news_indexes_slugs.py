@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:20
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def fill_slugs(apps, schema_editor):
+    # news_detail is looked up by slug now; give every existing article one
+    NewsArticle = apps.get_model('core', 'NewsArticle')
+    taken = set(NewsArticle.objects.exclude(slug__isnull=True).exclude(slug='').values_list('slug', flat=True))
+    missing = list(NewsArticle.objects.filter(models.Q(slug__isnull=True) | models.Q(slug='')).only('id', 'title'))
+    for article in missing:
+        base = slugify(article.title)[:40] or 'news'
+        if base.isdigit():
+            base = f"news-{base}"
+        slug, n = base, 2
+        while slug in taken:
+            slug, n = f"{base}-{n}", n + 1
+        taken.add(slug)
+        article.slug = slug
+    NewsArticle.objects.bulk_update(missing, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_media_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_slugs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['featured', '-date'], name='news_featured_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['-date', '-id'], name='news_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_news_indexes_slugs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['sent', 'notify_minutes_before'], name='reminder_pending_idx'),
+        ),
+    ]
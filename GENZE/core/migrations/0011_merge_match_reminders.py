@@ -0,0 +1,89 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:05
+
+from django.db import migrations
+
+BATCH = 1000
+
+
+def _batches(model, fields):
+    # keyset over pk so each batch is an index range scan
+    last = 0
+    while True:
+        rows = list(model.objects.filter(pk__gt=last).order_by('pk').values('pk', *fields)[:BATCH])
+        if not rows:
+            return
+        last = rows[-1]['pk']
+        yield rows
+
+
+def merge_reminders(apps, schema_editor):
+    """
+    Fold MatchReminder into Reminder, one row per (match, lower-cased email,
+    notice). Where duplicates disagree, sent wins, so nobody is mailed again.
+    MatchReminder rows without an email were never deliverable and are dropped.
+    """
+    Reminder = apps.get_model('core', 'Reminder')
+    MatchReminder = apps.get_model('core', 'MatchReminder')
+    seen = {}  # (match_id, email, minutes) -> sent
+    kept = {}  # same key -> pk of the Reminder row that stays
+
+    def mark_sent(key):
+        if kept.get(key):
+            rows = Reminder.objects.filter(pk=kept[key])
+        else:  # bulk_create didn't hand back a pk on this backend
+            rows = Reminder.objects.filter(match_id=key[0], email=key[1], notify_minutes_before=key[2])
+        rows.update(sent=True)
+        seen[key] = True
+
+    # Existing Reminder duplicates: keep the first, normalise emails
+    for rows in _batches(Reminder, ('match_id', 'email', 'notify_minutes_before', 'sent')):
+        duplicates, renamed, now_sent = [], [], []
+        for row in rows:
+            email = (row['email'] or '').strip().lower()
+            key = (row['match_id'], email, row['notify_minutes_before'])
+            if key in seen:
+                duplicates.append(row['pk'])
+                if row['sent'] and not seen[key]:
+                    now_sent.append(kept[key])
+                    seen[key] = True
+                continue
+            seen[key], kept[key] = row['sent'], row['pk']
+            if email != row['email']:
+                renamed.append(Reminder(pk=row['pk'], email=email))
+        Reminder.objects.filter(pk__in=duplicates).delete()
+        Reminder.objects.bulk_update(renamed, ['email'])
+        Reminder.objects.filter(pk__in=now_sent).update(sent=True)
+
+    fields = ('match_id', 'user_id', 'email', 'phone', 'notify_minutes_before', 'created_at', 'sent')
+    for rows in _batches(MatchReminder, fields):
+        new = {}
+        for row in rows:
+            email = (row['email'] or '').strip().lower()
+            if not email:
+                continue
+            key = (row['match_id'], email, row['notify_minutes_before'])
+            if key in new:
+                new[key].sent = new[key].sent or row['sent']
+            elif key in seen:
+                if row['sent'] and not seen[key]:
+                    mark_sent(key)
+            else:
+                new[key] = Reminder(
+                    match_id=row['match_id'], user_id=row['user_id'], email=email, phone=row['phone'],
+                    notify_minutes_before=row['notify_minutes_before'], created_at=row['created_at'],
+                    sent=row['sent'],
+                )
+        Reminder.objects.bulk_create(new.values())
+        for key, reminder in new.items():
+            seen[key], kept[key] = reminder.sent, reminder.pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_reminder_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_reminders, migrations.RunPython.noop),
+    ]
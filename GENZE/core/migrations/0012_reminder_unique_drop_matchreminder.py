@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_merge_match_reminders'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.UniqueConstraint(fields=('match', 'email', 'notify_minutes_before'), name='reminder_unique_per_match'),
+        ),
+        migrations.DeleteModel(
+            name='MatchReminder',
+        ),
+    ]
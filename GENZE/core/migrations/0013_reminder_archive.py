@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_reminder_unique_drop_matchreminder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reminder_id', models.BigIntegerField(unique=True)),
+                ('match_id', models.BigIntegerField(db_index=True)),
+                ('match_time', models.DateTimeField()),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('notify_minutes_before', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('sent', models.BooleanField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:51
+
+from django.db import migrations, models
+from django.db.models import FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def copy_ratings(apps, schema_editor):
+    """Team.rating from TeamRating, as core.ratings.sync_team_ratings does it."""
+    Team = apps.get_model('core', 'Team')
+    TeamRating = apps.get_model('core', 'TeamRating')
+    ratings = TeamRating.objects.filter(team=OuterRef('pk'))
+    own = ratings.filter(game=OuterRef('game')).values('rating')[:1]
+    most_played = ratings.order_by('-matches_played', 'pk').values('rating')[:1]
+    Team.objects.update(rating=Coalesce(Subquery(own, output_field=FloatField()),
+                                        Subquery(most_played, output_field=FloatField()),
+                                        Value(1500.0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_reminder_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='rating',
+            field=models.FloatField(default=1500.0),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['-rating'], name='team_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['game', '-rating'], name='team_game_rating_idx'),
+        ),
+        migrations.RunPython(copy_ratings, migrations.RunPython.noop),
+    ]
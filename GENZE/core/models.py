@@ -1,10 +1,13 @@
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
+from django.urls import reverse
+from django.utils.text import slugify
 
 
 class Game(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -35,6 +38,7 @@ class Tournament(models.Model):
         default='Asia/Kolkata',  # sensible default for your region
         help_text="Timezone name (IANA format, e.g., 'Asia/Kolkata', 'America/New_York')", null = True
     )
+    updated_at = models.DateTimeField(auto_now=True)  # conditional GET validator
 
 
     def __str__(self):
@@ -72,7 +76,16 @@ class Team(models.Model):
     rank = models.PositiveIntegerField(blank=True, null=True)
     tag = models.CharField(max_length=10, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
-    
+    # Elo rating in its own game, copied from TeamRating by core.ratings so rankings sort on an indexed column
+    rating = models.FloatField(default=1500.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating'], name='team_rating_idx'),
+            models.Index(fields=['game', '-rating'], name='team_game_rating_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -86,6 +99,7 @@ class Player(models.Model):
     is_substitute = models.BooleanField(default=False)
     avatar = models.ImageField(upload_to='player_avatars/', blank=True, null=True)
     role = models.CharField(max_length=50, blank=True, null=True)  # retained for compatibility
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.team.name})"
@@ -119,18 +133,44 @@ class Match(models.Model):
     completed_at = models.DateTimeField(blank=True, null=True)            # when marked completed
     points_team1 = models.IntegerField(default=0)                         # admin-set points
     points_team2 = models.IntegerField(default=0)                         # admin-set points
+    updated_at = models.DateTimeField(auto_now=True)                      # bumped on every save
+    version = models.PositiveIntegerField(default=0)                      # optimistic lock for score edits (core.scoring)
+
+    # Structured bracket placement (core.brackets); `stage` above stays the display label
+    tournament_stage = models.ForeignKey('TournamentStage', on_delete=models.SET_NULL, null=True, blank=True, related_name='matches')
+    round_number = models.PositiveSmallIntegerField(blank=True, null=True)
+    is_final = models.BooleanField(default=False, db_index=True)         # championship-deciding match
+    rated = models.BooleanField(default=False)                           # result applied to TeamRating (core.ratings)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tournament_stage', 'round_number'], name='match_stage_round_idx'),
+            # per-team / per-day range scans for schedule conflict checks
+            models.Index(fields=['team1', 'match_time'], name='match_team1_time_idx'),
+            models.Index(fields=['team2', 'match_time'], name='match_team2_time_idx'),
+            models.Index(fields=['tournament', 'match_time'], name='match_tournament_time_idx'),
+            # status sweep: due upcoming / live rows only (core.match_status)
+            models.Index(fields=['status', 'match_time'], name='match_status_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tournament.title} — {self.team1.name} vs {self.team2.name}"
 
-class MatchReminder(models.Model):
-    match = models.ForeignKey('Match', on_delete=models.CASCADE, related_name='match_reminders')
-    email = models.EmailField(blank=True)
-    phone = models.CharField(max_length=20, blank=True)
-    notify_minutes_before = models.PositiveIntegerField(default=30)
-    created_at = models.DateTimeField(auto_now_add=True)
-    sent = models.BooleanField(default=False)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
+def normalize_email(email):
+    # Reminder uniqueness is per address, whatever case it was typed in
+    return (email or '').strip().lower()
+
+
+def unique_slug(title, queryset):
+    """slugify(title), suffixed -2, -3, ... until no row in `queryset` has it."""
+    base = slugify(title)[:40] or 'news'
+    if base.isdigit():
+        base = f"news-{base}"  # an all-digit slug would be routed as a pk
+    slug, n = base, 2
+    while queryset.filter(slug=slug).exists():
+        slug, n = f"{base}-{n}", n + 1
+    return slug
+
 
 class NewsArticle(models.Model):
     STATUS_CHOICES = [
@@ -147,20 +187,55 @@ class NewsArticle(models.Model):
     featured = models.BooleanField(default=False)
     image = models.ImageField(upload_to='news/', blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='update')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['featured', '-date'], name='news_featured_date_idx'),
+            models.Index(fields=['-date', '-id'], name='news_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(self.title, NewsArticle.objects.exclude(pk=self.pk))
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        if self.slug:
+            return reverse('news_detail_slug', args=[self.slug])
+        return reverse('news_detail', args=[self.pk])
     
 class Reminder(models.Model):
+    """
+    One email per (match, address, notice period); the only reminder store
+    (the old MatchReminder rows were merged in by migration 0011).
+    """
     match = models.ForeignKey('Match', on_delete=models.CASCADE, related_name='reminders')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     email = models.EmailField()
+    phone = models.CharField(max_length=20, blank=True)
     notify_minutes_before = models.PositiveIntegerField(default=30)
+    created_at = models.DateTimeField(default=timezone.now)
     sent = models.BooleanField(default=False)  # track if match-time email sent
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'email', 'notify_minutes_before'], name='reminder_unique_per_match'),
+        ]
+        indexes = [
+            models.Index(fields=['sent', 'notify_minutes_before'], name='reminder_pending_idx'),
+        ]
+
     def __str__(self):
         return f"Reminder for {self.match} to {self.email}"
 
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
+
 class TournamentParticipant(models.Model):
     """
     Stores a team's registration for a specific tournament.
@@ -177,3 +252,127 @@ class TournamentParticipant(models.Model):
 
     def __str__(self):
         return f"{self.team.name} in {self.tournament.title}"
+
+
+class TournamentStage(models.Model):
+    """
+    One phase of a tournament (e.g. Swiss groups, then a double-elimination
+    playoff). Generated by core.brackets from TournamentParticipant entries.
+    """
+    FORMAT_CHOICES = [
+        ('single_elimination', 'Single Elimination'),
+        ('double_elimination', 'Double Elimination'),
+        ('swiss', 'Swiss'),
+        ('round_robin', 'Round Robin'),
+    ]
+
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='stages')
+    name = models.CharField(max_length=100)
+    format = models.CharField(max_length=30, choices=FORMAT_CHOICES)
+    order = models.PositiveSmallIntegerField(default=1)
+    total_rounds = models.PositiveSmallIntegerField(default=0)
+    round_gap = models.DurationField(help_text="Time between consecutive rounds")
+    starts_at = models.DateTimeField()
+    bye_team_ids = models.JSONField(default=list, blank=True)  # Swiss: teams that already had a bye
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['tournament', 'order']
+        unique_together = ('tournament', 'order')
+
+    def __str__(self):
+        return f"{self.tournament.title} — {self.name}"
+
+
+class BracketNode(models.Model):
+    """
+    A slot pair in an elimination bracket. The Match is only created once both
+    teams are known; winner_to / loser_to say where the result flows.
+    """
+    BRACKET_CHOICES = [
+        ('upper', 'Upper'),
+        ('lower', 'Lower'),
+        ('grand_final', 'Grand Final'),
+    ]
+
+    stage = models.ForeignKey(TournamentStage, on_delete=models.CASCADE, related_name='nodes')
+    bracket = models.CharField(max_length=12, choices=BRACKET_CHOICES, default='upper')
+    round_number = models.PositiveSmallIntegerField()
+    position = models.PositiveSmallIntegerField()
+    label = models.CharField(max_length=100)
+    scheduled_at = models.DateTimeField()
+    is_final = models.BooleanField(default=False)
+
+    team1 = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    team2 = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    team1_bye = models.BooleanField(default=False)  # slot will never be filled
+    team2_bye = models.BooleanField(default=False)
+    winner = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    winner_to = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    winner_slot = models.PositiveSmallIntegerField(null=True, blank=True)
+    loser_to = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    loser_slot = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    match = models.OneToOneField(Match, on_delete=models.SET_NULL, null=True, blank=True, related_name='bracket_node')
+
+    class Meta:
+        ordering = ['stage', 'bracket', 'round_number', 'position']
+        unique_together = ('stage', 'bracket', 'round_number', 'position')
+
+    def __str__(self):
+        return f"{self.stage} — {self.label} #{self.position + 1}"
+
+
+class TeamRating(models.Model):
+    """Elo rating of a team in one game, updated as matches complete (core.ratings)."""
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='ratings')
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, null=True, blank=True, related_name='team_ratings')
+    rating = models.FloatField(default=1500.0)
+    matches_played = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('team', 'game')
+        indexes = [
+            models.Index(fields=['game', '-rating'], name='teamrating_game_rating_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.team.name}: {self.rating:.0f}"
+
+
+class MediaBlob(models.Model):
+    """
+    One stored file in content-addressed media storage (core.storage), keyed by
+    its SHA-256. `refcount` is how many saves currently point at it; the file
+    is deleted when the last reference is released.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+class ReminderArchive(models.Model):
+    """
+    Sent or expired reminders moved out of Reminder by core.retention. Plain
+    ids rather than foreign keys, so archived rows outlive their match/user.
+    """
+    reminder_id = models.BigIntegerField(unique=True)
+    match_id = models.BigIntegerField(db_index=True)
+    match_time = models.DateTimeField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    email = models.EmailField()
+    phone = models.CharField(max_length=20, blank=True)
+    notify_minutes_before = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+    sent = models.BooleanField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Archived reminder {self.reminder_id} to {self.email}"
@@ -0,0 +1,104 @@
+# core/news.py
+"""
+News listings without the article bodies.
+
+Everything here reads LIST_FIELDS only; NewsArticle.content is loaded by
+the detail page alone. The home page's hero slot and the six articles after
+it come from one query and are cached, as are the RSS/Atom feed bodies;
+both carry a version that a NewsArticle save/delete bumps after commit
+(core.signals).
+
+The news index pages by keyset on (date, id) -- ?before=<date>.<id> -- so
+page N costs the same as page 1 and there's no COUNT.
+"""
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import NewsArticle
+from .request_metrics import cache_lookup
+
+CACHE_PREFIX = 'news:'
+CACHE_TIMEOUT = 60 * 60
+LIST_FIELDS = ('id', 'slug', 'title', 'date', 'summary', 'image', 'status', 'featured', 'updated_at')
+FRONT_PAGE_SIZE = 6
+PAGE_SIZE = 9
+FEED_SIZE = 20
+
+
+def listed():
+    return NewsArticle.objects.only(*LIST_FIELDS)
+
+
+def _version():
+    # same scheme as calendar_grid: a lost version key just starts a fresh one
+    version = cache.get(f"{CACHE_PREFIX}v")
+    if version is None:
+        version = time.time_ns()
+        cache.add(f"{CACHE_PREFIX}v", version, None)
+        version = cache.get(f"{CACHE_PREFIX}v", version)
+    return version
+
+
+def invalidate():
+    cache.set(f"{CACHE_PREFIX}v", time.time_ns(), None)
+
+
+def cached(name, build):
+    key = f"{CACHE_PREFIX}{name}:{_version()}"
+    value = cache_lookup('news', cache.get(key))
+    if value is None:
+        value = build()
+        cache.set(key, value, CACHE_TIMEOUT)
+    return value
+
+
+def build_front_page():
+    """
+    (hero, next six) in one query. The hero is the newest featured article,
+    else the newest one; both lookups are index seeks on (featured, -date) / (-date).
+    """
+    newest = NewsArticle.objects.order_by('-date', '-id').values('pk')
+    hero = Coalesce(Subquery(newest.filter(featured=True)[:1]), Subquery(newest[:1]))
+    rows = list(
+        listed()
+        .annotate(is_hero=Case(When(pk=hero, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        .filter(Q(is_hero=1) | Q(pk__in=Subquery(newest[:FRONT_PAGE_SIZE + 1])))
+        .order_by('-is_hero', '-date', '-id')
+    )
+    if not rows:
+        return None, []
+    return rows[0], rows[1:FRONT_PAGE_SIZE + 1]
+
+
+def front_page():
+    return cached('front', build_front_page)
+
+
+def parse_cursor(value):
+    """'2025-01-31.42' -> (date, id), or None if absent/malformed."""
+    try:
+        day, pk = value.split('.')
+        return date.fromisoformat(day), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def page(before=None, size=PAGE_SIZE):
+    """Articles older than the `before` cursor; returns (articles, next cursor or None)."""
+    qs = listed().order_by('-date', '-id')
+    if before:
+        day, pk = before
+        qs = qs.filter(Q(date__lt=day) | Q(date=day, id__lt=pk))
+    articles = list(qs[:size + 1])
+    more = len(articles) > size
+    articles = articles[:size]
+    cursor = f"{articles[-1].date.isoformat()}.{articles[-1].pk}" if more else None
+    return articles, cursor
+
+
+def feed_items():
+    return list(listed().order_by('-date', '-id')[:FEED_SIZE])
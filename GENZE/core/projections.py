@@ -0,0 +1,71 @@
+# core/projections.py
+"""
+Column projections for the match listings.
+
+Each builder returns a select_related() queryset restricted with only() to
+the columns its partial renders, so listing rows don't drag Team.description,
+banners, tournament formats etc. over the wire. Templates keep the model
+interface (match.team1.logo.url, {{ match.game }}), but touching a column
+outside the projection costs one query per row -- core/tests.py renders
+every partial against these builders with zero queries allowed.
+"""
+from django.db.models import Q
+
+from .models import Match
+
+_TEAMS = (
+    'team1__id', 'team1__name', 'team1__logo',
+    'team2__id', 'team2__name', 'team2__logo',
+)
+_BASE = ('id', 'status', 'match_time', 'team1_score', 'team2_score', 'stage', 'game__name') + _TEAMS
+
+# partials/schedule_list.html and partials/upcoming_sidebar.html
+SCHEDULE_FIELDS = _BASE + (
+    'tournament__title', 'viewer_count', 'viewer_label', 'youtube_live_url', 'youtube_recap_url',
+)
+
+# partials/live_matches.html
+LIVE_FIELDS = _BASE + (
+    'tournament__title', 'tournament__teams', 'current_round', 'live_started_at', 'youtube_live_url',
+)
+
+# partials/recent_results.html
+RESULT_FIELDS = _BASE + (
+    'tournament__title', 'tournament__teams', 'total_rounds', 'points_team1', 'points_team2',
+    'live_started_at', 'completed_at', 'youtube_recap_url',
+)
+
+# partials/tournament_brackets.html (the tournament itself is rendered from its own row)
+BRACKET_FIELDS = _BASE + (
+    'tournament_id', 'points_team1', 'points_team2', 'live_started_at', 'completed_at',
+    'youtube_live_url', 'youtube_recap_url',
+)
+
+
+def _project(fields, qs=None):
+    qs = qs if qs is not None else Match.objects.all()
+    related = {f.rsplit('__', 1)[0] for f in fields if '__' in f}
+    return qs.select_related(*sorted(related)).only(*fields)
+
+
+def schedule_matches(qs=None):
+    return _project(SCHEDULE_FIELDS, qs)
+
+
+def live_matches(qs=None):
+    return _project(LIVE_FIELDS, qs if qs is not None else Match.objects.filter(status='live'))
+
+
+def recent_results(qs=None):
+    return _project(RESULT_FIELDS, qs if qs is not None else Match.objects.filter(status='completed'))
+
+
+def bracket_matches(qs=None):
+    return _project(BRACKET_FIELDS, qs)
+
+
+def for_game(qs, game_name):
+    """Matches of a game by name, falling back to the tournament's game for matches without one."""
+    return qs.filter(
+        Q(game__name__iexact=game_name) | Q(game__isnull=True, tournament__game__name__iexact=game_name)
+    )
@@ -0,0 +1,150 @@
+# core/ratelimit.py
+"""
+Token-bucket rate limiting for the public write endpoints.
+
+Each scope (settings.RATE_LIMITS) lists a rate per key kind -- 'ip',
+'email', 'session' -- as "N/period" (period s, m, h or d): a bucket holds
+up to N tokens and refills N per period, so bursts up to N are fine and
+sustained traffic is capped at the rate. A POST takes one token from every
+bucket that applies to it and is rejected with 429 if any of them is empty.
+
+Stores (settings.RATE_LIMIT_STORE):
+  MemoryBucketStore - per-process LRU; single-worker deployments and tests.
+  CacheBucketStore  - the default cache, shared by workers only when that is
+                      Redis (core.shared_cache); get_store() refuses it on a
+                      per-process cache when SHARED_CACHE_REQUIRED. Read-
+                      modify-write without a lock: concurrent requests on the
+                      same key can both spend the last token, which only
+                      lets a handful of extra writes through.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+from . import shared_cache
+
+CACHE_PREFIX = 'ratelimit:'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (capacity 10, refill 10/60 tokens per second)."""
+    count, period = rate.split('/')
+    seconds = PERIODS[period[-1]] * int(period[:-1] or 1)
+    return int(count), int(count) / seconds
+
+
+def take(state, capacity, refill, now, cost=1):
+    """Refill `state` ((tokens, timestamp) or None) and spend `cost`. Returns (allowed, new state, retry after)."""
+    tokens, last = state if state else (capacity, now)
+    tokens = min(capacity, tokens + (now - last) * refill)
+    if tokens >= cost:
+        return True, (tokens - cost, now), 0
+    return False, (tokens, now), (cost - tokens) / refill
+
+
+class MemoryBucketStore:
+    def __init__(self, max_keys=10000):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def consume(self, key, capacity, refill, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            allowed, state, retry_after = take(self._buckets.get(key), capacity, refill, now, cost)
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    def consume(self, key, capacity, refill, cost=1):
+        now = time.time()
+        allowed, state, retry_after = take(cache.get(CACHE_PREFIX + key), capacity, refill, now, cost)
+        # an untouched bucket is full again after capacity / refill seconds; let the key expire then
+        cache.set(CACHE_PREFIX + key, state, int(capacity / refill) + 1)
+        return allowed, retry_after
+
+
+_stores = {'memory': MemoryBucketStore(), 'cache': CacheBucketStore()}
+
+
+def get_store():
+    name = getattr(settings, 'RATE_LIMIT_STORE', 'cache')
+    if name == 'cache':
+        shared_cache.require("Rate limits")
+    return _stores[name]
+
+
+def client_ip(request):
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', None)  # e.g. 'HTTP_X_FORWARDED_FOR' behind a proxy
+    if header and request.META.get(header):
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_keys(request, email_field=None):
+    """{kind: identity} for the key kinds this request can be attributed to."""
+    keys = {'ip': client_ip(request)}
+    email = request.POST.get(email_field) if email_field else None
+    if not email and email_field and request.user.is_authenticated:
+        email = request.user.email
+    if email:
+        keys['email'] = email.strip().lower()
+    if request.session.session_key:
+        keys['session'] = request.session.session_key
+    return keys
+
+
+def check(scope, request, email_field=None, cost=1):
+    """Spend tokens for `request` in `scope`. Returns seconds to wait, or 0 if allowed."""
+    rates = getattr(settings, 'RATE_LIMITS', {}).get(scope)
+    if not rates:
+        return 0
+    store = get_store()
+    wait = 0
+    for kind, identity in request_keys(request, email_field).items():
+        if kind not in rates or not identity:
+            continue
+        capacity, refill = parse_rate(rates[kind])
+        digest = hashlib.sha1(identity.encode()).hexdigest()[:20]
+        allowed, retry_after = store.consume(f"{scope}:{kind}:{digest}", capacity, refill, cost)
+        if not allowed:
+            wait = max(wait, retry_after)
+    return wait
+
+
+def rate_limited(scope, email_field=None, json=False):
+    """
+    View decorator: apply the `scope` limits to POSTs. Rejected requests get
+    429 with Retry-After (JSON body for the AJAX endpoints).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = check(scope, request, email_field)
+                if wait:
+                    message = "Too many requests, please try again later."
+                    if json:
+                        response = JsonResponse({"ok": False, "error": message}, status=429)
+                    else:
+                        response = HttpResponse(message, status=429, content_type='text/plain')
+                    response['Retry-After'] = str(int(wait) + 1)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,183 @@
+# core/ratings.py
+"""
+Elo ratings per team per game.
+
+Incremental: apply_match() runs from the Match post_save signal when a match
+completes with a decisive or drawn score, updating the two TeamRating rows.
+Each match is applied at most once (Match.rated is claimed with a
+conditional UPDATE before the ratings are touched).
+
+Full replay: replay() walks every completed match in match_time order from
+a server-side iterator, so memory is bounded by the number of teams, not
+matches. Ratings live in flat lists indexed by a small integer per
+(team, game) and the table is rewritten in one transaction at the end.
+
+The replay is one sequential pass, not vectorized batches: each Elo step
+reads the ratings the previous matches of both teams produced, so matches
+can only be batched when no team repeats within the batch, and scoring such
+batches in a vector library would add a dependency (numpy isn't used
+anywhere here) to save the arithmetic -- a few float operations per match,
+which is already far cheaper than reading the match rows. The batched part
+is the write: one bulk_create for the whole table.
+
+Team.rating holds a copy of each team's rating in its own game (see
+sync_team_ratings) so the rankings sort on an indexed column instead of
+looking TeamRating up per row.
+
+Corrections: a rated match whose result changes can't be patched
+incrementally (every later match of both teams was scored against the old
+ratings), so replay_later() queues a full replay after commit.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Match, Team, TeamRating
+
+logger = logging.getLogger(__name__)
+
+BASE_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+def expected_score(rating_a, rating_b):
+    return 1.0 / (1.0 + 10 ** ((rating_b - rating_a) / 400.0))
+
+
+def match_result(team1_score, team2_score):
+    """1 / 0.5 / 0 from team1's point of view."""
+    if team1_score > team2_score:
+        return 1.0
+    if team1_score < team2_score:
+        return 0.0
+    return 0.5
+
+
+def elo_delta(rating1, rating2, result, k=K_FACTOR):
+    """Rating change for team1 (team2 gets the negative)."""
+    return k * (result - expected_score(rating1, rating2))
+
+
+# Match fields the rating is computed from
+RESULT_FIELDS = ('status', 'team1_score', 'team2_score')
+
+
+def ratable():
+    return Match.objects.filter(status='completed', team1_score__isnull=False, team2_score__isnull=False)
+
+
+def _game_id(match):
+    return match.game_id or match.tournament.game_id
+
+
+def apply_match(match):
+    """Apply one completed match to the ratings. Returns team1's delta, or None if skipped."""
+    if match.status != 'completed' or match.team1_score is None or match.team2_score is None:
+        return None
+    with transaction.atomic():
+        # claim the match; a concurrent save or a second signal finds rated=True and stops
+        if not Match.objects.filter(pk=match.pk, rated=False).update(rated=True):
+            return None
+        match.rated = True
+        game_id = _game_id(match)
+        r1, _ = TeamRating.objects.select_for_update().get_or_create(team_id=match.team1_id, game_id=game_id)
+        r2, _ = TeamRating.objects.select_for_update().get_or_create(team_id=match.team2_id, game_id=game_id)
+        delta = elo_delta(r1.rating, r2.rating, match_result(match.team1_score, match.team2_score))
+        r1.rating += delta
+        r2.rating -= delta
+        r1.matches_played += 1
+        r2.matches_played += 1
+        r1.save(update_fields=['rating', 'matches_played', 'updated_at'])
+        r2.save(update_fields=['rating', 'matches_played', 'updated_at'])
+        sync_team_ratings([match.team1_id, match.team2_id])
+    return delta
+
+
+def sync_team_ratings(team_ids=None):
+    """
+    Copy TeamRating into Team.rating: the rating in the team's own game
+    (Team.game); without one there, in the game it has played most; 1500 if
+    unrated. `team_ids=None` syncs every team. Returns the rows updated.
+    """
+    ratings = TeamRating.objects.filter(team=OuterRef('pk'))
+    own = ratings.filter(game=OuterRef('game')).values('rating')[:1]
+    most_played = ratings.order_by('-matches_played', 'pk').values('rating')[:1]
+    teams = Team.objects.all() if team_ids is None else Team.objects.filter(pk__in=team_ids)
+    return teams.update(rating=Coalesce(Subquery(own, output_field=FloatField()),
+                                        Subquery(most_played, output_field=FloatField()),
+                                        Value(BASE_RATING)))
+
+
+def result_changed(before, match):
+    """True if `match` was rated as of `before` ({field: value} read before the write) and its result differs."""
+    return bool(before and before.get('rated')) and any(
+        before.get(field) != getattr(match, field) for field in RESULT_FIELDS if field in before
+    )
+
+
+def _enqueue_replay():
+    from .tasks import replay_ratings_task
+    try:
+        replay_ratings_task.delay()
+    except Exception as e:
+        # Broker down: ratings stay as they were until recompute_ratings is run
+        logger.warning("Could not queue a rating replay, run recompute_ratings: %s", e)
+
+
+def replay_later():
+    """Queue a full replay once the current transaction commits (the replay must read the corrected row)."""
+    transaction.on_commit(_enqueue_replay)
+
+
+def replay(chunk_size=5000, progress=None):
+    """
+    Recompute all ratings from scratch in match_time order.
+    Returns (matches replayed, ratings written).
+    """
+    index = {}        # (team_id, game_id) -> slot
+    ratings = []      # slot -> rating
+    played = []       # slot -> matches played
+
+    def slot(key):
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(ratings)
+            ratings.append(BASE_RATING)
+            played.append(0)
+        return i
+
+    rows = (
+        ratable().order_by('match_time', 'id')
+        .values_list('team1_id', 'team2_id', 'team1_score', 'team2_score', 'game_id', 'tournament__game_id')
+        .iterator(chunk_size=chunk_size)
+    )
+    count = 0
+    for team1_id, team2_id, score1, score2, game_id, tournament_game_id in rows:
+        game_id = game_id or tournament_game_id
+        a = slot((team1_id, game_id))
+        b = slot((team2_id, game_id))
+        delta = elo_delta(ratings[a], ratings[b], match_result(score1, score2))
+        ratings[a] += delta
+        ratings[b] -= delta
+        played[a] += 1
+        played[b] += 1
+        count += 1
+        if progress and count % chunk_size == 0:
+            progress(count)
+
+    objs = [
+        TeamRating(team_id=team_id, game_id=game_id, rating=ratings[i], matches_played=played[i])
+        for (team_id, game_id), i in index.items()
+    ]
+    with transaction.atomic():
+        # Replace the table wholesale: an upsert on (team, game) can't match rows whose game is NULL
+        TeamRating.objects.all().delete()
+        TeamRating.objects.bulk_create(objs, batch_size=1000)
+        ratable().filter(rated=False).update(rated=True)
+        Match.objects.filter(rated=True).exclude(
+            Q(status='completed') & Q(team1_score__isnull=False) & Q(team2_score__isnull=False)
+        ).update(rated=False)
+        sync_team_ratings()
+    return count, len(objs)
@@ -0,0 +1,93 @@
+# core/reminders.py
+"""
+Reminder delivery, shared by the management commands and the Celery task
+so neither goes through call_command.
+
+There is one store (Reminder, unique per match/email/notice period) and one
+dispatcher, send_due(): it asks the database only for rows that are due --
+one OR'd match_time bound per distinct notice period -- and claims each row
+(sent=False -> True) before mailing it, so two dispatchers running at once
+can't both send it. A failed send releases the claim for the next pass.
+
+Each send_mail is timed into the genze_smtp_send_seconds histogram
+(core.task_metrics).
+
+`report(kind, text)` callbacks receive 'success' / 'error' lines; commands
+pass one that styles them for stdout, the task passes none.
+"""
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+from time import perf_counter
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Reminder
+from .task_metrics import SMTP_SECONDS
+
+
+# A reminder for a match that is already over can't fire any more: it is left
+# for core.retention to archive, not mailed (e.g. unsent rows carried over
+# from MatchReminder by migration 0011).
+PENDING_STATUSES = ('upcoming', 'live')
+
+
+def due(now=None):
+    """Unsent reminders whose match hasn't finished and starts within their notice period."""
+    now = now or timezone.now()
+    pending = Reminder.objects.filter(sent=False, match__status__in=PENDING_STATUSES)
+    periods = pending.order_by().values_list('notify_minutes_before', flat=True).distinct()
+    bounds = [Q(notify_minutes_before=minutes, match__match_time__lte=now + timedelta(minutes=minutes))
+              for minutes in periods]
+    if not bounds:
+        return Reminder.objects.none()
+    return (pending.filter(reduce(or_, bounds))
+            .select_related('match', 'match__tournament', 'match__team1', 'match__team2'))
+
+
+def message_for(match):
+    body = (
+        f"Hello,\n\n"
+        f"This is your reminder for the upcoming match:\n"
+        f"Tournament: {match.tournament.title}\n"
+        f"Stage: {match.stage or '—'}\n"
+        f"Match Time: {match.match_time.strftime('%b %d, %Y %I:%M %p')}\n\n"
+    )
+    if match.status == 'completed' and match.youtube_recap_url:
+        body += f"View Recap: {match.youtube_recap_url}\n\n"
+    else:
+        body += f"Watch Live: {match.youtube_live_url or 'Link will be available when live'}\n\n"
+    return body + "GENZE ESPORTS"
+
+
+def send_due(now=None, report=None):
+    """Email every due reminder once. Returns (sent, failed)."""
+    sent = failed = 0
+    for reminder in due(now):
+        # claim first: a concurrent dispatcher that already took it updates 0 rows
+        if not Reminder.objects.filter(pk=reminder.pk, sent=False).update(sent=True):
+            continue
+        match = reminder.match
+        start = perf_counter()
+        try:
+            send_mail(
+                subject=f"Upcoming Match: {match.team1.name} vs {match.team2.name}",
+                message=message_for(match),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[reminder.email],
+                fail_silently=False,
+            )
+            SMTP_SECONDS.observe(perf_counter() - start, outcome='sent')
+            sent += 1
+            if report:
+                report('success', f"[REMINDER SENT] {reminder.email} for {match}")
+        except Exception as e:
+            SMTP_SECONDS.observe(perf_counter() - start, outcome='failed')
+            Reminder.objects.filter(pk=reminder.pk).update(sent=False)
+            failed += 1
+            if report:
+                report('error', f"[REMINDER FAILED] {reminder.email} for {match} — {e}")
+    return sent, failed
@@ -0,0 +1,85 @@
+# core/request_metrics.py
+"""
+Web-tier metrics, served with the task metrics at /metrics.
+
+RequestMetricsMiddleware records, per route pattern (not per URL, so
+/teams/1/ and /teams/2/ are one series):
+
+  genze_http_requests_total{route,method,status}
+  genze_http_request_duration_seconds{route,method}
+  genze_http_request_db_queries{route}         queries per request, all aliases
+  genze_http_requests_in_flight
+
+cache_lookup() counts hits and misses of the app's own caches (news, month
+grid, calendar feeds, rendered partials) in genze_cache_lookups_total; hit
+ratio = hit / (hit + miss).
+
+These are recorded on every request, so they use the lock-free
+'multiprocess' store; see core.metrics for how gunicorn workers share it.
+"""
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.db import connections
+
+from .metrics import Counter, Gauge, Histogram, get_store
+
+STORE = 'multiprocess'
+UNMATCHED = '<unmatched>'
+
+REQUESTS = Counter('genze_http_requests_total', 'Requests by route, method and status.',
+                   ['route', 'method', 'status'], store=STORE)
+LATENCY = Histogram('genze_http_request_duration_seconds', 'Request latency by route.', ['route', 'method'],
+                    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10), store=STORE)
+QUERIES = Histogram('genze_http_request_db_queries', 'Database queries per request.', ['route'],
+                    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200), store=STORE)
+IN_FLIGHT = Gauge('genze_http_requests_in_flight', 'Requests being served.', store=STORE)
+CACHE_LOOKUPS = Counter('genze_cache_lookups_total', 'Lookups in the app caches by result.',
+                        ['cache', 'result'], store=STORE)
+
+
+def cache_lookup(name, value):
+    """Count a lookup in cache `name` as a hit unless `value` is None; returns `value`."""
+    CACHE_LOOKUPS.inc(cache=name, result='miss' if value is None else 'hit')
+    return value
+
+
+def route_of(request):
+    match = getattr(request, 'resolver_match', None)
+    return UNMATCHED if match is None else '/' + match.route
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.store = get_store(STORE)
+
+    def __call__(self, request):
+        queries = _QueryCounter()
+        IN_FLIGHT.inc()
+        start = perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(queries))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = perf_counter() - start
+            IN_FLIGHT.dec()
+            route, method = route_of(request), request.method
+            REQUESTS.inc(route=route, method=method, status=status)
+            LATENCY.observe(elapsed, route=route, method=method)
+            QUERIES.observe(queries.count, route=route)
+            self.store.flush_if_due()
@@ -0,0 +1,144 @@
+# core/retention.py
+"""
+Reminder retention.
+
+A reminder has done its job once its match is over: it was either sent or
+can no longer be. archive_reminders() moves every Reminder whose match
+started more than REMINDER_RETENTION ago out of the hot table, so the
+table the dispatcher scans stays small (the dispatcher itself skips
+reminders of finished matches until then, core.reminders.due).
+
+Rows move in bounded batches walked by primary key (keyset, no OFFSET);
+each batch is one short transaction -- copy, then DELETE ... WHERE id IN
+(batch) -- and the job pauses between batches, so on SQLite the write lock
+is held for one batch at a time and web requests get in between.
+
+Sinks (settings.REMINDER_ARCHIVE):
+  TableSink - ReminderArchive rows, written in the same transaction as the delete.
+  JsonlSink - gzipped JSON lines per month under REMINDER_ARCHIVE_DIR; each
+              batch is appended (a new gzip member) before its rows are deleted.
+
+Each run's metrics (rows archived, batches, seconds) are returned, logged
+and kept in the cache with running totals for the metrics endpoint.
+"""
+import gzip
+import json
+import logging
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Reminder, ReminderArchive
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = 'retention:reminders'
+FIELDS = ('id', 'match_id', 'match__match_time', 'user_id', 'email', 'phone',
+          'notify_minutes_before', 'created_at', 'sent')
+
+
+class TableSink:
+    atomic = True  # written inside the delete's transaction
+
+    def write(self, rows, archived_at):
+        ReminderArchive.objects.bulk_create(
+            [
+                ReminderArchive(
+                    reminder_id=row['id'], match_id=row['match_id'], match_time=row['match__match_time'],
+                    user_id=row['user_id'], email=row['email'], phone=row['phone'],
+                    notify_minutes_before=row['notify_minutes_before'], created_at=row['created_at'],
+                    sent=row['sent'], archived_at=archived_at,
+                )
+                for row in rows
+            ],
+            ignore_conflicts=True,  # a batch retried after a crash between copy and delete
+        )
+
+
+class JsonlSink:
+    atomic = False  # a file can't roll back; write it first, then delete
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or getattr(settings, 'REMINDER_ARCHIVE_DIR',
+                                                   Path(settings.BASE_DIR) / 'archive'))
+
+    def write(self, rows, archived_at):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"reminders-{archived_at:%Y-%m}.jsonl.gz"
+        with gzip.open(path, 'at', encoding='utf-8') as archive:
+            for row in rows:
+                record = dict(row, match_time=row['match__match_time'], archived_at=archived_at)
+                del record['match__match_time']
+                archive.write(json.dumps(record, default=str) + '\n')
+
+
+SINKS = {'table': TableSink, 'jsonl': JsonlSink}
+
+
+def get_sink(name=None):
+    return SINKS[name or getattr(settings, 'REMINDER_ARCHIVE', 'table')]()
+
+
+def retention():
+    return getattr(settings, 'REMINDER_RETENTION', timedelta(days=2))
+
+
+def _record(stats):
+    totals = cache.get(METRICS_KEY) or {'runs': 0, 'archived': 0, 'seconds': 0.0}
+    totals = {
+        'runs': totals['runs'] + 1,
+        'archived': totals['archived'] + stats['archived'],
+        'seconds': totals['seconds'] + stats['seconds'],
+        'last': stats,
+    }
+    cache.set(METRICS_KEY, totals, None)
+
+
+def metrics():
+    """Running totals and the last run's stats, or None if the job hasn't run."""
+    return cache.get(METRICS_KEY)
+
+
+def archive_reminders(now=None, window=None, batch_size=None, pause=None, max_batches=None, sink=None):
+    """
+    Move reminders of matches older than the retention window to the archive.
+    Returns {'archived', 'batches', 'seconds', 'cutoff'}.
+    """
+    started = time.monotonic()
+    now = now or timezone.now()
+    cutoff = now - (window or retention())
+    batch_size = batch_size or getattr(settings, 'REMINDER_ARCHIVE_BATCH', 500)
+    pause = getattr(settings, 'REMINDER_ARCHIVE_PAUSE', 0.05) if pause is None else pause
+    sink = sink or get_sink()
+
+    eligible = Reminder.objects.filter(match__match_time__lt=cutoff).order_by('pk')
+    archived = batches = 0
+    last_pk = 0
+    while max_batches is None or batches < max_batches:
+        rows = list(eligible.filter(pk__gt=last_pk).values(*FIELDS)[:batch_size])
+        if not rows:
+            break
+        last_pk = rows[-1]['id']
+        ids = [row['id'] for row in rows]
+        if not sink.atomic:
+            sink.write(rows, now)
+        with transaction.atomic():
+            if sink.atomic:
+                sink.write(rows, now)
+            archived += Reminder.objects.filter(pk__in=ids).delete()[0]
+        batches += 1
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    stats = {'archived': archived, 'batches': batches, 'seconds': round(time.monotonic() - started, 3),
+             'cutoff': cutoff.isoformat()}
+    _record(stats)
+    logger.info("Archived %(archived)d reminders in %(batches)d batches (%(seconds).3fs)", stats)
+    return stats
@@ -0,0 +1,102 @@
+# core/rosters.py
+"""
+Read-only team/roster JSON for front-end widgets (/api/teams/, /api/teams/<id>/).
+
+A page is two queries whatever its size: the teams, projected to
+TEAM_FIELDS with their game name joined in, and the players of exactly
+those teams projected to PLAYER_FIELDS (no email or Discord handle -- those
+never leave the admin). Both are read as values() rows: building model
+instances, and a related manager per team, was most of the time at 10k
+teams. Pages are keyed by team id -- ?after=<id> -- so there's no
+OFFSET or COUNT, and the next cursor comes from the page itself.
+teams_page and team_detail prefetch rosters through the same roster().
+
+`manage.py bench_team_api` times this against full-model serialization at
+10k teams.
+"""
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+
+from .models import Player, Team
+
+TEAM_FIELDS = ('id', 'name', 'tag', 'region', 'rank', 'logo', 'status_indicator', 'game__name')
+DETAIL_FIELDS = TEAM_FIELDS + ('founded', 'banner', 'description')
+PLAYER_FIELDS = ('id', 'team_id', 'name', 'role', 'is_substitute', 'avatar')
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def roster():
+    """Prefetch for pages rendering Team instances (teams_page, team_detail)."""
+    return Prefetch('players', queryset=Player.objects.only(*PLAYER_FIELDS).order_by('id'))
+
+
+def _url(name):
+    return default_storage.url(name) if name else None
+
+
+def player_json(row):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'role': row['role'] or '',
+        'substitute': row['is_substitute'],
+        'avatar': _url(row['avatar']),
+    }
+
+
+def team_json(row, players=None):
+    data = {
+        'id': row['id'],
+        'name': row['name'],
+        'tag': row['tag'] or '',
+        'game': row['game__name'],
+        'region': row['region'] or '',
+        'rank': row['rank'],
+        'status': row['status_indicator'],
+        'logo': _url(row['logo']),
+    }
+    if 'description' in row:
+        data.update(founded=row['founded'], banner=_url(row['banner']), description=row['description'] or '')
+    if players is not None:
+        data['players'] = [player_json(player) for player in players]
+    return data
+
+
+def rosters_for(team_ids):
+    """{team_id: [player rows]} in one query -- the API's prefetch, without model instances."""
+    by_team = defaultdict(list)
+    for row in Player.objects.filter(team_id__in=team_ids).order_by('team_id', 'id').values(*PLAYER_FIELDS):
+        by_team[row['team_id']].append(row)
+    return by_team
+
+
+def parse_after(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def page(after=0, size=PAGE_SIZE, game=None, players=True):
+    """Teams with id > `after`; returns (serialized teams, next cursor or None)."""
+    size = max(1, min(size, MAX_PAGE_SIZE))
+    qs = Team.objects.filter(pk__gt=after).order_by('pk')
+    if game:
+        qs = qs.filter(game__name__iexact=game)
+    rows = list(qs.values(*TEAM_FIELDS)[:size + 1])
+    more = len(rows) > size
+    rows = rows[:size]
+    # after the slice, so the lookahead row's roster isn't fetched
+    by_team = rosters_for([row['id'] for row in rows]) if players else None
+    results = [team_json(row, by_team[row['id']] if players else None) for row in rows]
+    return results, (rows[-1]['id'] if more else None)
+
+
+def detail(team_id):
+    row = Team.objects.filter(pk=team_id).values(*DETAIL_FIELDS).first()
+    if row is None:
+        return None
+    return team_json(row, rosters_for([team_id])[team_id])
@@ -0,0 +1,220 @@
+# core/schedule_conflicts.py
+"""
+Schedule conflict detection.
+
+A match occupies [match_time, match_time + expected duration), where the
+duration comes from settings.MATCH_DURATION_MINUTES keyed by game name
+(falling back to the 'default' entry). Two matches conflict when they share
+a team and their intervals overlap; a tournament day is overbooked when it
+holds more than settings.MAX_MATCHES_PER_TOURNAMENT_DAY matches.
+
+TeamIntervals keeps a sorted array of intervals per team. Because no
+interval is longer than the longest configured duration, a lookup only has
+to bisect to (start - longest) and scan the few intervals up to `end`.
+Single inserts use insort (O(n) per insert in a Python list); many rows at
+once -- loading the schedule, checking an import chunk -- are appended and
+each touched team's array is sorted once, so an import of n matches for one
+team costs O(n log n), not O(n^2).
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Match
+
+
+def _durations():
+    minutes = {k.lower(): v for k, v in getattr(settings, 'MATCH_DURATION_MINUTES', {}).items()}
+    minutes.setdefault('default', 60)
+    return minutes
+
+
+def duration_lookup():
+    """Return a game name -> timedelta function, reading settings once for a whole pass."""
+    minutes = _durations()
+    cache = {}
+
+    def duration(game_name):
+        key = (game_name or '').lower()
+        if key not in cache:
+            cache[key] = timedelta(minutes=minutes.get(key, minutes['default']))
+        return cache[key]
+    return duration
+
+
+def match_duration(game_name):
+    return duration_lookup()(game_name)
+
+
+def longest_duration():
+    return timedelta(minutes=max(_durations().values()))
+
+
+def day_capacity():
+    return getattr(settings, 'MAX_MATCHES_PER_TOURNAMENT_DAY', None)
+
+
+class Conflict:
+    __slots__ = ('team_id', 'match_id', 'other_id', 'start', 'other_start')
+
+    def __init__(self, team_id, match_id, other_id, start, other_start):
+        self.team_id = team_id
+        self.match_id = match_id
+        self.other_id = other_id
+        self.start = start
+        self.other_start = other_start
+
+    def __str__(self):
+        return (f"team {self.team_id}: match {self.match_id or '(new)'} at {self.start:%Y-%m-%d %H:%M} "
+                f"overlaps match {self.other_id or '(earlier row)'} at {self.other_start:%Y-%m-%d %H:%M}")
+
+
+class TeamIntervals:
+    """Sorted per-team interval arrays with O(log n) overlap checks."""
+
+    def __init__(self):
+        self._by_team = defaultdict(list)  # team_id -> sorted [(start, end, match_id)]
+        self._longest = longest_duration()
+
+    def add(self, team_id, start, end, match_id=None):
+        insort(self._by_team[team_id], (start, end, match_id or 0))
+
+    def add_many(self, intervals):
+        """Add (team_id, start, end, match_id) rows, sorting each touched team's array once."""
+        touched = set()
+        for team_id, start, end, match_id in intervals:
+            self._by_team[team_id].append((start, end, match_id or 0))
+            touched.add(team_id)
+        for team_id in touched:
+            # appended rows form a second sorted run when they arrive in order; timsort merges it linearly
+            self._by_team[team_id].sort()
+
+    def overlaps(self, team_id, start, end, exclude_id=None):
+        intervals = self._by_team.get(team_id)
+        if not intervals:
+            return []
+        found = []
+        i = bisect_left(intervals, (start - self._longest,))
+        while i < len(intervals) and intervals[i][0] < end:
+            other_start, other_end, other_id = intervals[i]
+            if other_end > start and (exclude_id is None or other_id != exclude_id):
+                found.append(Conflict(team_id, exclude_id, other_id, start, other_start))
+            i += 1
+        return found
+
+    def check_and_add(self, team_ids, start, end, match_id=None):
+        """Return conflicts for the new match; it is only added when there are none."""
+        conflicts = [c for team_id in team_ids for c in self.overlaps(team_id, start, end, match_id)]
+        if not conflicts:
+            for team_id in team_ids:
+                self.add(team_id, start, end, match_id)
+        return conflicts
+
+    def check_batch(self, matches):
+        """
+        check_and_add for many new matches, each (team_ids, start, end,
+        match_id): one sweep in start order checks them against the stored
+        intervals (bisect, no inserts) and against the batch's accepted
+        matches (latest end per team), then the accepted ones are added with
+        add_many. Where two new matches overlap, the later-starting one is
+        rejected. Returns the conflicts per match, in input order.
+        """
+        results = [[] for _ in matches]
+        busy_until = {}  # team_id -> (end, start, match_id) of its latest-ending accepted match in the batch
+        accepted = []
+        for i in sorted(range(len(matches)), key=lambda i: matches[i][1]):
+            team_ids, start, end, match_id = matches[i]
+            conflicts = [c for team_id in team_ids for c in self.overlaps(team_id, start, end, match_id)]
+            for team_id in team_ids:
+                previous = busy_until.get(team_id)
+                if previous and previous[0] > start:
+                    conflicts.append(Conflict(team_id, match_id, previous[2], start, previous[1]))
+            results[i] = conflicts
+            if not conflicts:
+                for team_id in team_ids:
+                    if team_id not in busy_until or end > busy_until[team_id][0]:
+                        busy_until[team_id] = (end, start, match_id)
+                    accepted.append((team_id, start, end, match_id))
+        self.add_many(accepted)
+        return results
+
+
+def load_intervals(queryset=None):
+    """TeamIntervals for existing matches (one values_list pass, one sort per team)."""
+    index = TeamIntervals()
+    duration = duration_lookup()
+    qs = queryset if queryset is not None else Match.objects.all()
+    rows = qs.values_list('id', 'team1_id', 'team2_id', 'match_time', 'game__name', 'tournament__game__name')
+
+    def intervals():
+        for match_id, team1_id, team2_id, start, game, tournament_game in rows.iterator(chunk_size=5000):
+            end = start + duration(game or tournament_game)
+            yield team1_id, start, end, match_id
+            yield team2_id, start, end, match_id
+    index.add_many(intervals())
+    return index
+
+
+def find_conflicts(team_ids, start, game_name, exclude_id=None):
+    """
+    DB-side check for one match (admin form): an indexed range scan per team
+    over [start - longest duration, end) instead of loading the season.
+    """
+    duration = duration_lookup()
+    end = start + duration(game_name)
+    candidates = (
+        Match.objects.filter(Q(team1_id__in=team_ids) | Q(team2_id__in=team_ids))
+        .filter(match_time__gte=start - longest_duration(), match_time__lt=end)
+        .values_list('id', 'team1_id', 'team2_id', 'match_time', 'game__name', 'tournament__game__name')
+    )
+    if exclude_id:
+        candidates = candidates.exclude(pk=exclude_id)
+    conflicts = []
+    for other_id, team1_id, team2_id, other_start, game, tournament_game in candidates:
+        if other_start + duration(game or tournament_game) <= start:
+            continue
+        for team_id in team_ids:
+            if team_id in (team1_id, team2_id):
+                conflicts.append(Conflict(team_id, exclude_id, other_id, start, other_start))
+    return conflicts
+
+
+def day_is_full(tournament_id, day, exclude_id=None):
+    capacity = day_capacity()
+    if not capacity:
+        return False
+    qs = Match.objects.filter(tournament_id=tournament_id, match_time__date=day)
+    if exclude_id:
+        qs = qs.exclude(pk=exclude_id)
+    return qs.count() >= capacity
+
+
+def audit(queryset=None):
+    """
+    One sorted sweep over the whole schedule. Yields ('overlap', Conflict) and
+    ('overbooked', (tournament_id, day, count)) findings.
+    """
+    qs = queryset if queryset is not None else Match.objects.all()
+    rows = qs.order_by('match_time', 'id').values_list(
+        'id', 'team1_id', 'team2_id', 'tournament_id', 'match_time', 'game__name', 'tournament__game__name'
+    )
+    busy_until = {}  # team_id -> (end, match_id, start) of its latest-ending match so far
+    per_day = defaultdict(int)  # (tournament_id, date) -> matches
+    capacity = day_capacity()
+    duration = duration_lookup()
+    for match_id, team1_id, team2_id, tournament_id, start, game, tournament_game in rows.iterator(chunk_size=5000):
+        end = start + duration(game or tournament_game)
+        for team_id in (team1_id, team2_id):
+            previous = busy_until.get(team_id)
+            if previous and previous[0] > start:
+                yield 'overlap', Conflict(team_id, match_id, previous[1], start, previous[2])
+            if not previous or end > previous[0]:
+                busy_until[team_id] = (end, match_id, start)
+        per_day[(tournament_id, start.date())] += 1
+    if capacity:
+        for (tournament_id, day), count in sorted(per_day.items(), key=lambda item: (item[0][1], item[0][0])):
+            if count > capacity:
+                yield 'overbooked', (tournament_id, day, count)
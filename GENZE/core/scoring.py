@@ -0,0 +1,147 @@
+# core/scoring.py
+"""
+Concurrency-safe writes for live match data.
+
+Admins, the scoring feed and update_match_statuses all write the same Match
+rows while a match is live. Rules used here:
+
+* counters (points, viewer_count) are bumped with F() expressions in a single
+  UPDATE, so concurrent increments never lose each other;
+* absolute score edits (team scores, rounds) carry the ``version`` the editor
+  last saw and only apply if it is still current — otherwise StaleScoreError;
+* every write touches only the columns it owns, never a full-row save().
+
+QuerySet.update sends no post_save, so after a write the follow-up that
+core.signals would run on save() runs here (after_write, shared with the
+bulk writes in core.matchday).
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import brackets, calendar_grid, ratings
+from .models import Match
+
+# Fields an optimistic score edit may set. Status/timestamps belong to
+# update_match_statuses and are deliberately not in here.
+SCORE_FIELDS = ('team1_score', 'team2_score', 'current_round', 'total_rounds', 'points_team1', 'points_team2')
+
+# Counters that may be incremented atomically.
+COUNTER_FIELDS = ('points_team1', 'points_team2', 'viewer_count')
+
+# PositiveIntegerField columns: a negative value is a 400, not an IntegrityError.
+UNSIGNED_FIELDS = ('team1_score', 'team2_score', 'current_round', 'total_rounds', 'viewer_count')
+
+
+class StaleScoreError(Exception):
+    """The match was changed by someone else since `expected_version` was read."""
+
+    def __init__(self, match_id, expected_version, current_version):
+        self.match_id = match_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Match {match_id} is at version {current_version}, edit was based on {expected_version}"
+        )
+
+
+def _current(match_id, *fields):
+    return Match.objects.filter(pk=match_id).values('id', 'version', *fields).first()
+
+
+def after_write(matches, rescored=False):
+    """
+    What core.signals does on save(), for rows written without one: newly
+    completed matches are rated and advance their brackets, in match_time
+    order (Elo is order-dependent), and the calendar months of all of them
+    are invalidated after commit. `rescored` means the result of an already
+    rated match changed, which queues a rating replay instead. Runs inside
+    the writer's transaction.
+    """
+    if rescored:
+        ratings.replay_later()
+    completed = sorted((m for m in matches if m.status == 'completed' and not m.rated),
+                       key=lambda m: (m.match_time, m.pk))
+    for match in completed:
+        ratings.apply_match(match)
+        if match.tournament_stage_id:
+            brackets.on_match_completed(match)
+    months = [m.match_time for m in matches]
+    transaction.on_commit(lambda: calendar_grid.invalidate_months(months))
+
+
+def increment(match_id, **deltas):
+    """
+    Atomically add deltas to counter fields, e.g. increment(5, points_team1=1).
+    Returns the fresh values (including ``version``), or None if the match is gone.
+    Point changes bump the version so in-flight absolute edits notice them.
+    Raises ValueError if an unsigned counter would drop below zero.
+    """
+    unknown = set(deltas) - set(COUNTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Not a counter field: {', '.join(sorted(unknown))}")
+    deltas = {field: int(delta) for field, delta in deltas.items() if delta}
+    if not deltas:
+        return _current(match_id, *COUNTER_FIELDS)
+
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    points = any(field.startswith('points_') for field in deltas)
+    if points:
+        updates['version'] = F('version') + 1
+        updates['updated_at'] = timezone.now()
+    # the floor is part of the UPDATE's WHERE, so concurrent decrements can't both pass it
+    floors = {f"{field}__gte": -delta for field, delta in deltas.items() if field in UNSIGNED_FIELDS and delta < 0}
+    with transaction.atomic():
+        if not Match.objects.filter(pk=match_id, **floors).update(**updates):
+            if floors and _current(match_id) is not None:
+                raise ValueError(f"{', '.join(f.split('__')[0] for f in floors)} cannot go below 0")
+            return None
+        if points:
+            after_write([Match.objects.get(pk=match_id)])
+    return _current(match_id, *COUNTER_FIELDS)
+
+
+def set_scores(match_id, expected_version, **values):
+    """
+    Apply absolute score values if the row is still at `expected_version`.
+    Returns the new version; raises StaleScoreError on a concurrent edit,
+    Match.DoesNotExist if the match is gone and ValueError for a negative
+    unsigned value.
+    """
+    unknown = set(values) - set(SCORE_FIELDS)
+    if unknown:
+        raise ValueError(f"Not a score field: {', '.join(sorted(unknown))}")
+    negative = sorted(f for f, value in values.items() if f in UNSIGNED_FIELDS and value is not None and value < 0)
+    if negative:
+        raise ValueError(f"{', '.join(negative)} cannot be negative")
+    expected_version = int(expected_version)
+
+    with transaction.atomic():
+        before = _current(match_id, 'rated', *ratings.RESULT_FIELDS)
+        updated = Match.objects.filter(pk=match_id, version=expected_version).update(
+            version=F('version') + 1, updated_at=timezone.now(), **values
+        )
+        if updated:
+            match = Match.objects.get(pk=match_id)
+            after_write([match], rescored=ratings.result_changed(before, match))
+    if updated:
+        return expected_version + 1
+
+    current = _current(match_id)
+    if current is None:
+        raise Match.DoesNotExist(f"Match {match_id} does not exist")
+    raise StaleScoreError(match_id, expected_version, current['version'])
+
+
+def save_changed_fields(match, changed_fields, expected_version):
+    """
+    Admin save path: write only the fields the editor changed. Score fields go
+    through the version check; everything else is a plain column update.
+    """
+    score_values = {f: getattr(match, f) for f in changed_fields if f in SCORE_FIELDS}
+    if score_values:
+        match.version = set_scores(match.pk, expected_version, **score_values)
+
+    other = [f for f in changed_fields if f not in SCORE_FIELDS and f != 'version']
+    if other:
+        match.save(update_fields=other + ['updated_at'])
@@ -0,0 +1,44 @@
+# core/shared_cache.py
+"""
+Which cache state is actually shared.
+
+Viewer samples, rate-limit buckets, idempotency keys, periodic-task locks
+and the 'cache' metric store only work if every gunicorn worker and the Celery worker see the same cache.
+The default cache is Redis when CACHE_URL is set (see settings); LocMem and
+the dummy cache are per-process, and code that can't work that way asks
+is_shared() and falls back; code that has no fallback calls require(). With
+SHARED_CACHE_REQUIRED (on unless DEBUG) a per-process default cache is a
+system check error, so manage.py check, migrate and runserver refuse to run
+with it, and require() raises for anything that gets past that (gunicorn
+doesn't run checks).
+"""
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared(alias='default'):
+    return settings.CACHES[alias]['BACKEND'] not in PER_PROCESS_BACKENDS
+
+
+def require(feature):
+    """Raise ImproperlyConfigured if `feature` would silently run per-process."""
+    if not is_shared() and getattr(settings, 'SHARED_CACHE_REQUIRED', False):
+        raise ImproperlyConfigured(f"{feature} need a shared cache: set CACHE_URL (core.shared_cache).")
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs=None, **kwargs):
+    if is_shared() or not getattr(settings, 'SHARED_CACHE_REQUIRED', False):
+        return []
+    return [checks.Error(
+        f"The default cache ({settings.CACHES['default']['BACKEND']}) is per-process.",
+        hint="Set CACHE_URL to a Redis URL so web and Celery workers share viewer counts, "
+             "rate limits, idempotency keys, task locks and task metrics.",
+        id='core.E001',
+    )]
@@ -0,0 +1,115 @@
+# core/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from django.core.files.storage import default_storage
+
+from .models import Match, Team, Player, Tournament, NewsArticle
+from . import brackets, ratings, calendar_grid, match_status, news
+from .storage import MEDIA_FIELDS, release_later
+
+
+@receiver(post_save, sender=Match)
+def advance_bracket(sender, instance, **kwargs):
+    # Status flips come from update_match_statuses and the admin; both save() the row
+    if instance.status == 'completed' and instance.tournament_stage_id:
+        brackets.on_match_completed(instance)
+
+
+@receiver(post_save, sender=Match)
+def update_ratings(sender, instance, **kwargs):
+    if ratings.result_changed(getattr(instance, '_previous_result', None), instance):
+        # a corrected result: every later match was rated against the old one
+        ratings.replay_later()
+    elif instance.status == 'completed' and not instance.rated:
+        ratings.apply_match(instance)
+
+
+@receiver(pre_save, sender=Match)
+def remember_match_time(sender, instance, update_fields=None, **kwargs):
+    # Only a rescheduled match needs its old month invalidated too, and only a
+    # changed result of a rated match needs the ratings replayed
+    instance._previous_match_time = None
+    instance._previous_result = None
+    watched = {'match_time', *ratings.RESULT_FIELDS}
+    if instance.pk and (update_fields is None or watched & set(update_fields)):
+        previous = Match.objects.filter(pk=instance.pk).values('match_time', 'rated', *ratings.RESULT_FIELDS).first()
+        if previous:
+            instance._previous_match_time = previous.pop('match_time')
+            instance._previous_result = previous
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def invalidate_calendar_month(sender, instance, **kwargs):
+    times = [instance.match_time]
+    previous = getattr(instance, '_previous_match_time', None)
+    if previous is not None:
+        times.append(previous)
+    # after commit: a grid rebuilt before then would cache the old rows under the new version
+    transaction.on_commit(lambda: calendar_grid.invalidate_months(times))
+
+
+@receiver(post_save, sender=Team)
+def invalidate_calendar(sender, instance, created=False, **kwargs):
+    # Team names are baked into every cached month; a new team isn't in any yet
+    if not created:
+        transaction.on_commit(calendar_grid.invalidate_all)
+
+
+@receiver(post_save, sender=Team)
+def sync_team_rating(sender, instance, update_fields=None, **kwargs):
+    # Team.rating is the rating in Team.game, so it follows a change of game
+    if update_fields is None or 'game' in update_fields:
+        ratings.sync_team_ratings([instance.pk])
+
+
+@receiver(post_save, sender=Match)
+def schedule_match_start(sender, instance, created=False, **kwargs):
+    # New matches and rescheduled ones get a go-live task at the new match_time
+    previous = getattr(instance, '_previous_match_time', None)
+    if created or (previous is not None and previous != instance.match_time):
+        match_status.schedule_start(instance)
+
+
+
+@receiver(post_save, sender=NewsArticle)
+@receiver(post_delete, sender=NewsArticle)
+def invalidate_news(sender, instance, **kwargs):
+    # Cached home hero slot and RSS/Atom bodies, once the change is visible to readers
+    transaction.on_commit(news.invalidate)
+
+# Reference counting for content-addressed media (core.storage): a row that is
+# deleted, or whose file is replaced, gives up its reference to the old blob.
+MEDIA_MODELS = (Tournament, Team, Player, NewsArticle)
+
+
+def _media_fields(sender):
+    return MEDIA_FIELDS[sender._meta.label]
+
+
+def remember_media(sender, instance, update_fields=None, **kwargs):
+    instance._previous_media = {}
+    if not instance.pk or not getattr(default_storage, 'refcounted', False):
+        return
+    fields = [f for f in _media_fields(sender) if update_fields is None or f in update_fields]
+    if fields:
+        instance._previous_media = sender.objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def release_replaced_media(sender, instance, **kwargs):
+    for field, name in getattr(instance, '_previous_media', {}).items():
+        if name and name != getattr(instance, field).name:
+            release_later(name)
+
+
+def release_deleted_media(sender, instance, **kwargs):
+    for field in _media_fields(sender):
+        release_later(getattr(instance, field).name)
+
+
+for model in MEDIA_MODELS:
+    pre_save.connect(remember_media, sender=model, dispatch_uid=f'remember_media_{model.__name__}')
+    post_save.connect(release_replaced_media, sender=model, dispatch_uid=f'release_replaced_{model.__name__}')
+    post_delete.connect(release_deleted_media, sender=model, dispatch_uid=f'release_deleted_{model.__name__}')
@@ -0,0 +1,146 @@
+# core/storage.py
+"""
+Content-addressed media storage.
+
+ContentAddressedStorage keeps every file once, as blobs/<aa>/<sha256>.<ext>,
+on a wrapped backend: FileSystemStorage under MEDIA_ROOT by default, or an
+S3-compatible bucket (MinIO locally) through django-storages. The same
+banner uploaded for three teams, or an avatar reused in a news post, is one
+object. MediaBlob rows count references: saving content that is already
+stored only takes another reference, delete() releases one and the file
+goes with the last.
+
+Names written before the switch (team_logos/x.jpg, ...) still open, resolve
+and delete through the backend as-is; `manage.py dedupe_media` moves them
+into blobs and rebuilds the counts from the rows that use them.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+BLOB_PREFIX = 'blobs/'
+
+# Every file field that stores into default_storage, by model label
+MEDIA_FIELDS = {
+    'core.Tournament': ('image',),
+    'core.Team': ('banner', 'logo'),
+    'core.Player': ('avatar',),
+    'core.NewsArticle': ('image',),
+}
+
+
+def hash_content(content):
+    """(sha256 hex digest, size) of a File, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+    return digest.hexdigest(), size
+
+
+def blob_name(digest, original_name):
+    ext = os.path.splitext(original_name)[1].lower()[:10]
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest}{ext}"
+
+
+def digest_of(name):
+    """The digest a blob name was stored under, or None for a legacy name."""
+    if not name or not name.startswith(BLOB_PREFIX):
+        return None
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    refcounted = True
+
+    def __init__(self, backend='django.core.files.storage.FileSystemStorage', options=None):
+        self.backend_path = backend
+        self.backend_options = options or {}
+
+    @cached_property
+    def backend(self):
+        return import_string(self.backend_path)(**self.backend_options)
+
+    # ---- writes ----
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest, size = hash_content(content)
+        return self.add_reference(digest, blob_name(digest, name or content.name or ''), size, content)
+
+    def add_reference(self, digest, name, size, content):
+        """Take a reference on `digest`, writing `content` only if the blob isn't stored yet."""
+        from .models import MediaBlob
+
+        blob, _ = MediaBlob.objects.get_or_create(digest=digest, defaults={'name': name, 'size': size})
+        if not self.backend.exists(blob.name):
+            stored = self.backend.save(blob.name, content)
+            if stored != blob.name:
+                # a concurrent save of the same bytes got there first
+                self.backend.delete(stored)
+        MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+        return blob.name
+
+    def delete(self, name):
+        digest = digest_of(name)
+        if digest is None:
+            self.backend.delete(name)
+            return
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(digest=digest).first()
+            if blob is not None and blob.refcount > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            transaction.on_commit(lambda: self.backend.delete(name))
+
+    # ---- reads go straight to the backend ----
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+def release_later(name):
+    """Drop one reference to `name` once the surrounding transaction commits."""
+    from django.core.files.storage import default_storage
+
+    if name and getattr(default_storage, 'refcounted', False):
+        transaction.on_commit(lambda: default_storage.delete(name))
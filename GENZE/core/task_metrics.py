@@ -0,0 +1,128 @@
+# core/task_metrics.py
+"""
+Celery task metrics and the single-flight lock for periodic tasks.
+
+Every task gets, through Celery signals (connect() is called by core.tasks,
+i.e. in the worker and in any process that enqueues):
+
+  genze_task_duration_seconds{task}       run time
+  genze_task_queue_lag_seconds{task}      publish (or ETA) -> start
+  genze_task_runs_total{task,outcome}     success / failure / retry
+  genze_task_last_success_timestamp_seconds{task}
+
+Tasks with several steps time each one with step() and count what it did
+with rows(); reminders.send_due observes genze_smtp_send_seconds per mail.
+
+single_flight() is a cache.add lock with a TTL: a beat tick that arrives
+while the previous run still holds it (slow SMTP) is counted as skipped
+in genze_task_skipped_total instead of starting a second, concurrent sweep.
+Like the 'cache' metric store, it only excludes runs in other worker
+processes if the default cache is the shared one (core.shared_cache), so
+it refuses a per-process cache when SHARED_CACHE_REQUIRED.
+"""
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
+
+from . import shared_cache
+from .metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = 'task-lock:'
+PUBLISHED_HEADER = 'genze_published_at'
+
+TASK_SECONDS = Histogram('genze_task_duration_seconds', 'Task run time.', ['task'])
+TASK_LAG = Histogram('genze_task_queue_lag_seconds', 'Seconds from publish (or ETA) to task start.', ['task'],
+                     buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 300, 900))
+TASK_RUNS = Counter('genze_task_runs_total', 'Finished task runs by outcome.', ['task', 'outcome'])
+TASK_SKIPPED = Counter('genze_task_skipped_total', 'Runs skipped because the previous run held the lock.',
+                       ['task'])
+TASK_LAST_SUCCESS = Gauge('genze_task_last_success_timestamp_seconds', 'Unix time of the last successful run.',
+                          ['task'])
+STEP_SECONDS = Histogram('genze_task_step_duration_seconds', 'Run time of one step of a task.', ['task', 'step'])
+STEP_ROWS = Counter('genze_task_step_rows_total', 'Rows a task step acted on, by result.',
+                    ['task', 'step', 'result'])
+SMTP_SECONDS = Histogram('genze_smtp_send_seconds', 'send_mail latency per message.', ['outcome'],
+                         buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+
+
+def _short(name):
+    return name.rsplit('.', 1)[-1] if name else 'unknown'
+
+
+@contextmanager
+def step(task, name):
+    with STEP_SECONDS.time(task=task, step=name):
+        yield
+
+
+def rows(task, step, **counts):
+    """rows('update_match_statuses', 'sweep', started=2, completed=1)"""
+    for result, n in counts.items():
+        if n:
+            STEP_ROWS.inc(n, task=task, step=step, result=result)
+
+
+@contextmanager
+def single_flight(name, ttl=None):
+    """
+    Yields True if this run holds the lock, False if another run does. The TTL
+    frees the lock of a worker that died mid-run; it is only released by the
+    run that took it.
+    """
+    shared_cache.require("Task locks")
+    ttl = ttl or getattr(settings, 'TASK_LOCK_TTL', 10 * 60)
+    key, token = f"{LOCK_PREFIX}{name}", uuid.uuid4().hex
+    acquired = cache.add(key, token, ttl)
+    if not acquired:
+        TASK_SKIPPED.inc(task=name)
+        logger.warning("Skipped %s: the previous run still holds the lock", name)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+def _stamp_published(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_HEADER, time.time())
+
+
+def _task_started(task=None, **kwargs):
+    request = task.request
+    request.genze_started = time.perf_counter()
+    published = getattr(request, PUBLISHED_HEADER, None) or (request.headers or {}).get(PUBLISHED_HEADER)
+    if published is None:
+        return
+    # an ETA task isn't late for the time it spent waiting for its ETA
+    ready_at = float(published)
+    if request.eta:
+        eta = parse_datetime(request.eta) if isinstance(request.eta, str) else request.eta
+        ready_at = max(ready_at, eta.timestamp())
+    TASK_LAG.observe(max(time.time() - ready_at, 0), task=_short(task.name))
+
+
+def _task_finished(task=None, state=None, **kwargs):
+    started = getattr(task.request, 'genze_started', None)
+    name = _short(task.name)
+    if started is not None:
+        TASK_SECONDS.observe(time.perf_counter() - started, task=name)
+    TASK_RUNS.inc(task=name, outcome=(state or 'unknown').lower())
+    if state == 'SUCCESS':
+        TASK_LAST_SUCCESS.set(time.time(), task=name)
+
+
+def connect():
+    # celery is imported here, not at module level: reminders (and so the web
+    # tier) uses this module's metrics without loading celery
+    from celery import signals
+    signals.before_task_publish.connect(_stamp_published, weak=False, dispatch_uid='genze-publish')
+    signals.task_prerun.connect(_task_started, weak=False, dispatch_uid='genze-prerun')
+    signals.task_postrun.connect(_task_finished, weak=False, dispatch_uid='genze-postrun')
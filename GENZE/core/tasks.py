@@ -1,8 +1,85 @@
 # core/tasks.py
 from celery import shared_task
-from django.core.management import call_command
+from django.utils.dateparse import parse_datetime
+
+import main_project.celery  # noqa: F401 -- binds shared tasks to the configured app when enqueued from web
+from core.viewers import default_store, flush
+from core import match_status, ratings, reminders, retention, task_metrics, uploads
+
+task_metrics.connect()
+
 
 @shared_task
 def update_match_statuses_task():
-    # Calls the management command we wrote earlier
-    call_command('update_match_statuses')
\ No newline at end of file
+    # Every minute: live -> completed and due reminders (go-live is pushed by ETA tasks).
+    # A tick that finds the previous one still running (slow SMTP) is skipped, not stacked.
+    task = 'update_match_statuses'
+    with task_metrics.single_flight(task) as acquired:
+        if not acquired:
+            return {'skipped': True}
+        with task_metrics.step(task, 'complete'):
+            completed = match_status.complete_finished()
+        task_metrics.rows(task, 'complete', completed=completed)
+        with task_metrics.step(task, 'reminders'):
+            sent, failed = reminders.send_due()
+        task_metrics.rows(task, 'reminders', sent=sent, failed=failed)
+    return {'completed': completed, 'reminders_sent': sent, 'reminders_failed': failed}
+
+
+@shared_task
+def flush_viewer_counts_task():
+    # Writes the viewer counts coalesced by /api/viewers/ since the last tick
+    return flush(default_store)
+
+
+@shared_task
+def start_match_task(match_id, match_time):
+    # Enqueued with eta=match_time by core.match_status; no-ops if the match was rescheduled
+    return match_status.start_if_due(match_id, parse_datetime(match_time))
+
+
+@shared_task
+def schedule_match_starts_task():
+    # Starts matches whose ETA task was lost, then enqueues start_match_task
+    # for matches entering the scheduling horizon
+    task = 'schedule_match_starts'
+    with task_metrics.step(task, 'catch_up'):
+        started = match_status.start_overdue()
+    task_metrics.rows(task, 'catch_up', started=started)
+    return {'started': started, 'scheduled': match_status.schedule_upcoming()}
+
+
+@shared_task
+def replay_ratings_task():
+    # Queued by core.ratings.replay_later when a rated match's result is corrected.
+    # A replay already running may have read the row before the correction, so
+    # this one is pushed back rather than dropped.
+    task = 'replay_ratings'
+    with task_metrics.single_flight(task) as acquired:
+        if not acquired:
+            replay_ratings_task.apply_async(countdown=60)
+            return {'skipped': True}
+        with task_metrics.step(task, 'replay'):
+            matches, teams = ratings.replay()
+        task_metrics.rows(task, 'replay', matches=matches)
+    return {'matches': matches, 'ratings': teams}
+
+
+@shared_task
+def process_registration_images_task(team_id):
+    # Resize and strip EXIF from a newly registered team's images (queued by register_page)
+    return uploads.process_team_images(team_id)
+
+
+@shared_task
+def purge_stale_uploads_task():
+    # Temp parts of chunked uploads that were never submitted with a form
+    return uploads.purge_stale()
+
+
+@shared_task
+def archive_reminders_task():
+    # Moves reminders of long-finished matches out of the hot table (core.retention)
+    stats = retention.archive_reminders()
+    task_metrics.rows('archive_reminders', 'archive', archived=stats['archived'])
+    return stats
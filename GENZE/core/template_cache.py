@@ -0,0 +1,76 @@
+# core/template_cache.py
+"""
+Template compile and render caching.
+
+Two levels on top of Django's cached loader (settings.TEMPLATES):
+
+* warm_up() compiles every template once at process start (wsgi/asgi), so
+  the first request on a fresh autoscaled worker doesn't pay for parsing;
+* render_once() keeps the rendered HTML of request-independent partials
+  (hero sections, the stats strip) in a bounded per-process LRU, keyed by
+  the template name and the values passed in. {% render_once %} in
+  core.templatetags.partials is the template-side entry point.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.template import engines
+from django.template.loader import get_template
+
+from .request_metrics import cache_lookup
+
+MAX_ENTRIES = 256
+
+_rendered = OrderedDict()
+_lock = threading.Lock()
+
+
+def template_names():
+    """Every .html template the django engine can load, relative to its directory."""
+    engine = engines['django'].engine
+    dirs = list(engine.dirs)
+    for loader in engine.template_loaders:
+        # the cached loader wraps the filesystem / app_directories loaders
+        for inner in getattr(loader, 'loaders', [loader]):
+            dirs.extend(inner.get_dirs())
+    names = set()
+    for directory in dirs:
+        root = Path(directory)
+        if root.is_dir():
+            names.update(str(path.relative_to(root)) for path in root.rglob('*.html'))
+    return sorted(names)
+
+
+def warm_up(names=None):
+    """Compile templates into the cached loader. Returns (compiled, failed names)."""
+    compiled, failed = 0, []
+    for name in names or template_names():
+        try:
+            get_template(name)
+            compiled += 1
+        except Exception:
+            failed.append(name)
+    return compiled, failed
+
+
+def render_once(name, values):
+    """Render `name` with `values` (no request) once per process and reuse the HTML."""
+    key = (name, tuple(sorted(values.items())))
+    with _lock:
+        html = _rendered.get(key)
+        if html is not None:
+            _rendered.move_to_end(key)
+    if cache_lookup('partials', html) is not None:
+        return html
+    html = get_template(name).render(values)
+    with _lock:
+        _rendered[key] = html
+        if len(_rendered) > MAX_ENTRIES:
+            _rendered.popitem(last=False)
+    return html
+
+
+def clear():
+    with _lock:
+        _rendered.clear()
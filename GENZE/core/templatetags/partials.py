@@ -0,0 +1,19 @@
+# core/templatetags/partials.py
+from django import template
+
+from core.template_cache import render_once as _render_once
+
+register = template.Library()
+
+
+@register.simple_tag
+def render_once(name, **values):
+    """
+    Include a partial that doesn't depend on the request, rendered once per
+    process for each distinct set of values.
+    Example: {% render_once 'core/partials/stats_section.html' %}
+             {% render_once 'core/partials/tournament_hero.html' total_prize_pool=total_prize_pool %}
+    Only pass hashable, template-ready values (numbers, strings); the partial
+    sees nothing else from the page context.
+    """
+    return _render_once(name, values)
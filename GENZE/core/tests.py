@@ -1,3 +1,1134 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    brackets, bulk, calendar_grid, ical, matchday, metrics, news, projections, ratelimit, ratings, reminders,
+    request_metrics, retention, rosters, schedule_conflicts, scoring, shared_cache, task_metrics, tasks, uploads,
+    viewers, views,
+)
+from .models import (
+    Game, Match, MediaBlob, NewsArticle, Player, Reminder, ReminderArchive, Team, TeamRating, Tournament,
+    TournamentParticipant,
+)
+
+
+class ListingProjectionTests(TestCase):
+    """
+    The listing partials render from only() projections. Any column a partial
+    touches outside its projection is fetched lazily, one query per row, so
+    rendering an already-evaluated listing must not hit the database at all.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        cls.tournament = Tournament.objects.create(
+            title='Projection Cup', game=game, status='ongoing', teams=8,
+            start_date=date.today(), end_date=date.today() + timedelta(days=3),
+        )
+        team1 = Team.objects.create(name='Alpha', game=game, logo='team_logos/alpha.png', description='x' * 500)
+        team2 = Team.objects.create(name='Bravo', game=game, description='y' * 500)
+        now = timezone.now()
+        common = dict(tournament=cls.tournament, team1=team1, team2=team2, game=game, stage='Group A')
+        Match.objects.create(match_time=now + timedelta(hours=2), status='upcoming',
+                             youtube_live_url='https://youtube.com/live', **common)
+        Match.objects.create(match_time=now - timedelta(minutes=30), status='live', current_round=3,
+                             team1_score=1, team2_score=0, live_started_at=now - timedelta(minutes=30),
+                             viewer_count=1500, viewer_label='1.5K viewers', **common)
+        Match.objects.create(match_time=now - timedelta(days=1), status='completed', team1_score=2,
+                             team2_score=1, total_rounds=3, points_team1=20, points_team2=10,
+                             live_started_at=now - timedelta(days=1), completed_at=now - timedelta(hours=22),
+                             youtube_recap_url='https://youtube.com/recap', **common)
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+
+    def assertRendersWithoutQueries(self, template, context):
+        # Evaluate the querysets first; only the template render is under test
+        context = {key: list(value) if hasattr(value, 'model') else value for key, value in context.items()}
+        for match in context.get('upcoming_sidebar', []):
+            match.countdown = 'In 2 hours'
+        with self.assertNumQueries(0):
+            html = render_to_string(template, context, request=self.request)
+        self.assertIn('Alpha', html)
+
+    def test_schedule_list(self):
+        matches = list(projections.schedule_matches().order_by('match_time'))
+        self.assertEqual(len(matches), 3)
+        grouped = [(m.match_time.date(), [m]) for m in matches]
+        self.assertRendersWithoutQueries('core/partials/schedule_list.html', {'grouped_matches': grouped})
+
+    def test_upcoming_sidebar(self):
+        self.assertRendersWithoutQueries(
+            'core/partials/upcoming_sidebar.html',
+            {'upcoming_sidebar': projections.schedule_matches().filter(status='upcoming')},
+        )
+
+    def test_live_matches(self):
+        self.assertRendersWithoutQueries('core/partials/live_matches.html',
+                                         {'live_matches': projections.live_matches()})
+
+    def test_recent_results(self):
+        self.assertRendersWithoutQueries('core/partials/recent_results.html',
+                                         {'recent_results': projections.recent_results()})
+
+    def test_tournament_brackets(self):
+        tournament = Tournament.objects.select_related('game').only('id', 'title', 'teams', 'game__name').get()
+        matches = list(projections.bracket_matches().filter(status='upcoming'))
+        self.assertRendersWithoutQueries('core/partials/tournament_brackets.html',
+                                         {'brackets': [(tournament, matches)]})
+
+    def test_results_page_game_filter(self):
+        response = self.client.get(reverse('results'), {'game': 'valorant'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Projection Cup')
+
+
+@override_settings(
+    RATE_LIMIT_STORE='memory',
+    RATE_LIMITS={'create_reminder': {'ip': '3/m', 'email': '2/m'}},
+)
+class WriteProtectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Limit Cup', game=game, status='upcoming', start_date=date.today(), end_date=date.today(),
+        )
+        cls.match = Match.objects.create(
+            tournament=tournament, game=game, match_time=timezone.now() + timedelta(days=1),
+            team1=Team.objects.create(name='Alpha', game=game), team2=Team.objects.create(name='Bravo', game=game),
+        )
+
+    def setUp(self):
+        ratelimit.get_store().clear()
+        cache.clear()
+
+    def post_reminder(self, email, minutes=30, **extra):
+        return self.client.post(reverse('create_reminder'), {
+            'match_id': self.match.pk, 'email': email, 'notify_minutes_before': minutes,
+        }, **extra)
+
+    def test_token_bucket_refills_at_rate(self):
+        capacity, refill = ratelimit.parse_rate('10/m')
+        allowed, state, _ = ratelimit.take(None, capacity, refill, now=0)
+        self.assertTrue(allowed)
+        self.assertEqual(state, (9, 0))
+        allowed, state, retry_after = ratelimit.take((0.5, 0), capacity, refill, now=0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 3.0)
+        self.assertTrue(ratelimit.take((0.5, 0), capacity, refill, now=3)[0])
+
+    def test_duplicate_post_is_replayed_not_repeated(self):
+        first = self.post_reminder('fan@example.com')
+        second = self.post_reminder('fan@example.com')
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(second['Idempotent-Replay'], 'true')
+        self.assertEqual(Reminder.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_write_is_not_replayed(self):
+        with mock.patch('core.views.send_mail', side_effect=OSError('SMTP down')):
+            self.assertFalse(self.post_reminder('fan@example.com').json()['ok'])
+        retry = self.post_reminder('fan@example.com')
+        self.assertTrue(retry.json()['ok'])
+        self.assertFalse(retry.has_header('Idempotent-Replay'))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_explicit_key_scopes_the_replay(self):
+        self.post_reminder('fan@example.com', HTTP_IDEMPOTENCY_KEY='a')
+        self.post_reminder('fan@example.com', HTTP_IDEMPOTENCY_KEY='a')
+        self.post_reminder('fan@example.com', minutes=10, HTTP_IDEMPOTENCY_KEY='a')
+        self.assertEqual(Reminder.objects.count(), 2)
+
+    def test_email_and_ip_buckets(self):
+        for minutes in (5, 10):
+            self.assertEqual(self.post_reminder('fan@example.com', minutes).status_code, 200)
+        limited = self.post_reminder('fan@example.com', 15)
+        self.assertEqual(limited.status_code, 429)
+        self.assertIn('Retry-After', limited)
+        # the rejected request still spent the IP bucket's last token (3/m), so other emails are limited too
+        self.assertEqual(self.post_reminder('other@example.com').status_code, 429)
+        self.assertEqual(Reminder.objects.count(), 2)
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = override_settings(MEDIA_ROOT=self.media, UPLOAD_TEMP_DIR=f"{self.media}/tmp",
+                                              UPLOAD_CHUNK_BYTES=100, RATE_LIMITS={})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.game, _ = Game.objects.get_or_create(name='Valorant')
+
+    def png(self):
+        from PIL import Image
+        out = io.BytesIO()
+        Image.new('RGB', (600, 300), 'red').save(out, format='PNG')
+        return out.getvalue()
+
+    def send(self, kind, data, chunks=None):
+        upload_id = self.client.post(reverse('upload_start'), {'kind': kind, 'size': len(data)}).json()['id']
+        url = reverse('upload_chunk', args=[upload_id])
+        for offset in range(0, len(data), 100)[:chunks]:
+            response = self.client.post(f"{url}?offset={offset}", data[offset:offset + 100],
+                                        content_type='application/octet-stream')
+        return upload_id, response
+
+    def test_resume_from_reported_offset(self):
+        data = self.png()
+        upload_id, _ = self.send('logo', data, chunks=1)
+        url = reverse('upload_chunk', args=[upload_id])
+        self.assertEqual(self.client.get(url).json()['received'], 100)
+        stale = self.client.post(f"{url}?offset=0", data[:100], content_type='application/octet-stream')
+        self.assertEqual(stale.status_code, 409)
+        cache.clear()  # the upload's state is on disk with its part, not in a worker's cache
+        for offset in range(100, len(data), 100):
+            response = self.client.post(f"{url}?offset={offset}", data[offset:offset + 100],
+                                        content_type='application/octet-stream')
+        self.assertTrue(response.json()['complete'])
+
+    def test_non_image_rejected_on_first_chunk(self):
+        _, response = self.send('avatar', b'#!/bin/sh\n' * 5)
+        self.assertEqual(response.status_code, 409)
+
+    def test_register_with_uploaded_files(self):
+        logo_id, _ = self.send('logo', self.png())
+        avatar_id, _ = self.send('avatar', self.png())
+        self.client.post(reverse('register'), {
+            'teamName': 'Uploaders', 'teamTag': 'UPL', 'teamGame': self.game.pk,
+            'logo_upload': logo_id, 'player_avatar_2_upload': avatar_id, 'player_name_1': 'One',
+        })
+        team = Team.objects.get(name='Uploaders')
+        self.assertEqual(Player.objects.filter(team=team).count(), 2)
+        avatar = Player.objects.get(team=team, name='Player 2').avatar
+        self.assertTrue(avatar.storage.exists(avatar.name))
+        # same bytes as the logo: stored once, referenced twice
+        self.assertEqual(avatar.name, team.logo.name)
+        self.assertEqual(MediaBlob.objects.get().refcount, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(uploads.process_team_images(team.pk), 2)
+        processed = MediaBlob.objects.get()
+        self.assertEqual(processed.refcount, 2)
+        self.assertNotEqual(processed.name, avatar.name)
+        self.assertFalse(avatar.storage.exists(avatar.name))
+
+    def test_multipart_fallback_skips_non_images(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        self.client.post(reverse('register'), {
+            'teamName': 'Plain', 'teamTag': 'PLN', 'teamGame': self.game.pk,
+            'logo': SimpleUploadedFile('logo.png', self.png()),
+            'banner': SimpleUploadedFile('banner.png', b'not really a png'),
+        })
+        team = Team.objects.get(name='Plain')
+        self.assertTrue(team.logo.name)
+        self.assertFalse(team.banner.name)
+
+    def test_retry_after_failed_registration_runs_again(self):
+        logo_id, _ = self.send('logo', self.png())
+        form = {'teamName': 'Retry', 'teamTag': 'RTY', 'teamGame': self.game.pk, 'logo_upload': logo_id}
+        with mock.patch('core.uploads.stage_upload', side_effect=uploads.UploadError('storage unavailable')):
+            failed = self.client.post(reverse('register'), form)
+        self.assertEqual(failed.status_code, 302)
+        self.assertFalse(Team.objects.filter(name='Retry').exists())
+
+        retry = self.client.post(reverse('register'), form)
+        self.assertFalse(retry.has_header('Idempotent-Replay'))
+        self.assertTrue(Team.objects.get(name='Retry').logo.name)
+
+    def test_validating_handler_keeps_csrf_checks(self):
+        response = Client(enforce_csrf_checks=True).post(reverse('register'), {'teamName': 'Forged'})
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('core.uploads.ValidatingUploadHandler', settings.FILE_UPLOAD_HANDLERS)
+
+
+class NewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        cls.articles = [
+            NewsArticle.objects.create(title=f"Story {i}", date=today - timedelta(days=i), content='body', summary='s')
+            for i in range(12)
+        ]
+        cls.featured = NewsArticle.objects.create(title='Grand Final', date=today - timedelta(days=20),
+                                                  content='body', featured=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_front_page_is_one_query_without_bodies(self):
+        with self.assertNumQueries(1):
+            hero, others = news.front_page()
+        self.assertEqual(hero, self.featured)
+        self.assertEqual(others, self.articles[:6])
+        self.assertIn('content', others[0].get_deferred_fields())
+        with self.assertNumQueries(0):
+            news.front_page()
+
+    def test_save_invalidates_after_commit(self):
+        news.front_page()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.featured.title = 'Grand Final Recap'
+            self.featured.save()
+            self.assertEqual(news.front_page()[0].title, 'Grand Final')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(news.front_page()[0].title, 'Grand Final Recap')
+
+    def test_front_page_falls_back_to_newest(self):
+        NewsArticle.objects.filter(featured=True).update(featured=False)
+        hero, others = news.build_front_page()
+        self.assertEqual(hero, self.articles[0])
+        self.assertEqual(others, self.articles[1:7])
+
+    def test_keyset_pages_cover_every_article_once(self):
+        seen, cursor = [], None
+        while True:
+            articles, cursor = news.page(news.parse_cursor(cursor), size=5)
+            seen += articles
+            if not cursor:
+                break
+        self.assertEqual(seen, sorted(self.articles + [self.featured], key=lambda a: a.date, reverse=True))
+
+    def test_numeric_url_redirects_to_slug(self):
+        article = self.articles[0]
+        self.assertEqual(article.slug, 'story-0')
+        response = self.client.get(reverse('news_detail', args=[article.pk]))
+        self.assertRedirects(response, f'/news/{article.slug}/', status_code=301)
+
+    def test_feeds(self):
+        rss = self.client.get(reverse('news_feed_rss'))
+        self.assertEqual(rss['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertContains(rss, '/news/story-0/')
+        atom = self.client.get(reverse('news_feed_atom'))
+        self.assertContains(atom, 'xmlns="http://www.w3.org/2005/Atom"')
+        with self.assertNumQueries(1):  # ETag stamp only; the body comes from the cache
+            self.client.get(reverse('news_feed_atom'))
+
+
+class ReminderDispatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Reminder Cup', game=game, status='upcoming', start_date=date.today(), end_date=date.today(),
+        )
+        cls.match = Match.objects.create(
+            tournament=tournament, game=game, match_time=timezone.now() + timedelta(minutes=20),
+            team1=Team.objects.create(name='Alpha', game=game), team2=Team.objects.create(name='Bravo', game=game),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_row_per_address_and_notice(self):
+        Reminder.objects.create(match=self.match, email='Fan@Example.com ', notify_minutes_before=30)
+        reminder, created = Reminder.objects.get_or_create(
+            match=self.match, email='fan@example.com', notify_minutes_before=30)
+        self.assertFalse(created)
+
+    def test_only_due_reminders_are_sent_once(self):
+        Reminder.objects.create(match=self.match, email='early@example.com', notify_minutes_before=30)
+        Reminder.objects.create(match=self.match, email='late@example.com', notify_minutes_before=10)
+        self.assertEqual([r.email for r in reminders.due()], ['early@example.com'])
+        self.assertEqual(reminders.send_due(), (1, 0))
+        self.assertEqual(reminders.send_due(), (0, 0))
+        self.assertEqual([m.to for m in mail.outbox], [['early@example.com']])
+        self.assertEqual(reminders.send_due(now=timezone.now() + timedelta(minutes=15)), (1, 0))
+
+    def test_reminders_for_finished_matches_are_not_sent(self):
+        old = Match.objects.create(
+            tournament=self.match.tournament, game=self.match.game, team1=self.match.team1,
+            team2=self.match.team2, match_time=timezone.now() - timedelta(days=30), status='completed',
+        )
+        Reminder.objects.create(match=old, email='stale@example.com', notify_minutes_before=30)
+        Reminder.objects.create(match=self.match, email='early@example.com', notify_minutes_before=30)
+        self.assertEqual([r.email for r in reminders.due()], ['early@example.com'])
+        self.assertEqual(reminders.send_due(), (1, 0))
+        self.assertEqual([m.to for m in mail.outbox], [['early@example.com']])
+        self.assertFalse(Reminder.objects.get(email='stale@example.com').sent)
+
+    def test_finished_matches_are_archived_in_batches(self):
+        old = Match.objects.create(
+            tournament=self.match.tournament, game=self.match.game, team1=self.match.team1,
+            team2=self.match.team2, match_time=timezone.now() - timedelta(days=3), status='completed',
+        )
+        for i in range(5):
+            Reminder.objects.create(match=old, email=f"fan{i}@example.com", sent=i % 2 == 0)
+        Reminder.objects.create(match=self.match, email='upcoming@example.com')
+
+        stats = retention.archive_reminders(batch_size=2, pause=0)
+        self.assertEqual((stats['archived'], stats['batches']), (5, 3))
+        self.assertEqual(list(Reminder.objects.values_list('email', flat=True)), ['upcoming@example.com'])
+        self.assertEqual(ReminderArchive.objects.filter(match_id=old.pk, sent=True).count(), 3)
+        self.assertEqual(retention.archive_reminders(pause=0)['archived'], 0)
+        self.assertEqual(retention.metrics()['archived'], 5)
+
+
+class TaskMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.get_store('cache').clear()
+
+    def test_tick_is_skipped_while_previous_one_holds_the_lock(self):
+        with task_metrics.single_flight('update_match_statuses') as acquired:
+            self.assertTrue(acquired)
+            with self.assertLogs('core.task_metrics', 'WARNING'):
+                self.assertEqual(tasks.update_match_statuses_task(), {'skipped': True})
+        result = tasks.update_match_statuses_task()
+        self.assertEqual(result['reminders_sent'], 0)
+
+        text = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').content.decode()
+        self.assertIn('genze_task_skipped_total{task="update_match_statuses"} 1', text)
+        self.assertIn('genze_task_step_duration_seconds_count{task="update_match_statuses",step="complete"} 1', text)
+
+    def test_minute_tick_completes_matches_and_catch_up_starts_them(self):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Tick Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        teams = {'team1': Team.objects.create(name='Alpha', game=game),
+                 'team2': Team.objects.create(name='Bravo', game=game)}
+        overdue = Match.objects.create(tournament=tournament, game=game, status='upcoming',
+                                       match_time=timezone.now() - timedelta(minutes=2), **teams)
+        finished = Match.objects.create(tournament=tournament, game=game, status='live', team1_score=2,
+                                        team2_score=0, match_time=timezone.now() - timedelta(hours=1), **teams)
+
+        self.assertEqual(tasks.update_match_statuses_task()['completed'], 1)
+        self.assertEqual(Match.objects.get(pk=finished.pk).status, 'completed')
+        self.assertEqual(Match.objects.get(pk=overdue.pk).status, 'upcoming')
+        self.assertEqual(tasks.schedule_match_starts_task()['started'], 1)
+        self.assertEqual(Match.objects.get(pk=overdue.pk).status, 'live')
+
+    def test_histogram_buckets_are_cumulative(self):
+        for seconds in (0.07, 0.3, 40):
+            task_metrics.SMTP_SECONDS.observe(seconds, outcome='sent')
+        text = metrics.render([task_metrics.SMTP_SECONDS])
+        self.assertIn('genze_smtp_send_seconds_bucket{outcome="sent",le="0.1"} 1', text)
+        self.assertIn('genze_smtp_send_seconds_bucket{outcome="sent",le="0.5"} 2', text)
+        self.assertIn('genze_smtp_send_seconds_bucket{outcome="sent",le="+Inf"} 3', text)
+        self.assertIn('genze_smtp_send_seconds_count{outcome="sent"} 3', text)
+
+    def test_scrape_needs_token_from_elsewhere(self):
+        url = reverse('metrics')
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.9').status_code, 403)
+            response = self.client.get(url, REMOTE_ADDR='10.0.0.9',
+                                       HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = metrics.get_store('multiprocess')
+        self.store.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(METRICS_MULTIPROC_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_requests_are_counted_per_route_with_query_counts(self):
+        NewsArticle.objects.create(title='Patch notes', summary='s', content='c', date=date.today())
+        for _ in range(2):
+            self.client.get(reverse('news'))
+        self.client.get('/no-such-page/')
+        text = metrics.render([request_metrics.REQUESTS, request_metrics.QUERIES, request_metrics.CACHE_LOOKUPS])
+        self.assertIn('genze_http_requests_total{route="/news/",method="GET",status="200"} 2', text)
+        self.assertIn('genze_http_requests_total{route="<unmatched>",method="GET",status="404"} 1', text)
+        self.assertIn('genze_http_request_db_queries_count{route="/news/"} 2', text)
+        self.assertIn('genze_http_request_db_queries_bucket{route="/news/",le="0"} 0', text)
+
+    def test_worker_files_are_summed_and_dead_workers_stop_counting_in_flight(self):
+        news_ok = (('route', '/news/'), ('method', 'GET'), ('status', '200'))
+        metrics._write_values(Path(self.directory) / '1.json', {
+            ('genze_http_requests_total', news_ok): 5, ('genze_http_requests_in_flight', ()): 3,
+        })
+        request_metrics.REQUESTS.inc(route='/news/', method='GET', status=200)
+        self.assertEqual(self.store.collect('genze_http_requests_total'), {news_ok: 6})
+        self.assertEqual(self.store.collect('genze_http_requests_in_flight'), {(): 3})
+
+        metrics.mark_process_dead(1, self.directory)
+        self.assertEqual(self.store.collect('genze_http_requests_in_flight'), {})
+        self.assertEqual(self.store.collect('genze_http_requests_total'), {news_ok: 6})
+
+
+class AdminChangelistTests(TestCase):
+    CHANGELISTS = ('tournament', 'match', 'team', 'player', 'reminder', 'tournamentparticipant')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        cls.game, _ = Game.objects.get_or_create(name='Valorant')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_tournament(self, n):
+        tournament = Tournament.objects.create(
+            title=f"Cup {n}", game=self.game, status='upcoming', start_date=date.today(), end_date=date.today(),
+        )
+        team1 = Team.objects.create(name=f"Home {n}", game=self.game)
+        team2 = Team.objects.create(name=f"Away {n}", game=self.game)
+        Player.objects.create(name=f"Player {n}", team=team1)
+        for hours in (1, 2):
+            match = Match.objects.create(tournament=tournament, game=self.game, team1=team1, team2=team2,
+                                         match_time=timezone.now() + timedelta(hours=hours))
+        Reminder.objects.create(match=match, email=f"fan{n}@example.com")
+        TournamentParticipant.objects.create(tournament=tournament, team=team1, manager_name='M',
+                                             manager_email='m@example.com')
+
+    def queries(self, model):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:core_{model}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        self.add_tournament(0)
+        few = {model: self.queries(model) for model in self.CHANGELISTS}
+        for n in range(1, 8):
+            self.add_tournament(n)
+        many = {model: self.queries(model) for model in self.CHANGELISTS}
+        self.assertEqual(many, few)
+
+    def test_tournament_times_come_from_annotations(self):
+        self.add_tournament(0)
+        response = self.client.get(reverse('admin:core_tournament_changelist'), {'o': '4'})
+        self.assertEqual(response.context['cl'].result_list[0].last_match_time,
+                         Match.objects.latest('match_time').match_time)
+
+    def test_match_form_looks_teams_up_instead_of_listing_them(self):
+        self.add_tournament(0)
+        response = self.client.get(reverse('admin:core_match_add'))
+        self.assertNotContains(response, 'Home 0')
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'term': 'Home', 'app_label': 'core', 'model_name': 'match', 'field_name': 'team1'})
+        self.assertEqual([r['text'] for r in response.json()['results']], ['Home 0'])
+
+
+class MatchDayTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Match Day Cup', game=game, status='live', start_date=date.today(), end_date=date.today(),
+        )
+        teams = [Team.objects.create(name=f"Team {i}", game=game) for i in range(8)]
+        cls.matches = [
+            Match.objects.create(tournament=tournament, game=game, team1=teams[2 * i], team2=teams[2 * i + 1],
+                                 match_time=timezone.now() - timedelta(minutes=i), status='live', total_rounds=3)
+            for i in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def match_updates(self, queries):
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "core_match"')]
+
+    def test_advancing_many_rounds_is_one_update(self):
+        ids = [m.pk for m in self.matches]
+        with CaptureQueriesContext(connection) as queries:
+            result = matchday.advance_round(ids)
+        self.assertEqual(result['updated'], 4)
+        self.assertEqual(len(self.match_updates(queries)), 1)
+        self.assertEqual(set(Match.objects.values_list('current_round', 'version')), {(1, 1)})
+
+    def test_score_batch_completes_rates_and_skips_stale_rows(self):
+        first, second, third = self.matches[:3]
+        Match.objects.filter(pk=second.pk).update(version=5)
+        result = matchday.apply_scores(
+            {first.pk: {'version': 0, 'team1_score': 13, 'team2_score': 7},
+             second.pk: {'version': 0, 'team1_score': 1}},
+            complete={first.pk, third.pk},
+        )
+        self.assertEqual(result, {'updated': 2, 'stale': [second.pk], 'completed': 2})
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.team1_score, first.version, first.rated), ('completed', 13, 1, True))
+        self.assertGreater(TeamRating.objects.get(team=first.team1).rating, TeamRating.objects.get(team=first.team2).rating)
+        self.assertIsNone(Match.objects.get(pk=second.pk).team1_score)
+        self.assertEqual(Match.objects.get(pk=third.pk).status, 'completed')
+
+    def test_console_saves_edited_rows_in_one_batch(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin:core_match_match_day')
+        formset = self.client.get(url).context['formset']
+        data = {'form-TOTAL_FORMS': '4', 'form-INITIAL_FORMS': '4'}
+        for i, form in enumerate(formset):
+            for name, value in form.initial.items():
+                data[f'form-{i}-{name}'] = '' if value is None else value
+        data['form-0-team1_score'] = '2'
+        data['form-1-selected'] = 'on'
+        data['op'] = 'complete'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.match_updates(queries)), 1)  # both rows, one bulk_update
+        edited, completed = (Match.objects.get(pk=formset[i].initial['id']) for i in (0, 1))
+        self.assertEqual((edited.team1_score, edited.status), (2, 'live'))
+        self.assertEqual(completed.status, 'completed')
+
+    def test_console_reports_scores_and_advanced_rounds_together(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin:core_match_match_day')
+        formset = self.client.get(url).context['formset']
+        data = {'form-TOTAL_FORMS': '4', 'form-INITIAL_FORMS': '4', 'op': 'advance'}
+        for i, form in enumerate(formset):
+            for name, value in form.initial.items():
+                data[f'form-{i}-{name}'] = '' if value is None else value
+        data['form-0-team1_score'] = '2'
+        data['form-1-selected'] = 'on'
+        response = self.client.post(url, data, follow=True)
+        self.assertContains(response, '2 matches saved or advanced.')
+
+
+class RosterApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        cls.teams = [Team.objects.create(name=f"Roster {i}", game=game, description='long text') for i in range(5)]
+        for team in cls.teams:
+            for n in range(3):
+                Player.objects.create(name=f"{team.name} P{n}", team=team, email='private@example.com')
+
+    def test_pages_are_two_queries_and_follow_the_cursor(self):
+        with self.assertNumQueries(2):
+            results, cursor = rosters.page(size=2)
+        self.assertEqual([t['id'] for t in results], [t.pk for t in self.teams[:2]])
+        self.assertEqual([p['name'] for p in results[0]['players']], ['Roster 0 P0', 'Roster 0 P1', 'Roster 0 P2'])
+
+        seen, url = [], reverse('team_api_list') + '?limit=2'
+        while url:
+            body = self.client.get(url).json()
+            seen += [t['id'] for t in body['results']]
+            url = body['next']
+        self.assertEqual(seen, [t.pk for t in self.teams])
+
+    def test_detail_projects_public_fields(self):
+        response = self.client.get(reverse('team_api_detail', args=[self.teams[0].pk]))
+        body = response.json()
+        self.assertEqual((body['game'], body['description'], len(body['players'])), ('Valorant', 'long text', 3))
+        self.assertNotIn(b'private@example.com', response.content)
+        self.assertNotIn('description', self.client.get(reverse('team_api_list')).json()['results'][0])
+        self.assertEqual(self.client.get(reverse('team_api_detail', args=[999999])).status_code, 404)
+
+
+class ConditionalPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        cls.tournament = Tournament.objects.create(
+            title='Stamp Cup', game=game, status='registration', start_date=date.today(), end_date=date.today(),
+        )
+        cls.team = Team.objects.create(name='Newcomers', game=game)
+
+    def test_new_registration_changes_tournament_etag(self):
+        url = reverse('tournament_detail', args=[self.tournament.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        TournamentParticipant.objects.create(tournament=self.tournament, team=self.team, manager_name='M',
+                                             manager_email='m@example.com')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Newcomers')
+
+    def test_public_feed_etag_is_the_same_for_every_visitor(self):
+        url = reverse('team_calendar_feed', args=[self.team.pk])
+        anonymous = self.client.get(url)
+        self.assertTrue(anonymous['Cache-Control'].startswith('public'))
+        user = User.objects.create_user('fan', 'fan@example.com', 'pw')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url)['ETag'], anonymous['ETag'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=anonymous['ETag']).status_code, 304)
+        # pages with per-user bits still vary
+        page = reverse('tournament_detail', args=[self.tournament.pk])
+        self.assertNotEqual(self.client.get(page)['ETag'], Client().get(page)['ETag'])
+
+
+class SharedCacheTests(TestCase):
+    def test_per_process_cache_is_an_error_when_a_shared_one_is_required(self):
+        self.assertFalse(shared_cache.is_shared())
+        with override_settings(SHARED_CACHE_REQUIRED=True):
+            self.assertEqual([e.id for e in shared_cache.check_shared_cache()], ['core.E001'])
+        with override_settings(SHARED_CACHE_REQUIRED=True, CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/1'}}):
+            self.assertEqual(shared_cache.check_shared_cache(), [])
+
+    @override_settings(SHARED_CACHE_REQUIRED=True, RATE_LIMIT_STORE='cache', METRICS_STORE='cache')
+    def test_cache_users_refuse_a_per_process_cache_when_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ratelimit.get_store()
+        with self.assertRaises(ImproperlyConfigured):
+            metrics.get_store()
+        with self.assertRaises(ImproperlyConfigured):
+            with task_metrics.single_flight('update_match_statuses'):
+                pass
+        self.assertIsInstance(metrics.get_store('multiprocess'), metrics.MultiprocessMetricStore)
+
+    def test_viewer_samples_are_written_directly_without_a_shared_cache(self):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Viewer Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        match = Match.objects.create(
+            tournament=tournament, game=game, status='live', match_time=timezone.now(),
+            team1=Team.objects.create(name='Alpha', game=game), team2=Team.objects.create(name='Bravo', game=game),
+        )
+        self.assertIsInstance(viewers.default_store, viewers.DirectViewerStore)
+        viewers.default_store.record_many([(match.pk, 1500)])
+        self.assertEqual(Match.objects.get(pk=match.pk).viewer_label, '1.5K viewers')
+        self.assertEqual(viewers.flush(viewers.default_store), 0)
+
+    def test_ingest_flushes_while_the_stream_is_quiet(self):
+        from django.core.management import call_command
+        from core.management.commands import ingest_viewer_counts
+        flushed, quiet = [], {}
+
+        def recording_flush(store):
+            flushed.append(store.drain())
+            return len(flushed[-1])
+
+        def quiet_stream():
+            yield '{"match": 7, "viewers": 1200}\n'
+            # no more lines, and no EOF, until the timer has flushed the sample
+            for _ in range(200):
+                if any(flushed):
+                    break
+                time.sleep(0.01)
+            quiet['flushed_before_eof'] = any(flushed)
+
+        out = io.StringIO()
+        with mock.patch.object(ingest_viewer_counts, 'flush', side_effect=recording_flush), \
+                mock.patch('sys.stdin', quiet_stream()):
+            call_command('ingest_viewer_counts', interval=0.05, stdout=out)
+        self.assertTrue(quiet['flushed_before_eof'])
+        self.assertEqual([batch for batch in flushed if batch], [{7: 1200}])
+        self.assertIn('Ingested 1 samples', out.getvalue())
+
+
+class ScoringTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Score Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        cls.match = Match.objects.create(
+            tournament=tournament, game=game, status='live', match_time=timezone.now(),
+            team1=Team.objects.create(name='Alpha', game=game), team2=Team.objects.create(name='Bravo', game=game),
+        )
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+
+    def test_concurrent_increments_and_stale_edit(self):
+        # two feeds read version 0, then both add a point: neither add is lost
+        seen = Match.objects.get(pk=self.match.pk).version
+        scoring.increment(self.match.pk, points_team1=1)
+        row = scoring.increment(self.match.pk, points_team1=1, viewer_count=40)
+        self.assertEqual((row['points_team1'], row['viewer_count'], row['version']), (2, 40, seen + 2))
+        # an absolute edit based on the version read before them is refused
+        with self.assertRaises(scoring.StaleScoreError) as stale:
+            scoring.set_scores(self.match.pk, seen, team1_score=1)
+        self.assertEqual(stale.exception.current_version, seen + 2)
+        self.assertEqual(scoring.set_scores(self.match.pk, seen + 2, team1_score=1), seen + 3)
+        with self.assertRaises(ValueError):
+            scoring.increment(self.match.pk, viewer_count=-41)
+
+    def test_score_endpoint_rejects_negatives_and_stale_versions(self):
+        self.client.force_login(self.admin)
+        url = reverse('match_score_update', args=[self.match.pk])
+        self.assertEqual(self.client.post(url, {'op': 'set', 'version': 0, 'team1_score': -1}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'op': 'increment', 'viewer_count': -5}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'op': 'set', 'version': 0, 'team1_score': 2}).status_code, 200)
+        stale = self.client.post(url, {'op': 'set', 'version': 0, 'team2_score': 1})
+        self.assertEqual((stale.status_code, stale.json()['version']), (409, 1))
+
+    def test_score_write_runs_the_save_follow_up(self):
+        Match.objects.filter(pk=self.match.pk).update(status='completed')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            scoring.set_scores(self.match.pk, 0, team1_score=2, team2_score=0)
+        self.assertEqual(len(callbacks), 1)  # calendar months, after commit
+        self.assertTrue(Match.objects.get(pk=self.match.pk).rated)
+        alpha = TeamRating.objects.get(team__name='Alpha')
+        self.assertGreater(alpha.rating, TeamRating.objects.get(team__name='Bravo').rating)
+
+
+class BulkImportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Round Trip Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        alpha, bravo = Team.objects.create(name='Alpha', game=game), Team.objects.create(name='Bravo', game=game)
+        Match.objects.create(tournament=tournament, game=game, team1=alpha, team2=bravo, status='completed',
+                             team1_score=2, team2_score=1, stage='Group A', match_time=timezone.now())
+
+    def export_csv(self, entity):
+        return ''.join(bulk.export_lines(entity, 'csv'))
+
+    def import_csv(self, entity, text):
+        return bulk.Importer(entity).run(bulk.read_rows('csv', io.StringIO(text)))
+
+    def test_csv_round_trip_resolves_natural_keys(self):
+        text = self.export_csv('matches')
+        self.assertIn('Round Trip Cup,Alpha,Bravo,Valorant,', text)
+        self.assertEqual(self.import_csv('matches', text)['unchanged'], 1)
+
+        original = Match.objects.values('tournament_id', 'team1_id', 'team2_id', 'match_time', 'stage').get()
+        Match.objects.all().delete()
+        self.assertEqual(self.import_csv('matches', text)['created'], 1)
+        self.assertEqual(
+            Match.objects.values('tournament_id', 'team1_id', 'team2_id', 'match_time', 'stage').get(), original,
+        )
+        self.assertEqual(self.export_csv('matches'), text)
+
+        stats = self.import_csv('matches', text.replace(',completed,Group A,2,1,', ',completed,Group A,3,1,'))
+        self.assertEqual((stats['updated'], stats['created']), (1, 0))
+        self.assertEqual(Match.objects.get().team1_score, 3)
+
+    def test_unknown_team_is_a_row_error(self):
+        text = self.export_csv('matches').replace(',Bravo,', ',Charlie,')
+        importer = bulk.Importer('matches', check_conflicts=False)
+        stats = importer.run(bulk.read_rows('csv', io.StringIO(text)))
+        self.assertEqual(stats['errors'], 1)
+        self.assertIn("unknown team 'Charlie'", importer.errors[0][1])
+
+    def test_imported_results_are_rated(self):
+        text = self.export_csv('matches')
+        Match.objects.all().delete()
+        TeamRating.objects.all().delete()
+        importer = bulk.Importer('matches')
+        importer.run(bulk.read_rows('csv', io.StringIO(text)))
+        self.assertEqual((importer.rated, importer.replay_queued), (1, False))
+        self.assertTrue(Match.objects.get().rated)
+        alpha, bravo = (TeamRating.objects.get(team__name=name) for name in ('Alpha', 'Bravo'))
+        self.assertGreater(alpha.rating, bravo.rating)
+        self.assertEqual(Team.objects.get(name='Alpha').rating, alpha.rating)
+
+        # an earlier result than one already rated, and a corrected one, need a replay
+        earlier = text.replace(',Alpha,Bravo,', ',Bravo,Alpha,').replace(
+            str(timezone.now().year), str(timezone.now().year - 1))
+        with mock.patch('core.ratings.replay_later') as replay_later:
+            importer = bulk.Importer('matches', check_conflicts=False)
+            importer.run(bulk.read_rows('csv', io.StringIO(earlier)))
+        self.assertEqual((importer.rated, importer.replay_queued, replay_later.call_count), (1, True, 1))
+        with mock.patch('core.ratings.replay_later') as replay_later:
+            importer = bulk.Importer('matches')
+            importer.run(bulk.read_rows('csv', io.StringIO(text.replace(',2,1,', ',0,2,'))))
+        self.assertEqual((importer.rated, replay_later.call_count), (0, 1))
+
+
+class BracketTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        cls.tournament = Tournament.objects.create(
+            title='Bracket Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        cls.team_ids = [Team.objects.create(name=f"Seed {i}", game=game).pk for i in range(1, 9)]
+
+    def generate(self, format, team_ids=None):
+        return brackets.generate_stage(self.tournament, format, timezone.now(), timedelta(hours=2),
+                                       team_ids=team_ids or self.team_ids)
+
+    def play(self, match, team1_wins=True):
+        match.team1_score, match.team2_score = (2, 0) if team1_wins else (0, 2)
+        match.status = 'completed'
+        match.save()
+
+    def test_double_elimination_plays_out_in_2n_minus_2_matches(self):
+        stage, created = self.generate('double_elimination')
+        self.assertEqual(created, 4)  # only upper round 1 is known up front
+        self.assertEqual(stage.total_rounds, 3 + 4 + 1)
+        self.assertEqual(stage.nodes.count(), 7 + 6 + 1)
+        while True:
+            pending = list(Match.objects.filter(tournament_stage=stage, status='upcoming').order_by('pk'))
+            if not pending:
+                break
+            for match in pending:
+                self.play(match)
+        self.assertEqual(Match.objects.filter(tournament_stage=stage).count(), 2 * 8 - 2)
+        final = stage.nodes.get(bracket='grand_final')
+        self.assertEqual(final.winner_id, self.team_ids[0])
+
+    def test_upper_losers_drop_into_the_lower_bracket(self):
+        stage, _ = self.generate('double_elimination')
+        first, second = (node.match for node in stage.nodes.filter(bracket='upper', round_number=1)
+                         .select_related('match').order_by('position')[:2])
+        self.play(first)
+        lower = stage.nodes.get(bracket='lower', round_number=1, position=0)
+        self.assertEqual((lower.team1_id, lower.team2_id, lower.match_id), (first.team2_id, None, None))
+        self.play(second, team1_wins=False)
+        lower.refresh_from_db()
+        self.assertEqual((lower.team1_id, lower.team2_id), (first.team2_id, second.team1_id))
+        self.assertIsNotNone(lower.match_id)
+
+    def test_single_elimination_byes_advance_top_seeds(self):
+        stage, created = self.generate('single_elimination', self.team_ids[:6])
+        self.assertEqual(created, 2)  # seeds 1 and 2 sit out round 1
+        semifinals = stage.nodes.filter(round_number=2).order_by('position')
+        self.assertEqual([node.team1_id for node in semifinals], self.team_ids[:2])
+
+
+class RatingTests(TestCase):
+    def test_elo_delta(self):
+        self.assertAlmostEqual(ratings.elo_delta(1500, 1500, 1.0), 16.0)
+        self.assertAlmostEqual(ratings.elo_delta(1500, 1500, 0.5), 0.0)
+        # the favourite gains less for a win than it loses for a defeat
+        self.assertAlmostEqual(ratings.elo_delta(1700, 1500, 1.0), 32 * (1 - 1 / (1 + 10 ** -0.5)))
+        self.assertLess(ratings.elo_delta(1700, 1500, 1.0), -ratings.elo_delta(1700, 1500, 0.0))
+
+    def test_replay_matches_incremental_ratings(self):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Elo Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        teams = [Team.objects.create(name=name, game=game) for name in ('Alpha', 'Bravo', 'Charlie')]
+        start = timezone.now() - timedelta(days=1)
+        results = [(0, 1, 2, 0), (1, 2, 1, 1), (2, 0, 2, 1), (0, 2, 0, 2), (1, 0, 2, 1)]
+        for i, (a, b, score1, score2) in enumerate(results):
+            Match.objects.create(tournament=tournament, game=game, team1=teams[a], team2=teams[b],
+                                 status='completed', team1_score=score1, team2_score=score2,
+                                 match_time=start + timedelta(hours=i))
+        incremental = dict(TeamRating.objects.values_list('team_id', 'rating'))
+        self.assertEqual(set(incremental), {team.pk for team in teams})
+
+        self.assertEqual(ratings.replay(), (5, 3))
+        replayed = dict(TeamRating.objects.values_list('team_id', 'rating'))
+        for team_id, rating in incremental.items():
+            self.assertAlmostEqual(replayed[team_id], rating)
+        self.assertAlmostEqual(sum(replayed.values()), 3 * ratings.BASE_RATING)
+
+    def test_ranking_uses_the_rating_in_the_team_game(self):
+        valorant, _ = Game.objects.get_or_create(name='Valorant')
+        dota, _ = Game.objects.get_or_create(name='Dota2')
+        alpha = Team.objects.create(name='Alpha', game=valorant)
+        bravo = Team.objects.create(name='Bravo', game=None)
+        TeamRating.objects.create(team=alpha, game=valorant, rating=1600, matches_played=1)
+        TeamRating.objects.create(team=alpha, game=dota, rating=1400, matches_played=9)
+        TeamRating.objects.create(team=bravo, game=dota, rating=1450, matches_played=2)
+        self.assertEqual(ratings.sync_team_ratings(), 2)
+        self.assertEqual(dict(Team.objects.values_list('name', 'rating')), {'Alpha': 1600, 'Bravo': 1450})
+        alpha.game = Game.objects.create(name='Fortnite')
+        alpha.save()
+        alpha.refresh_from_db()
+        self.assertEqual(alpha.rating, 1400)
+
+    def test_completed_match_updates_the_team_rating(self):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Elo Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        alpha, bravo = (Team.objects.create(name=name, game=game) for name in ('Alpha', 'Bravo'))
+        Match.objects.create(tournament=tournament, game=game, team1=alpha, team2=bravo, status='completed',
+                             team1_score=2, team2_score=0, match_time=timezone.now())
+        alpha.refresh_from_db()
+        self.assertEqual(alpha.rating, TeamRating.objects.get(team=alpha).rating)
+        self.assertGreater(alpha.rating, ratings.BASE_RATING)
+        response = self.client.get('/teams/')
+        self.assertEqual([t.name for t in response.context['teams']][:2], ['Alpha', 'Bravo'])
+
+    def test_corrected_result_replays_the_ratings(self):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Elo Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        alpha, bravo = (Team.objects.create(name=name, game=game) for name in ('Alpha', 'Bravo'))
+        match = Match.objects.create(tournament=tournament, game=game, team1=alpha, team2=bravo, status='completed',
+                                     team1_score=2, team2_score=0, match_time=timezone.now())
+        with mock.patch('core.tasks.replay_ratings_task.delay', side_effect=lambda: ratings.replay()) as replay:
+            with self.captureOnCommitCallbacks(execute=True):
+                match.team1_score, match.team2_score = 0, 2
+                match.save()
+            self.assertEqual(replay.call_count, 1)
+            self.assertGreater(TeamRating.objects.get(team=bravo).rating, TeamRating.objects.get(team=alpha).rating)
+            self.assertEqual(TeamRating.objects.get(team=bravo).matches_played, 1)
+
+            match.refresh_from_db()
+            with self.captureOnCommitCallbacks(execute=True):
+                scoring.set_scores(match.pk, match.version, team1_score=3, team2_score=0)
+            self.assertEqual(replay.call_count, 2)
+            self.assertGreater(Team.objects.get(pk=alpha.pk).rating, Team.objects.get(pk=bravo.pk).rating)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                scoring.set_scores(match.pk, match.version + 1, current_round=3)
+            self.assertEqual(replay.call_count, 2)
+
+
+@override_settings(MATCH_DURATION_MINUTES={'default': 60, 'Valorant': 90}, MAX_MATCHES_PER_TOURNAMENT_DAY=2)
+class ScheduleConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        cls.tournament = Tournament.objects.create(
+            title='Clash Cup', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        cls.alpha, cls.bravo, cls.charlie = (Team.objects.create(name=name, game=game)
+                                             for name in ('Alpha', 'Bravo', 'Charlie'))
+        cls.start = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        cls.match = Match.objects.create(tournament=cls.tournament, game=game, team1=cls.alpha, team2=cls.bravo,
+                                         match_time=cls.start)
+
+    def test_overlap_uses_the_game_duration(self):
+        teams = [self.alpha.pk, self.charlie.pk]
+        conflicts = schedule_conflicts.find_conflicts(teams, self.start + timedelta(minutes=89), 'Valorant')
+        self.assertEqual([(c.team_id, c.other_id) for c in conflicts], [(self.alpha.pk, self.match.pk)])
+        self.assertEqual(schedule_conflicts.find_conflicts(teams, self.start + timedelta(minutes=90), 'Valorant'), [])
+        # the new match's own length counts too: 60 minutes before is back to back, 59 overlaps
+        self.assertEqual(schedule_conflicts.find_conflicts(teams, self.start - timedelta(minutes=60), 'Other'), [])
+        self.assertEqual(len(schedule_conflicts.find_conflicts(teams, self.start - timedelta(minutes=59), 'Other')), 1)
+        # editing a match doesn't conflict with itself
+        self.assertEqual(schedule_conflicts.find_conflicts(
+            [self.alpha.pk, self.bravo.pk], self.start, 'Valorant', exclude_id=self.match.pk), [])
+
+    def test_interval_index_agrees_with_the_db_check(self):
+        index = schedule_conflicts.load_intervals()
+        end = self.start + timedelta(minutes=150)
+        self.assertEqual(len(index.check_and_add([self.bravo.pk], self.start + timedelta(minutes=60), end)), 1)
+        self.assertEqual(index.check_and_add([self.bravo.pk], self.start + timedelta(minutes=90), end), [])
+        self.assertEqual(len(index.check_and_add([self.bravo.pk], self.start + timedelta(minutes=100), end)), 1)
+
+    def test_batch_check_matches_one_by_one_inserts(self):
+        hour = timedelta(minutes=60)
+        # out of order, one overlapping a stored match and one overlapping another new row
+        batch = [((self.charlie.pk,), self.start + 5 * hour, self.start + 6 * hour, None),
+                 ((self.alpha.pk, self.charlie.pk), self.start + 2 * hour, self.start + 3 * hour, None),
+                 ((self.bravo.pk,), self.start + hour / 2, self.start + 2 * hour, None),
+                 ((self.charlie.pk,), self.start + 2 * hour + hour / 2, self.start + 4 * hour, None)]
+        index = schedule_conflicts.load_intervals()
+        self.assertEqual([len(c) for c in index.check_batch(batch)], [0, 0, 1, 1])
+        reference = schedule_conflicts.load_intervals()
+        for team_ids, start, end, _ in sorted(batch, key=lambda row: row[1]):
+            reference.check_and_add(team_ids, start, end)
+        self.assertEqual(dict(index._by_team), dict(reference._by_team))
+
+    def test_audit_reports_overlaps_and_overbooked_days(self):
+        for offset, teams in ((30, (self.bravo, self.charlie)), (240, (self.charlie, self.alpha))):
+            Match.objects.create(tournament=self.tournament, game=self.tournament.game, team1=teams[0],
+                                 team2=teams[1], match_time=self.start + timedelta(minutes=offset))
+        findings = list(schedule_conflicts.audit())
+        overlaps = [f for kind, f in findings if kind == 'overlap']
+        self.assertEqual([(c.team_id, c.other_id) for c in overlaps], [(self.bravo.pk, self.match.pk)])
+        self.assertEqual([f for kind, f in findings if kind == 'overbooked'],
+                         [(self.tournament.pk, self.start.date(), 3)])
+
+
+class ICalTests(TestCase):
+    def test_fold_keeps_lines_within_75_octets_without_splitting_characters(self):
+        line = 'DESCRIPTION:' + 'Финал • 決勝戦 • ' * 8
+        folded = ical._fold(line)
+        self.assertTrue(folded.endswith('\r\n'))
+        physical = folded[:-2].split('\r\n')
+        self.assertGreater(len(physical), 1)
+        for i, part in enumerate(physical):
+            self.assertLessEqual(len(part.encode('utf-8')), 75)
+            if i:
+                self.assertTrue(part.startswith(' '))
+        # unfolding (CRLF + one space removed) gives the line back
+        self.assertEqual(folded[:-2].replace('\r\n ', ''), line)
+        self.assertEqual(ical._fold('SUMMARY:short'), 'SUMMARY:short\r\n')
+
+    def test_team_feed(self):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        tournament = Tournament.objects.create(
+            title='Кубок; Finals', game=game, status='ongoing', start_date=date.today(), end_date=date.today(),
+        )
+        alpha = Team.objects.create(name='Alpha', game=game)
+        Match.objects.create(tournament=tournament, game=game, team1=alpha,
+                             team2=Team.objects.create(name='Bravo', game=game), status='completed',
+                             team1_score=2, team2_score=1, match_time=timezone.now())
+        response = self.client.get(reverse('team_calendar_feed', args=[alpha.pk]))
+        self.assertEqual(response['Content-Type'], ical.CONTENT_TYPE)
+        body = b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+        self.assertIn('SUMMARY:Alpha vs Bravo (2-1)\r\n', body)
+        self.assertIn('DESCRIPTION:Кубок\\; Finals • Valorant\r\n', body)
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n') and body.endswith('END:VCALENDAR\r\n'))
+
+
+class CalendarGridTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        game, _ = Game.objects.get_or_create(name='Valorant')
+        other, _ = Game.objects.get_or_create(name='Dota2')
+        tournament = Tournament.objects.create(
+            title='Grid Cup', game=game, status='ongoing', start_date=date(2026, 3, 1), end_date=date(2026, 3, 31),
+        )
+        cls.alpha, bravo = Team.objects.create(name='Alpha', game=game), Team.objects.create(name='Bravo', game=game)
+        common = dict(tournament=tournament, team1=cls.alpha, team2=bravo)
+        cls.match = Match.objects.create(match_time=cls.at(5, 18), status='completed', game=game, **common)
+        Match.objects.create(match_time=cls.at(5, 21), status='upcoming', game=other, **common)
+        Match.objects.create(match_time=cls.at(20, 12), status='upcoming', **common)
+
+    @staticmethod
+    def at(day, hour, month=3):
+        return timezone.make_aware(datetime(2026, month, day, hour))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_days_counts_and_game_filter(self):
+        days = calendar_grid.month_grid(2026, 3)
+        self.assertEqual(len(days), 31)
+        self.assertEqual(days[0]['date'], date(2026, 3, 1))
+        self.assertEqual(days[4]['counts'], {'upcoming': 1, 'live': 0, 'completed': 1})
+        self.assertEqual([m['team1'] for m in days[4]['matches']], ['Alpha', 'Alpha'])
+        # a match without its own game falls back to the tournament's
+        valorant = calendar_grid.month_grid(2026, 3, 'valorant')
+        self.assertEqual((valorant[4]['counts']['upcoming'], valorant[19]['counts']['upcoming']), (0, 1))
+        self.assertEqual(len(calendar_grid.month_grid(2026, 2)), 28)
+
+    def test_cached_until_a_match_or_team_in_it_changes(self):
+        calendar_grid.month_grid(2026, 3)
+        with self.assertNumQueries(0):
+            calendar_grid.month_grid(2026, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.match.match_time = self.at(2, 18, month=4)
+            self.match.save()
+        self.assertEqual(calendar_grid.month_grid(2026, 3)[4]['counts']['completed'], 0)
+        self.assertEqual(calendar_grid.month_grid(2026, 4)[1]['counts']['completed'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alpha.name = 'Alpha Prime'
+            self.alpha.save()
+        self.assertEqual(calendar_grid.month_grid(2026, 3)[19]['matches'][0]['team1'], 'Alpha Prime')
+
+        response = self.client.get(reverse('calendar_month_data'), {'year': 2026, 'month': 3})
+        self.assertEqual(response.json()['days'][19]['matches'][0]['team1'], 'Alpha Prime')
+
+    def test_invalidation_waits_for_commit(self):
+        calendar_grid.month_grid(2026, 3)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.match.status = 'live'
+            self.match.save()
+            bulk.Importer('teams').run([{'name': 'Alpha', 'game': 'Valorant', 'tag': 'ALP'}])
+            # a grid built before commit is still the cached one
+            with self.assertNumQueries(0):
+                self.assertEqual(calendar_grid.month_grid(2026, 3)[4]['counts']['completed'], 1)
+        self.assertEqual(len(callbacks), 2)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(calendar_grid.month_grid(2026, 3)[4]['counts']['live'], 1)
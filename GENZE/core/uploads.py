@@ -0,0 +1,315 @@
+# core/uploads.py
+"""
+Image uploads for team registration.
+
+Two ways in, one way out:
+
+* Chunked / resumable: the registration form's script starts an upload
+  (start()), sends the file in pieces to a temp area (append(), each piece
+  streamed to disk and checked against the declared size; the first piece
+  must carry an image signature) and submits only the upload id with the
+  form. An interrupted upload resumes from status()['received']. The
+  upload's state sits next to its part as <id>.json in UPLOAD_TEMP_DIR, so
+  whichever worker gets the next piece can see it (the part file already
+  has to be there).
+* Plain multipart (no JS): views decorated with validating_uploads put
+  ValidatingUploadHandler in front of Django's own handlers for that
+  request only; it checks the signature on the first chunk and the running
+  size on every chunk, so an oversized or non-image file is dropped while
+  it streams instead of after it has been buffered. Other views (admin
+  imports) keep the default handlers.
+
+Either way the view only moves finished files into storage (stage_upload(),
+stage_file()) and creates the rows; resizing and EXIF stripping run
+afterwards in process_registration_images_task (core.tasks), so the
+request isn't held up by image work.
+"""
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from functools import wraps
+from itertools import chain
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+logger = logging.getLogger(__name__)
+
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png', 'png'),
+    (b'GIF87a', 'image/gif', 'gif'),
+    (b'GIF89a', 'image/gif', 'gif'),
+)
+
+# kind -> (upload_to of the model field, longest side after processing)
+KINDS = {
+    'logo': ('team_logos/', 512),
+    'banner': ('team_banners/', 1920),
+    'avatar': ('player_avatars/', 512),
+}
+
+
+class UploadError(Exception):
+    pass
+
+
+def max_bytes():
+    return getattr(settings, 'UPLOAD_MAX_IMAGE_BYTES', 10 * 1024 * 1024)
+
+
+def temp_dir():
+    path = Path(getattr(settings, 'UPLOAD_TEMP_DIR', Path(settings.BASE_DIR) / 'upload_tmp'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def sniff(head):
+    """(content type, extension) from the first bytes of a file, or None."""
+    for signature, content_type, ext in SIGNATURES:
+        if head.startswith(signature):
+            return content_type, ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp', 'webp'
+    return None
+
+
+# ---- multipart path ----------------------------------------------------------
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """
+    Passes chunks through to the memory/temp file handlers behind it, but
+    skips any file that isn't an image or grows past UPLOAD_MAX_IMAGE_BYTES.
+    The view sees skipped files as missing.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._seen = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and sniff(raw_data[:16]) is None:
+            logger.info("Rejected upload %r: not an image", self.file_name)
+            raise SkipFile()
+        self._seen += len(raw_data)
+        if self._seen > max_bytes():
+            logger.info("Rejected upload %r: over %d bytes", self.file_name, max_bytes())
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def validating_uploads(view):
+    """
+    View decorator: ValidatingUploadHandler first for this request's files.
+    CsrfViewMiddleware reads request.POST -- parsing the upload -- before the
+    view runs, so the view is csrf_exempt while the handler goes in and CSRF
+    is checked by csrf_protect right after. Goes above the decorators that
+    read request.POST (idempotent, rate_limited).
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        request.upload_handlers.insert(0, ValidatingUploadHandler(request))
+        return protected(request, *args, **kwargs)
+    return wrapped
+
+
+# ---- chunked path ------------------------------------------------------------
+
+def owner(request):
+    """Uploads belong to the session that started them; make sure there is one."""
+    if not request.session.session_key:
+        request.session.save()
+    return request.session.session_key
+
+
+def _state_path(upload_id):
+    return temp_dir() / f"{upload_id}.json"
+
+
+def _part_path(upload_id):
+    return temp_dir() / f"{upload_id}.part"
+
+
+def start(kind, size, owner):
+    """Register a new upload of `size` bytes. Returns its id."""
+    if kind not in KINDS:
+        raise UploadError(f"Unknown upload kind {kind!r}")
+    if size <= 0 or size > max_bytes():
+        raise UploadError(f"Files must be between 1 byte and {max_bytes() // (1024 * 1024)} MB")
+    upload_id = uuid.uuid4().hex
+    _part_path(upload_id).touch()
+    _save_state(upload_id, {'kind': kind, 'size': size, 'owner': owner, 'ext': None, 'created': time.time()})
+    return upload_id
+
+
+def _save_state(upload_id, state):
+    # written aside and renamed over, so a reader never sees half a file
+    pending = temp_dir() / f"{upload_id}.{uuid.uuid4().hex}.tmp"
+    pending.write_text(json.dumps(state))
+    os.replace(pending, _state_path(upload_id))
+
+
+def _state(upload_id, owner):
+    state = None
+    if upload_id and upload_id.isalnum():
+        try:
+            state = json.loads(_state_path(upload_id).read_text())
+        except (FileNotFoundError, ValueError):
+            pass
+    expired = state and state['created'] + getattr(settings, 'UPLOAD_TTL', 24 * 60 * 60) < time.time()
+    if state is None or expired or state['owner'] != owner:
+        raise UploadError("Unknown or expired upload")
+    return state
+
+
+def status(upload_id, owner):
+    state = _state(upload_id, owner)
+    received = _part_path(upload_id).stat().st_size
+    return {'id': upload_id, 'kind': state['kind'], 'size': state['size'], 'received': received,
+            'complete': received == state['size']}
+
+
+def append(upload_id, owner, offset, stream, block_size=64 * 1024):
+    """
+    Write the next piece from `stream` (read in blocks, never buffered whole)
+    at `offset`, which must equal the bytes received so far. Returns bytes received.
+    """
+    state = _state(upload_id, owner)
+    path = _part_path(upload_id)
+    received = path.stat().st_size
+    if offset != received:
+        raise UploadError(f"Expected offset {received}")
+    with open(path, 'ab') as part:
+        while True:
+            block = stream.read(block_size)
+            if not block:
+                break
+            if received == 0 and state['ext'] is None:
+                sniffed = sniff(block[:16])
+                if sniffed is None:
+                    raise UploadError("Only JPEG, PNG, GIF and WebP images are accepted")
+                state['ext'] = sniffed[1]
+                _save_state(upload_id, state)
+            if received + len(block) > state['size']:
+                part.truncate(offset)
+                raise UploadError("More data than the declared size")
+            part.write(block)
+            received += len(block)
+    return received
+
+
+def discard(upload_id):
+    _state_path(upload_id).unlink(missing_ok=True)
+    _part_path(upload_id).unlink(missing_ok=True)
+
+
+# ---- into storage ------------------------------------------------------------
+
+def stage_upload(upload_id, owner, kind):
+    """Move a completed chunked upload into storage. Returns the stored name."""
+    state = _state(upload_id, owner)
+    info = status(upload_id, owner)
+    if state['kind'] != kind or not info['complete'] or not state['ext']:
+        raise UploadError("Upload is incomplete")
+    with open(_part_path(upload_id), 'rb') as part:
+        name = default_storage.save(f"{KINDS[kind][0]}{upload_id}.{state['ext']}", File(part))
+    discard(upload_id)
+    return name
+
+
+def stage_file(uploaded, kind):
+    """Store an already-validated multipart upload (temp-file backed uploads are moved, not copied)."""
+    sniffed = sniff(uploaded.read(16))
+    uploaded.seek(0)
+    if sniffed is None:
+        raise UploadError("Only JPEG, PNG, GIF and WebP images are accepted")
+    return default_storage.save(f"{KINDS[kind][0]}{uuid.uuid4().hex}.{sniffed[1]}", uploaded)
+
+
+def purge_stale(max_age=None):
+    """Delete temp parts and state of uploads that were never finished. Returns files removed."""
+    max_age = max_age or getattr(settings, 'UPLOAD_TTL', 24 * 60 * 60)
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in chain(*(temp_dir().glob(pattern) for pattern in ('*.part', '*.json', '*.tmp'))):
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+# ---- post-processing (Celery) ----------------------------------------------------
+
+def process_image(name, kind):
+    """
+    Re-encode a stored image: apply and drop EXIF orientation, strip metadata,
+    shrink to the kind's longest side. Returns the new stored name (or `name`
+    if it couldn't be processed).
+    """
+    from PIL import Image, ImageOps  # only the worker pays for Pillow
+
+    longest = KINDS[kind][1]
+    try:
+        with default_storage.open(name, 'rb') as stored, Image.open(stored) as image:
+            fmt = image.format or 'PNG'
+            if getattr(image, 'is_animated', False):
+                return name  # leave animated GIF/WebP as uploaded
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((longest, longest))
+            if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            out = io.BytesIO()
+            # no exif=/pnginfo= passed, so metadata isn't carried over
+            image.save(out, format=fmt, **({'quality': 85, 'optimize': True} if fmt == 'JPEG' else {}))
+    except Exception as e:
+        logger.warning("Could not process %s: %s", name, e)
+        return name
+    stem, ext = os.path.splitext(name)
+    new_name = default_storage.save(f"{stem}_p{ext}", File(io.BytesIO(out.getvalue())))
+    default_storage.delete(name)
+    return new_name
+
+
+def enqueue_processing(team_id):
+    from .tasks import process_registration_images_task
+    try:
+        process_registration_images_task.delay(team_id)
+    except Exception as e:
+        # Broker down: the images stay as uploaded (already validated), just unprocessed
+        logger.warning("Could not queue image processing for team %s: %s", team_id, e)
+        return False
+    return True
+
+
+def process_team_images(team_id):
+    """Process a registered team's logo, banner and player avatars. Returns images processed."""
+    from .models import Team, Player
+
+    team = Team.objects.only('id', 'logo', 'banner').get(pk=team_id)
+    updates = {}
+    for field, kind in (('logo', 'logo'), ('banner', 'banner')):
+        name = getattr(team, field).name
+        if name:
+            updates[field] = process_image(name, kind)
+    if updates:
+        Team.objects.filter(pk=team_id).update(**updates)
+
+    players = list(Player.objects.filter(team_id=team_id).exclude(avatar='').exclude(avatar__isnull=True).only('id', 'avatar'))
+    for player in players:
+        player.avatar = process_image(player.avatar.name, 'avatar')
+    if players:
+        Player.objects.bulk_update(players, ['avatar'])
+    return len(updates) + len(players)
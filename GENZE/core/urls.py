@@ -12,14 +12,28 @@ urlpatterns = [
     path('register/', views.register_page, name='register'),
     path('tournaments/<int:pk>/', views.tournament_detail_page, name='tournament_detail'),
     path('news/<int:pk>/', views.news_detail, name='news_detail'),
+    path('news/feed/rss/', views.news_feed, {'fmt': 'rss'}, name='news_feed_rss'),
+    path('news/feed/atom/', views.news_feed, {'fmt': 'atom'}, name='news_feed_atom'),
+    path('news/<slug:slug>/', views.news_detail_slug, name='news_detail_slug'),
     path('news/', views.news_page, name='news'),
     path('schedule/', views.schedule_page, name='schedule'),
     path('results/', views.results_page, name='results'),
     path('create-reminder/', views.create_reminder, name='create_reminder'),
     path('delete-reminder/<int:pk>/', views.delete_reminder, name='delete_reminder'),
+    path('api/matches/<int:pk>/score/', views.match_score_update, name='match_score_update'),
+    path('api/viewers/', views.ingest_viewer_counts, name='ingest_viewer_counts'),
+    path('api/teams/', views.team_api_list, name='team_api_list'),
+    path('api/teams/<int:team_id>/', views.team_api_detail, name='team_api_detail'),
+    path('api/uploads/', views.upload_start, name='upload_start'),
+    path('api/uploads/<str:upload_id>/', views.upload_chunk, name='upload_chunk'),
     path('teams/<int:team_id>/', views.team_detail, name='team_detail'),
     path('teams/<int:team_id>/tournaments/', views.team_tournaments, name='team_tournaments'),
     path('calendar/', views.calendar_view, name='calendar_view'),
+    path('calendar/month.json', views.calendar_month_data, name='calendar_month_data'),
+    path('teams/<int:pk>/calendar.ics', views.calendar_feed, {'kind': 'team'}, name='team_calendar_feed'),
+    path('tournaments/<int:pk>/calendar.ics', views.calendar_feed, {'kind': 'tournament'}, name='tournament_calendar_feed'),
+    path('games/<int:pk>/calendar.ics', views.calendar_feed, {'kind': 'game'}, name='game_calendar_feed'),
+    path('metrics', views.metrics_view, name='metrics'),
     path('match-stats/', views.overall_match_stats, name='overall_match_stats'),
     path('tournaments/<int:pk>/register/', views.tournament_register, name='tournament_register'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
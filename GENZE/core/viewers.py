@@ -0,0 +1,119 @@
+# core/viewers.py
+"""
+Viewer-count ingestion.
+
+Stream stats arrive as many samples per second per match, but only the
+latest value matters. Samples are coalesced in a store (last write wins per
+match) and flushed on an interval as one batched UPDATE, so the hot Match
+rows are written once per flush instead of once per sample.
+
+Stores:
+  MemoryViewerStore  - in-process dict; for the ingest_viewer_counts command.
+  CacheViewerStore   - the shared Django cache (Redis, CACHE_URL); web workers
+                       record, the Celery flush task drains.
+  DirectViewerStore  - no coalescing: each batch of samples is written as it
+                       arrives. default_store when the cache is per-process
+                       (core.shared_cache), where the flush task would never
+                       see what the web workers recorded.
+"""
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import shared_cache
+from .models import Match
+from .templatetags.number_format import k_format
+
+CACHE_PREFIX = 'viewers:'
+CACHE_TIMEOUT = 15 * 60  # a stream that stops reporting drops out after this
+
+
+def viewer_label(count):
+    """Same compact format as the k_format template filter, e.g. 1500 -> '1.5K viewers'."""
+    return f"{k_format(count)} viewers"
+
+
+class MemoryViewerStore:
+    def __init__(self):
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def record(self, match_id, count):
+        with self._lock:
+            self._latest[int(match_id)] = int(count)
+
+    def record_many(self, samples):
+        with self._lock:
+            for match_id, count in samples:
+                self._latest[int(match_id)] = int(count)
+
+    def drain(self):
+        """Return {match_id: count} collected since the last drain and reset."""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        return latest
+
+
+class CacheViewerStore:
+    """
+    Keeps one cache key per match. drain() only looks up matches that are
+    currently live (the only ones with streams), so no shared dirty-set is
+    needed and concurrent writers can't lose each other's ids.
+    """
+
+    def record(self, match_id, count):
+        cache.set(f"{CACHE_PREFIX}{int(match_id)}", int(count), CACHE_TIMEOUT)
+
+    def record_many(self, samples):
+        latest = {}
+        for match_id, count in samples:
+            latest[f"{CACHE_PREFIX}{int(match_id)}"] = int(count)
+        cache.set_many(latest, CACHE_TIMEOUT)
+
+    def drain(self):
+        live_ids = Match.objects.filter(status='live').values_list('id', flat=True)
+        keys = {f"{CACHE_PREFIX}{match_id}": match_id for match_id in live_ids}
+        found = cache.get_many(list(keys))
+        return {keys[key]: count for key, count in found.items()}
+
+
+class DirectViewerStore:
+    def record(self, match_id, count):
+        self.record_many([(match_id, count)])
+
+    def record_many(self, samples):
+        latest = MemoryViewerStore()
+        latest.record_many(samples)
+        flush(latest)
+
+    def drain(self):
+        return {}
+
+
+def flush(store, batch_size=500):
+    """
+    Write the coalesced counts with one bulk UPDATE per batch, skipping rows
+    whose stored value already matches. Returns the number of rows written.
+    updated_at is left alone on purpose: viewer churn shouldn't invalidate
+    the conditional-GET validators of pages that don't show it.
+    """
+    latest = store.drain()
+    if not latest:
+        return 0
+
+    current = dict(
+        Match.objects.filter(pk__in=latest.keys()).values_list('id', 'viewer_count')
+    )
+    changed = [
+        Match(pk=match_id, viewer_count=count, viewer_label=viewer_label(count))
+        for match_id, count in latest.items()
+        if match_id in current and current[match_id] != count
+    ]
+    if changed:
+        with transaction.atomic():
+            Match.objects.bulk_update(changed, ['viewer_count', 'viewer_label'], batch_size=batch_size)
+    return len(changed)
+
+
+default_store = CacheViewerStore() if shared_cache.is_shared() else DirectViewerStore()
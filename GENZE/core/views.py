@@ -4,26 +4,31 @@ from django.utils import timezone
 from collections import defaultdict
 from django.core.paginator import Paginator
 from datetime import timedelta, datetime, date
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse, StreamingHttpResponse
 from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib import messages
+from django.core.files.storage import default_storage
+from django.db import transaction
+import json
 from collections import defaultdict
 from collections import OrderedDict
 from core.models import Match, Reminder
-from .models import Tournament, Team, NewsArticle, Match, Player, Game, MatchReminder, TournamentParticipant
+from .models import Tournament, Team, NewsArticle, Match, Player, Game, TournamentParticipant, normalize_email
+from . import conditional, ical, calendar_grid, projections, ratelimit, idempotency, uploads, news, feeds, metrics, rosters
+from . import task_metrics  # noqa: F401 -- registers the worker's metrics so /metrics renders them
+from .viewers import default_store as viewer_store
+from .scoring import StaleScoreError, COUNTER_FIELDS, SCORE_FIELDS, increment, set_scores
 
+@conditional.conditional_page('home', conditional.home_stamps)
 def home_page(request):
     featured_tournaments = Tournament.objects.filter(featured=True).order_by('start_date').only(
         'id', 'title', 'game__name', 'status', 'prize_pool', 'teams',
         'location', 'start_date', 'end_date', 'image'
     )
 
-    main_article = NewsArticle.objects.order_by('-date').first()
-    other_articles = (
-        NewsArticle.objects.exclude(id=main_article.id).order_by('-date')[:6]
-        if main_article else NewsArticle.objects.order_by('-date')[:6]
-    )
+    # Hero slot + next six in one (cached) query, without article bodies
+    main_article, other_articles = news.front_page()
 
     context = {
         'featured_tournaments': featured_tournaments,
@@ -84,24 +89,24 @@ def teams_page(request):
                                Q(matches_as_team2__team1_score__isnull=False) &
                                Q(matches_as_team2__team2_score__isnull=False)),
 
-        championships=Count('matches_as_team1', filter=Q(matches_as_team1__stage__icontains='final') &
+        championships=Count('matches_as_team1', filter=Q(matches_as_team1__is_final=True) &
                              Q(matches_as_team1__status='completed') &
                              Q(matches_as_team1__team1_score__isnull=False) &
                              Q(matches_as_team1__team2_score__isnull=False) &
                              Q(matches_as_team1__team1_score__gt=F('matches_as_team1__team2_score')))
-                      + Count('matches_as_team2', filter=Q(matches_as_team2__stage__icontains='final') &
+                      + Count('matches_as_team2', filter=Q(matches_as_team2__is_final=True) &
                               Q(matches_as_team2__status='completed') &
                               Q(matches_as_team2__team1_score__isnull=False) &
                               Q(matches_as_team2__team2_score__isnull=False) &
                               Q(matches_as_team2__team2_score__gt=F('matches_as_team2__team1_score'))),
 
         next_match_date=Subquery(upcoming_match_subquery, output_field=DateTimeField())
-    ).prefetch_related('players')
+    ).prefetch_related(rosters.roster())  # roster columns only; evaluated once below
 
-    # Rankings queryset
+    # Rankings queryset — ordered by the stored Elo rating (core.ratings)
     team_rankings = teams_with_stats.annotate(
-        points=F('wins') * 3
-    ).order_by('-points', '-wins', 'name')
+        points=F('wins') * 3,
+    ).order_by('-rating', '-points', 'name')
 
     # Compute win_rate on the queryset actually used for rendering
     for t in team_rankings:
@@ -152,8 +157,9 @@ def teams_page(request):
 
     return render(request, 'core/teams.html', context)
 
+@conditional.conditional_page('team', conditional.team_detail_stamps, last_modified=False)
 def team_detail(request, team_id):
-    team = get_object_or_404(Team.objects.prefetch_related('players'), pk=team_id)
+    team = get_object_or_404(Team.objects.prefetch_related(rosters.roster()), pk=team_id)
 
     # Stats
     completed_scored_team1 = team.matches_as_team1.filter(
@@ -171,10 +177,10 @@ def team_detail(request, team_id):
     wins = completed_scored_team1.filter(team1_score__gt=F('team2_score')).count() + \
            completed_scored_team2.filter(team2_score__gt=F('team1_score')).count()
     championships = completed_scored_team1.filter(
-        stage__icontains='final',
+        is_final=True,
         team1_score__gt=F('team2_score')
     ).count() + completed_scored_team2.filter(
-        stage__icontains='final',
+        is_final=True,
         team2_score__gt=F('team1_score')
     ).count()
     win_rate = round((wins / matches_played) * 100, 1) if matches_played else 0
@@ -221,8 +227,8 @@ def schedule_page(request):
     location = request.GET.get('location') or ''
     now = timezone.now()
 
-    # Base queryset
-    qs = Match.objects.select_related('tournament', 'team1', 'team2').order_by('match_time')
+    # Base queryset, projected to the columns schedule_list / upcoming_sidebar render
+    qs = projections.schedule_matches().order_by('match_time')
 
     # Filters
     if game:
@@ -294,44 +300,24 @@ def schedule_page(request):
         'timezones_count': timezones_count,
     })
 
-def calendar_view(request):
-    # Get month/year from query params or default to current month/year
+def _calendar_month(request):
+    # Month/year from query params, defaulting to the current month
     try:
         month = int(request.GET.get('month', timezone.now().month))
         year = int(request.GET.get('year', timezone.now().year))
+        date(year, month, 1)
     except ValueError:
         month = timezone.now().month
         year = timezone.now().year
+    return year, month
 
-    # First day of selected month
-    start_date = date(year, month, 1)
-
-    # First day of next month
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
-    else:
-        end_date = date(year, month + 1, 1)
 
-    # ✅ Show ALL matches for the month (no status filter)
-    matches = Match.objects.select_related('tournament', 'team1', 'team2') \
-                           .filter(match_time__date__gte=start_date,
-                                   match_time__date__lt=end_date) \
-                           .order_by('match_time')
+def calendar_view(request):
+    year, month = _calendar_month(request)
+    game = request.GET.get('game') or ''
 
-    # Group matches by date
-    matches_by_day = defaultdict(list)
-    for match in matches:
-        matches_by_day[match.match_time.date()].append(match)
-
-    # Days in month
-    days_in_month = (end_date - start_date).days
-    calendar_days = []
-    for i in range(days_in_month):
-        day = start_date + timedelta(days=i)
-        calendar_days.append({
-            'date': day,
-            'matches': matches_by_day.get(day, [])
-        })
+    # ✅ Show ALL matches for the month (no status filter), summarised per day and cached
+    calendar_days = calendar_grid.month_grid(year, month, game)
 
     # Previous and next month for navigation
     if month == 1:
@@ -357,13 +343,39 @@ def calendar_view(request):
         'prev_year': prev_year,
         'next_month': next_month,
         'next_year': next_year,
+        'game': game,
     })
 
-def results_page(request):
-    # Keep your existing implementation; ensure completed matches render recap links
-    matches = Match.objects.filter(status='completed').select_related('tournament', 'team1', 'team2').order_by('-match_time')[:20]
-    return render(request, 'core/results.html', {'recent_results': matches, 'games': Game.objects.all()})
 
+def calendar_month_data(request):
+    """JSON variant of the calendar grid for client-side month navigation."""
+    year, month = _calendar_month(request)
+    game = request.GET.get('game') or ''
+    days = calendar_grid.month_grid(year, month, game)
+    return JsonResponse({'year': year, 'month': month, 'game': game, 'days': calendar_grid.as_json(days)})
+
+
+FEED_OWNERS = {'team': (Team, 'name'), 'tournament': (Tournament, 'title'), 'game': (Game, 'name')}
+
+
+@conditional.conditional_page('ical', conditional.calendar_feed_stamps, per_user=False, pass_stamps=True)
+def calendar_feed(request, kind, pk, stamps):
+    """Subscribable .ics feed of a team's, tournament's or game's matches."""
+    model, label = FEED_OWNERS[kind]
+    owner = get_object_or_404(model.objects.only(label), pk=pk)
+    key = ical.cache_key(kind, pk, conditional.stamps_version(stamps))
+    body = ical.cached_calendar(key)
+    if body is not None:
+        response = HttpResponse(body, content_type=ical.CONTENT_TYPE)
+    else:
+        chunks = ical.iter_calendar(ical.feed_matches(kind, pk), f"GENZE • {getattr(owner, label)}", host=request.get_host().split(':')[0])
+        response = StreamingHttpResponse(ical.caching(chunks, key), content_type=ical.CONTENT_TYPE)
+    response['Content-Disposition'] = f'inline; filename="{kind}-{pk}.ics"'
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+@idempotency.idempotent('create_reminder', json=True)
+@ratelimit.rate_limited('create_reminder', email_field='email', json=True)
 def create_reminder(request):
     if request.method != 'POST':
         return JsonResponse({"ok": False, "error": "Invalid request"}, status=400)
@@ -377,22 +389,20 @@ def create_reminder(request):
     else:
         email = request.POST.get('email')
 
+    email = normalize_email(email)
     if not email:
         return JsonResponse({"ok": False, "error": "Email is required"}, status=400)
-
-    reminders_created = []
+    user = request.user if request.user.is_authenticated else None
 
     if bulk:
-        # Create reminders for all upcoming matches in current filters
-        matches = Match.objects.filter(status='upcoming', match_time__gte=timezone.now())
-        for match in matches:
-            reminder = Reminder.objects.create(
-                match=match,
-                user=request.user if request.user.is_authenticated else None,
-                email=email,
-                notify_minutes_before=notify_minutes_before
-            )
-            reminders_created.append(reminder)
+        # Create reminders for all upcoming matches in current filters; ones this
+        # address already has (same match and notice) are left as they are
+        matches = Match.objects.filter(status='upcoming', match_time__gte=timezone.now()).values_list('id', flat=True)
+        reminders_created = Reminder.objects.bulk_create(
+            [Reminder(match_id=match_id, user=user, email=email, notify_minutes_before=notify_minutes_before)
+             for match_id in matches],
+            ignore_conflicts=True,
+        )
 
         subject = "Bulk reminders set for upcoming matches"
         message = (
@@ -408,13 +418,10 @@ def create_reminder(request):
             return JsonResponse({"ok": False, "error": "match_id is required"}, status=400)
 
         match = get_object_or_404(Match, id=match_id)
-        reminder = Reminder.objects.create(
-            match=match,
-            user=request.user if request.user.is_authenticated else None,
-            email=email,
-            notify_minutes_before=notify_minutes_before
+        Reminder.objects.get_or_create(
+            match=match, email=email, notify_minutes_before=notify_minutes_before,
+            defaults={'user': user},
         )
-        reminders_created.append(reminder)
 
         subject = f"Reminder set for {match.team1.name} vs {match.team2.name}"
         message = (
@@ -439,13 +446,145 @@ def create_reminder(request):
     return JsonResponse({"ok": True, "message": "Reminder(s) set and email sent"})  
     return JsonResponse({"ok": False, "error": "Invalid request"}, status=400)  
 
+def match_score_update(request, pk):
+    """
+    Score feed / multi-admin endpoint (staff only, POST).
+      increment: ?op=increment&points_team1=1&viewer_count=250   (atomic F() adds)
+      set:       ?op=set&version=7&team1_score=2&current_round=5   (optimistic, 409 if stale)
+    """
+    if request.method != 'POST':
+        return JsonResponse({"ok": False, "error": "Invalid request"}, status=400)
+    if not request.user.is_staff:
+        return JsonResponse({"ok": False, "error": "Forbidden"}, status=403)
+
+    op = request.POST.get('op', 'increment')
+    try:
+        if op == 'increment':
+            deltas = {f: int(request.POST[f]) for f in COUNTER_FIELDS if request.POST.get(f)}
+            row = increment(pk, **deltas)
+            if row is None:
+                return JsonResponse({"ok": False, "error": "Match not found"}, status=404)
+            return JsonResponse({"ok": True, **row})
+
+        if op == 'set':
+            values = {}
+            for f in SCORE_FIELDS:
+                raw = request.POST.get(f)
+                if raw is not None:
+                    if raw == '' and f.startswith('points_'):
+                        raise ValueError(f"{f} cannot be empty")
+                    values[f] = int(raw) if raw != '' else None
+            version = set_scores(pk, request.POST['version'], **values)
+            return JsonResponse({"ok": True, "id": pk, "version": version})
+    except (KeyError, ValueError) as e:
+        return JsonResponse({"ok": False, "error": f"Bad parameters: {e}"}, status=400)
+    except Match.DoesNotExist:
+        return JsonResponse({"ok": False, "error": "Match not found"}, status=404)
+    except StaleScoreError as e:
+        return JsonResponse({"ok": False, "error": str(e), "version": e.current_version}, status=409)
+
+    return JsonResponse({"ok": False, "error": "Unknown op"}, status=400)
+
+def ingest_viewer_counts(request):
+    """
+    Staff-only POST of viewer-count samples, coalesced in the shared store and
+    written by flush_viewer_counts_task. Body: {"<match_id>": count, ...} or
+    {"samples": [[match_id, count], ...]}.
+    """
+    if request.method != 'POST':
+        return JsonResponse({"ok": False, "error": "Invalid request"}, status=400)
+    if not request.user.is_staff:
+        return JsonResponse({"ok": False, "error": "Forbidden"}, status=403)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        pairs = payload['samples'] if 'samples' in payload else payload.items()
+        samples = [(int(match_id), int(count)) for match_id, count in pairs]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({"ok": False, "error": "Malformed samples"}, status=400)
+    if any(count < 0 for _, count in samples):
+        return JsonResponse({"ok": False, "error": "Viewer counts must be non-negative"}, status=400)
+
+    viewer_store.record_many(samples)
+    return JsonResponse({"ok": True, "accepted": len(samples)})
+
+@ratelimit.rate_limited('upload', json=True)
+def upload_start(request):
+    """POST kind (logo/banner/avatar) and size in bytes; returns the upload id and chunk size."""
+    if request.method != 'POST':
+        return JsonResponse({"ok": False, "error": "Invalid request"}, status=400)
+    try:
+        upload_id = uploads.start(request.POST.get('kind'), int(request.POST.get('size', 0)),
+                                  uploads.owner(request))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Invalid size"}, status=400)
+    except uploads.UploadError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=400)
+    return JsonResponse({"ok": True, "id": upload_id, "chunk_size": settings.UPLOAD_CHUNK_BYTES})
+
+def upload_chunk(request, upload_id):
+    """
+    GET: how much of the upload has arrived (resume point).
+    POST ?offset=N with the raw bytes as the body: append the next chunk.
+    """
+    owner = uploads.owner(request)
+    try:
+        if request.method == 'GET':
+            return JsonResponse({"ok": True, **uploads.status(upload_id, owner)})
+        if request.method != 'POST':
+            return JsonResponse({"ok": False, "error": "Invalid request"}, status=400)
+        if int(request.META.get('CONTENT_LENGTH') or 0) > settings.UPLOAD_CHUNK_BYTES:
+            return JsonResponse({"ok": False, "error": "Chunk too large"}, status=413)
+        # read from the request stream, not request.body, so the chunk isn't buffered whole
+        uploads.append(upload_id, owner, int(request.GET.get('offset', -1)), request)
+        return JsonResponse({"ok": True, **uploads.status(upload_id, owner)})
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Invalid offset"}, status=400)
+    except uploads.UploadError as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=409)
+
+@conditional.conditional_page('team-api', conditional.team_api_stamps)
+def team_api_list(request):
+    """
+    GET /api/teams/?after=<id>&limit=50&game=<name>&players=0 -- teams by id with
+    their rosters; follow `next` until it's null.
+    """
+    try:
+        size = int(request.GET.get('limit', rosters.PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Invalid limit"}, status=400)
+    results, cursor = rosters.page(
+        after=rosters.parse_after(request.GET.get('after')), size=size,
+        game=request.GET.get('game'), players=request.GET.get('players') != '0',
+    )
+    next_url = None
+    if cursor is not None:
+        query = request.GET.copy()
+        query['after'] = cursor
+        next_url = f"{request.path}?{query.urlencode()}"
+    return JsonResponse({"results": results, "next": next_url})
+
+@conditional.conditional_page('team-api', conditional.team_api_stamps)
+def team_api_detail(request, team_id):
+    data = rosters.detail(team_id)
+    if data is None:
+        return JsonResponse({"ok": False, "error": "Team not found"}, status=404)
+    return JsonResponse(data)
+
+def metrics_view(request):
+    """Prometheus scrape target: core.request_metrics from every web worker, core.task_metrics from Celery."""
+    if not metrics.allowed(request):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 def delete_reminder(request, pk):
     if request.method != 'POST':
         return HttpResponseBadRequest('Invalid method')
-    reminder = get_object_or_404(MatchReminder, pk=pk)
+    reminder = get_object_or_404(Reminder, pk=pk)
     reminder.delete()
     return JsonResponse({'ok': True})
 
+@conditional.conditional_page('results', conditional.results_stamps, last_modified=False)
 def results_page(request):
     """
     Renders the results page with live matches, recent results, and tournament brackets.
@@ -455,23 +594,15 @@ def results_page(request):
     game_filter = request.GET.get('game')
 
     # Live matches
-    live_matches = Match.objects.filter(status='live').select_related(
-        'tournament', 'team1', 'team2'
-    ).order_by('match_time')
+    live_matches = projections.live_matches().order_by('match_time')
 
     # Recent results (completed matches)
-    recent_results = Match.objects.filter(status='completed').select_related(
-        'tournament', 'team1', 'team2'
-    ).order_by('-match_time')
+    recent_results = projections.recent_results().order_by('-match_time')
 
     # Apply filters
     if game_filter:
-        live_matches = live_matches.filter(
-            Q(team1__game__iexact=game_filter) | Q(team2__game__iexact=game_filter)
-        )
-        recent_results = recent_results.filter(
-            Q(team1__game__iexact=game_filter) | Q(team2__game__iexact=game_filter)
-        )
+        live_matches = projections.for_game(live_matches, game_filter)
+        recent_results = projections.for_game(recent_results, game_filter)
 
     if team_id:
         live_matches = live_matches.filter(Q(team1_id=team_id) | Q(team2_id=team_id))
@@ -482,18 +613,19 @@ def results_page(request):
         tournaments_qs = Tournament.objects.filter(game__name__iexact=game_filter)
     else:
         tournaments_qs = Tournament.objects.all()
+    tournaments_qs = tournaments_qs.select_related('game').only('id', 'title', 'teams', 'game__name')
 
-    brackets = []
-    for t in tournaments_qs:
-        upcoming_matches = Match.objects.filter(
-            tournament=t,
-            status='upcoming'
-        ).select_related('team1', 'team2').order_by('match_time')
-
-        if team_id:
-            upcoming_matches = upcoming_matches.filter(Q(team1_id=team_id) | Q(team2_id=team_id))
+    # Upcoming matches of every listed tournament in one query, grouped here
+    upcoming_matches = projections.bracket_matches(
+        Match.objects.filter(status='upcoming', tournament__in=tournaments_qs)
+    ).order_by('match_time')
+    if team_id:
+        upcoming_matches = upcoming_matches.filter(Q(team1_id=team_id) | Q(team2_id=team_id))
+    upcoming_by_tournament = defaultdict(list)
+    for match in upcoming_matches:
+        upcoming_by_tournament[match.tournament_id].append(match)
 
-        brackets.append((t, upcoming_matches))
+    brackets = [(t, upcoming_by_tournament[t.id]) for t in tournaments_qs]
 
     context = {
         'live_matches': live_matches,
@@ -532,8 +664,8 @@ def team_tournaments(request, team_id):
     ).distinct().count()
 
     tournaments_won = Tournament.objects.filter(
-        Q(matches__team1=team, matches__stage__icontains='final', matches__team1_score__gt=F('matches__team2_score')) |
-        Q(matches__team2=team, matches__stage__icontains='final', matches__team2_score__gt=F('matches__team1_score'))
+        Q(matches__team1=team, matches__is_final=True, matches__team1_score__gt=F('matches__team2_score')) |
+        Q(matches__team2=team, matches__is_final=True, matches__team2_score__gt=F('matches__team1_score'))
     ).distinct().count()
 
     return render(request, 'core/team_tournaments.html', {
@@ -545,6 +677,9 @@ def team_tournaments(request, team_id):
         'tournaments_won': tournaments_won,
     })
 
+@uploads.validating_uploads
+@idempotency.idempotent('register')
+@ratelimit.rate_limited('register')
 def register_page(request):
     if request.method == 'POST':
         team_name = request.POST.get('teamName')
@@ -552,35 +687,66 @@ def register_page(request):
         team_game_id = request.POST.get('teamGame')  # now expecting Game.id
         team_region = request.POST.get('teamRegion')
         team_description = request.POST.get('teamDescription')  # new field
-        banner = request.FILES.get('banner')
-        logo = request.FILES.get('logo')
 
         # Validate required fields
         if team_name and team_tag and team_game_id:
             game_obj = get_object_or_404(Game, pk=team_game_id)
 
-            new_team = Team.objects.create(
-                name=team_name,
-                tag=team_tag,
-                game=game_obj,  # store FK instead of string
-                region=team_region,
-                banner=banner,
-                logo=logo,
-                description=team_description  # new model field
-            )
-
-            # Save up to 5 players with name, role, avatar
-            for i in range(1, 6):
-                player_name = request.POST.get(f'player_name_{i}')
-                player_role = request.POST.get(f'player_role_{i}')
-                player_avatar = request.FILES.get(f'player_avatar_{i}')
-                if player_name or player_avatar:
-                    Player.objects.create(
-                        team=new_team,
-                        name=player_name or f'Player {i}',
-                        role=player_role or '',
-                        avatar=player_avatar
-                    )
+            # Files are already in the temp area (chunked uploads) or in temp files
+            # (multipart, checked while streaming); only move them into storage here
+            owner = uploads.owner(request)
+            staged = []
+
+            def stage(field, kind):
+                upload_id = request.POST.get(f'{field}_upload')
+                uploaded = request.FILES.get(field)
+                if upload_id:
+                    name = uploads.stage_upload(upload_id, owner, kind)
+                elif uploaded:
+                    name = uploads.stage_file(uploaded, kind)
+                else:
+                    return ''
+                staged.append(name)
+                return name
+
+            try:
+                logo, banner = stage('logo', 'logo'), stage('banner', 'banner')
+                avatars = {i: stage(f'player_avatar_{i}', 'avatar') for i in range(1, 6)}
+            except uploads.UploadError as e:
+                for name in staged:
+                    default_storage.delete(name)
+                messages.error(request, f"Upload failed: {e}")
+                return idempotency.failed(redirect('register'))
+
+            with transaction.atomic():
+                new_team = Team.objects.create(
+                    name=team_name,
+                    tag=team_tag,
+                    game=game_obj,  # store FK instead of string
+                    region=team_region,
+                    banner=banner,
+                    logo=logo,
+                    description=team_description  # new model field
+                )
+
+                # Save up to 5 players with name, role, avatar (one INSERT, files already stored)
+                players = []
+                for i in range(1, 6):
+                    player_name = request.POST.get(f'player_name_{i}')
+                    player_role = request.POST.get(f'player_role_{i}')
+                    if player_name or avatars[i]:
+                        players.append(Player(
+                            team=new_team,
+                            name=player_name or f'Player {i}',
+                            role=player_role or '',
+                            avatar=avatars[i]
+                        ))
+                Player.objects.bulk_create(players)
+
+                if staged:
+                    # Resize / strip EXIF in the worker once the rows are committed
+                    team_id = new_team.id
+                    transaction.on_commit(lambda: uploads.enqueue_processing(team_id))
 
             return redirect(f'/teams/?highlight={new_team.id}&tab=rankings')
 
@@ -599,14 +765,17 @@ def register_page(request):
     # For now, fixed at 48h — can be made dynamic based on soonest registration_deadline
     registration_deadline_hours = 48
 
-    return render(request, 'core/register.html', {
+    response = render(request, 'core/register.html', {
         'open_tournaments': open_tournaments,
         'games': Game.objects.all(),
         'open_tournaments_count': open_tournaments_count,
         'total_prize_pool': total_prize_pool,
         'registration_deadline_hours': registration_deadline_hours
     })
+    # a POST that gets here was missing required fields: nothing was written
+    return idempotency.failed(response) if request.method == 'POST' else response
 
+@conditional.conditional_page('tournament', conditional.tournament_detail_stamps)
 def tournament_detail_page(request, pk):
     # ✅ Load all fields needed for detail page without extra queries
     tournament = get_object_or_404(
@@ -622,22 +791,46 @@ def tournament_detail_page(request, pk):
     return render(request, 'core/tournament_detail.html', context)
 
 
-def news_detail(request, pk):
-    news_item = get_object_or_404(NewsArticle, pk=pk)
+def _news_detail(request, **lookup):
+    news_item = get_object_or_404(NewsArticle, **lookup)
     return render(request, 'core/news_detail.html', {'news_item': news_item})
 
 
-def news_page(request):
-    all_articles = NewsArticle.objects.order_by('-date')
-    paginator = Paginator(all_articles, 9)
-    page_number = request.GET.get('page')
-    news_page_obj = paginator.get_page(page_number)
+def news_detail(request, pk):
+    # Old numeric links: send them to the slug URL
+    article = get_object_or_404(NewsArticle.objects.only('id', 'slug'), pk=pk)
+    if article.slug:
+        return redirect(article, permanent=True)
+    return _news_detail(request, pk=pk)
+
+
+@conditional.conditional_page('news-item', conditional.news_detail_stamps)
+def news_detail_slug(request, slug):
+    return _news_detail(request, slug=slug)
 
+
+@conditional.conditional_page('news', conditional.news_list_stamps)
+def news_page(request):
+    # Keyset pages (?before=<date>.<id>): no COUNT, no OFFSET
+    articles, next_cursor = news.page(news.parse_cursor(request.GET.get('before')))
     return render(request, 'core/news.html', {
-        'articles': news_page_obj
+        'articles': articles,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('before'),
     })
 
 
+@conditional.conditional_page('news-feed', conditional.news_list_stamps, per_user=False)
+def news_feed(request, fmt):
+    """RSS 2.0 (news/feed/rss/) or Atom (news/feed/atom/) of the latest articles."""
+    feed = feeds.FEEDS[fmt]
+    body = news.cached(f"feed:{fmt}:{request.get_host()}", lambda: feed()(request).content)
+    response = HttpResponse(body, content_type=feed.feed_type.content_type)
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+@conditional.conditional_page('tournaments', conditional.tournaments_stamps)
 def tournaments_page(request):
     """
     Unified tournaments page with filters, sorting, and totals.
@@ -718,18 +911,18 @@ def overall_match_stats(request):
         matches_played=Count('matches_as_team1', filter=Q(matches_as_team1__status__iexact='completed'))
                        + Count('matches_as_team2', filter=Q(matches_as_team2__status__iexact='completed')),
 
-        championships=Count('matches_as_team1', filter=Q(matches_as_team1__stage__icontains='final') &
+        championships=Count('matches_as_team1', filter=Q(matches_as_team1__is_final=True) &
                              Q(matches_as_team1__status__iexact='completed') &
                              Q(matches_as_team1__team1_score__gt=F('matches_as_team1__team2_score')))
-                      + Count('matches_as_team2', filter=Q(matches_as_team2__stage__icontains='final') &
+                      + Count('matches_as_team2', filter=Q(matches_as_team2__is_final=True) &
                               Q(matches_as_team2__status__iexact='completed') &
                               Q(matches_as_team2__team2_score__gt=F('matches_as_team2__team1_score')))
     )
 
-    # 3️⃣ Rankings + win_rate
+    # 3️⃣ Rankings (stored Elo rating) + win_rate
     team_rankings = teams_with_stats.annotate(
-        points=F('wins') * 3
-    ).order_by('-points', '-wins', 'name')
+        points=F('wins') * 3,
+    ).order_by('-rating', '-points', 'name')
 
     for t in team_rankings:
         t.win_rate = round((t.wins / t.matches_played) * 100, 1) if t.matches_played else 0
@@ -784,6 +977,8 @@ def overall_match_stats(request):
     }
     return render(request, 'core/overall_match_stats.html', context)
 
+@idempotency.idempotent('tournament_register')
+@ratelimit.rate_limited('tournament_register', email_field='manager_email')
 def tournament_register(request, pk):
     tournament = get_object_or_404(Tournament.objects.select_related('game'), pk=pk)
 
@@ -812,9 +1007,11 @@ def tournament_register(request, pk):
             messages.success(request, f'{team.name} has been registered for {tournament.title}.')
             return redirect('tournament_detail_page', pk=tournament.id)
 
-    return render(request, 'core/tournament_register.html', {
+    response = render(request, 'core/tournament_register.html', {
         'tournament': tournament,
         'tournament': tournament,
         'team': team
     })
+    # a POST re-rendered here failed validation (messages.error above)
+    return idempotency.failed(response) if request.method == 'POST' else response
 
@@ -0,0 +1,20 @@
+# gunicorn.conf.py -- read by `gunicorn main_project.wsgi` run from this directory
+import os
+import shutil
+
+wsgi_app = 'main_project.wsgi'
+
+
+def on_starting(server):
+    # per-worker metric files from a previous master would be added to this one's totals
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        from core.metrics import mark_process_dead
+        mark_process_dead(worker.pid, directory)
@@ -1,3 +1,14 @@
-from .celery import app as celery_app
+# The Celery app is loaded on first use rather than at package import, so web
+# workers and one-shot commands don't pay for celery/kombu at startup. The
+# worker (-A main_project) finds main_project.celery on its own, and
+# core.tasks imports it before anything is enqueued.
 
-__all__ = ('celery_app',)
\ No newline at end of file
+
+def __getattr__(name):
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ('celery_app',)
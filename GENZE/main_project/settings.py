@@ -10,8 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+from datetime import timedelta
 from pathlib import Path
-from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,9 +24,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-hq97w31yskb(hug%jba7xkd_5#5m4ef$j48vp3*zwww@n)8qx&'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') in ('1', 'true', 'True')
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [h for h in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if h]
 
 
 # Application definition
@@ -43,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # outermost, so its timings and query counts cover the other middleware too
+    'core.request_metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.ReplicaReadMiddleware',
 ]
 
 ROOT_URLCONF = 'main_project.urls'
@@ -58,29 +61,96 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept per process; with DEBUG the autoreloader
+            # still resets the cache when a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'main_project.wsgi.application'
 
+# Compile every template when a web worker boots (core.template_cache.warm_up)
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '0' if DEBUG else '1') in ('1', 'true', 'True')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Picked from the environment so production can run PostgreSQL while local
+# dev keeps the zero-config SQLite file:
+#   DB_ENGINE=postgres DB_NAME=... DB_USER=... DB_PASSWORD=... DB_HOST=... DB_PORT=...
+#   DB_POOL=1            -> psycopg connection pool (DB_POOL_MIN / DB_POOL_MAX)
+#   DB_CONN_MAX_AGE=60   -> persistent connections (ignored when DB_POOL is on)
+#   DB_REPLICA_HOST=...  -> read replica used by public GET views (see core.db_router)
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE in ('postgres', 'postgresql'):
+    DB_POOL = os.environ.get('DB_POOL', '') in ('1', 'true', 'True')
+
+    def _postgres(host, port):
+        options = {}
+        if DB_POOL:
+            options['pool'] = {
+                'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+                'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            }
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'genze'),
+            'USER': os.environ.get('DB_USER', 'genze'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': host,
+            'PORT': port,
+            # the pool owns connection reuse; CONN_MAX_AGE must stay 0 with it
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': options,
+        }
+
+    DATABASES = {
+        'default': _postgres(os.environ.get('DB_HOST', 'localhost'), os.environ.get('DB_PORT', '5432')),
     }
-}
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = _postgres(
+            os.environ['DB_REPLICA_HOST'],
+            os.environ.get('DB_REPLICA_PORT', os.environ.get('DB_PORT', '5432')),
+        )
+        DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+else:
+    # SQLite: WAL lets readers run alongside the writer, busy timeout makes
+    # writers wait instead of failing with "database is locked", and
+    # IMMEDIATE transactions take the write lock up front so two writers
+    # never deadlock on a read->write lock upgrade.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                'timeout': int(os.environ.get('DB_BUSY_TIMEOUT', 20)),  # seconds
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA busy_timeout=%d;' % (int(os.environ.get('DB_BUSY_TIMEOUT', 20)) * 1000)
+                ),
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
 
 
 # Password validation
@@ -123,6 +193,45 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media is content-addressed and deduplicated across models (core.storage).
+# MEDIA_STORAGE=s3 puts the blobs in an S3-compatible bucket instead of
+# MEDIA_ROOT -- MinIO on localhost:9000 stands in for S3 locally (needs
+# django-storages[s3]).
+MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'local')
+MEDIA_BACKENDS = {
+    'local': {'backend': 'django.core.files.storage.FileSystemStorage'},
+    's3': {
+        'backend': 'storages.backends.s3.S3Storage',
+        'options': {
+            'bucket_name': os.environ.get('MEDIA_BUCKET', 'genze-media'),
+            'endpoint_url': os.environ.get('MEDIA_S3_ENDPOINT', 'http://localhost:9000'),
+            'access_key': os.environ.get('MEDIA_S3_ACCESS_KEY', 'minioadmin'),
+            'secret_key': os.environ.get('MEDIA_S3_SECRET_KEY', 'minioadmin'),
+            'querystring_auth': False,
+            'file_overwrite': True,  # blob names are content hashes
+        },
+    },
+}
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.ContentAddressedStorage',
+        'OPTIONS': MEDIA_BACKENDS[MEDIA_STORAGE],
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Uploads (core.uploads): multipart files spill to temp files past 256 KB, and
+# the registration views check images while they stream (validating_uploads);
+# the registration form sends images in chunks to UPLOAD_TEMP_DIR instead,
+# resumable for UPLOAD_TTL seconds. Every web worker must see UPLOAD_TEMP_DIR.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+UPLOAD_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_TEMP_DIR = BASE_DIR / 'upload_tmp'
+UPLOAD_TTL = 24 * 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -137,9 +246,93 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 
+# Cross-process state (viewer samples, rate-limit buckets, idempotency keys, task
+# locks) lives in the default cache, so production points it at the broker's Redis.
+# Empty CACHE_URL: per-process LocMem, for a single dev server only (core.shared_cache).
+CACHE_URL = os.environ.get('CACHE_URL', '' if DEBUG else 'redis://localhost:6379/1')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    } if CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+# Refuse to start (system check core.E001) when the default cache is per-process
+SHARED_CACHE_REQUIRED = os.environ.get('SHARED_CACHE_REQUIRED', '0' if DEBUG else '1') in ('1', 'true', 'True')
+
+# Token-bucket limits for anonymous writes (core.ratelimit): "N/period" per key kind
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'cache')  # 'cache' (shared via CACHES) or 'memory' (per process)
+RATE_LIMIT_IP_HEADER = os.environ.get('RATE_LIMIT_IP_HEADER') or None  # e.g. HTTP_X_FORWARDED_FOR behind a proxy
+RATE_LIMITS = {
+    'create_reminder': {'ip': '30/m', 'session': '20/m', 'email': '20/h'},
+    'register': {'ip': '10/h', 'session': '5/h'},
+    'tournament_register': {'ip': '20/h', 'session': '10/h', 'email': '10/h'},
+    'upload': {'ip': '60/h', 'session': '30/h'},
+}
+# Replay windows for repeated POSTs (core.idempotency)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_FINGERPRINT_TTL = 10 * 60
+
+# Expected match length per game (minutes) for schedule conflict checks (core.schedule_conflicts)
+MATCH_DURATION_MINUTES = {
+    'default': 60,
+    'VALORANT': 90,
+    'CSGO': 90,
+    'Dota2': 75,
+    'Fortnite': 30,
+}
+MAX_MATCHES_PER_TOURNAMENT_DAY = 24
+
+# How often coalesced viewer-count samples are written to Match rows
+VIEWER_FLUSH_SECONDS = float(os.environ.get('VIEWER_FLUSH_SECONDS', 10))
+
+# Reminders of matches that started longer ago than this are archived (core.retention)
+REMINDER_RETENTION = timedelta(days=2)
+REMINDER_ARCHIVE = os.environ.get('REMINDER_ARCHIVE', 'table')  # 'table' or 'jsonl'
+REMINDER_ARCHIVE_DIR = BASE_DIR / 'archive'
+REMINDER_ARCHIVE_BATCH = 500
+REMINDER_ARCHIVE_PAUSE = 0.05  # seconds between batches, so other writers get the lock
+
+# Metrics (core.metrics): 'cache' shares counters between the Celery worker and
+# web workers through the shared CACHES above (run both with the same CACHE_URL);
+# /metrics answers METRICS_ALLOWED_IPS or "Authorization: Bearer METRICS_TOKEN".
+METRICS_STORE = os.environ.get('METRICS_STORE', 'cache')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+# Per-request metrics (core.request_metrics): each gunicorn worker writes its totals
+# here so whichever worker answers /metrics reports them all. Unset: this process only.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_SECONDS = 1.0
+STATSD_ADDRESS = os.environ.get('STATSD_ADDRESS')  # "host:port" to also emit statsd packets
+# A periodic task run still holding its lock after this long is assumed dead (core.task_metrics)
+TASK_LOCK_TTL = 10 * 60
+
+# Matches starting within this window get an ETA go-live task (core.match_status);
+# the scheduling pass below must run more often than the window is long.
+MATCH_START_HORIZON_MINUTES = 15
+
 CELERY_BEAT_SCHEDULE = {
-    'update-match-statuses-every-minute': {
+    # Go-live ETA tasks for the next horizon, plus the catch-up for lost ones
+    'schedule-match-starts': {
+        'task': 'core.tasks.schedule_match_starts_task',
+        'schedule': timedelta(minutes=5),
+    },
+    # live -> completed and reminder emails
+    'update-match-statuses': {
         'task': 'core.tasks.update_match_statuses_task',
-        'schedule': crontab(),  # every minute
+        'schedule': timedelta(minutes=1),
+    },
+    'flush-viewer-counts': {
+        'task': 'core.tasks.flush_viewer_counts_task',
+        'schedule': VIEWER_FLUSH_SECONDS,
+    },
+    'archive-reminders': {
+        'task': 'core.tasks.archive_reminders_task',
+        'schedule': timedelta(hours=1),
+    },
+    'purge-stale-uploads': {
+        'task': 'core.tasks.purge_stale_uploads_task',
+        'schedule': timedelta(hours=1),
     },
 }